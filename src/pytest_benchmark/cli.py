@@ -5,6 +5,7 @@
 
 import argparse
 from functools import partial
+from os.path import commonpath
 
 from _pytest import pathlib
 from _pytest._io import TerminalWriter
@@ -19,14 +20,42 @@ from .plugin import add_csv_options
 from .plugin import add_display_options
 from .plugin import add_global_options
 from .plugin import add_histogram_options
+from .stats import StreamingStats
+from .table import STAT_PROPS
 from .table import CompareBetweenResults
 from .table import TableResults
+from .timers import compute_timer_precision
+from .timers import default_timer
 from .utils import DEFAULT_COLUMNS
 from .utils import NAME_FORMATTERS
+from .utils import NameWrapper
+from .utils import close_storage
 from .utils import first_or_value
+from .utils import format_time
+from .utils import get_machine_id
+from .utils import get_runtime_id
 from .utils import load_storage
+from .utils import load_timer
 from .utils import parse_columns
+from .utils import parse_workers
 from .utils import report_noprogress
+from .utils import short_filename
+
+# what the grouping, the name formatters and the tables use (the rest, like the rounds data, is dropped while loading)
+BENCHMARK_FIELDS = (
+    'name',
+    'fullname',
+    'group',
+    'param',
+    'params',
+    'extra_info',
+    'has_error',
+    'outliers',
+    'rounds',
+    'iterations',
+    *STAT_PROPS,
+)
+HISTOGRAM_FIELDS = ('ld15iqr', 'q1', 'q3', 'hd15iqr')
 
 COMPARE_HELP = """examples:
 
@@ -128,6 +157,49 @@ def make_parser():
         default=None,
         help="Only show benchmarks matching the given expression. Uses the same syntax as pytest's -k option (e.g. 'foo and not bar').",
     )
+    compare_command.add_argument(
+        '--workers',
+        metavar='NUM',
+        type=parse_workers,
+        default=None,
+        help='Number of processes used to decode the saved runs. Default: one per CPU if there are many files.',
+    )
+
+    history_command = parser.add_command(
+        'history',
+        help='Show the stats of a benchmark in each saved run.',
+        description='Show the stats of a benchmark in each saved run, computed from the rounds data (saved with '
+        '--benchmark-save-data) in constant memory.',
+    )
+    history_command.add_argument('fullname', help='Full name of the benchmark (eg: tests/test_foo.py::test_bar[1]).')
+    history_command.add_argument(
+        '--columns',
+        metavar='LABELS',
+        type=parse_columns,
+        default=DEFAULT_COLUMNS,
+        help=f"Comma-separated list of columns to show in the result table. Default: '{', '.join(DEFAULT_COLUMNS)}'",
+    )
+    add_histogram_options(history_command.add_argument, prefix='')
+    add_glob_or_file(history_command.add_argument)
+
+    precision_command = parser.add_command(
+        'precision',
+        description='Measure the precision of timers and save it in the cache used by --benchmark-precision-cache.',
+    )
+    precision_command.add_argument(
+        'timers',
+        metavar='TIMER',
+        nargs='*',
+        type=load_timer,
+        help=f'Timers to measure, in dotted form. Default: {str(NameWrapper(default_timer))!r}',
+    )
+
+    parser.add_command(
+        'flush',
+        help='Send the spooled runs to the elasticsearch storage.',
+        description='Send the runs that could not be saved to the elasticsearch storage (they were spooled in '
+        '.benchmarks/elasticsearch-spool.jsonl).',
+    )
 
     return parser
 
@@ -158,8 +230,17 @@ def main():
     if args.verbose:
         level = Logger.VERBOSE
     logger = Logger(level)
-    storage = load_storage(args.storage, logger=logger, netrc=args.netrc)
+    # like pytest does, when there's no config file the rootdir is the current directory
+    rootdir = locate_config(invocation_dir=pathlib.Path.cwd(), args=())[0]
+    storage = load_storage(args.storage, logger=logger, netrc=args.netrc, rootdir=rootdir)
+
+    try:
+        run_command(parser, args, logger, storage)
+    finally:
+        close_storage(storage)
 
+
+def run_command(parser, args, logger, storage):
     hook = HookDispatch(mode=args.importmode, root=pathlib.Path('.'))
 
     if args.command == 'list':
@@ -190,7 +271,14 @@ def main():
                 config=Config.fromdictargs({'benchmark_time_unit': args.time_unit}, []),
             ),
         )
-        benchmarks = storage.load_benchmarks(*args.glob_or_file)
+        if any(hasattr(hook.conftest, name) for name in ('pytest_benchmark_group_stats', 'pytest_benchmark_scale_unit')):
+            # custom hooks could use any field, keep everything
+            fields = None
+        else:
+            fields = {*BENCHMARK_FIELDS, *args.columns, args.sort}
+            if histogram:
+                fields.update(HISTOGRAM_FIELDS)
+        benchmarks = storage.load_benchmarks(*args.glob_or_file, fields=fields, workers=args.workers)
         if args.filter_expr:
             from _pytest.mark.expression import Expression  # noqa: PLC0415
 
@@ -212,6 +300,58 @@ def main():
             (output_file,) = args.csv
 
             results_csv.render(output_file, groups)
+    elif args.command == 'history':
+        if not hasattr(storage, 'load_data'):
+            parser.error(f'history is not supported by {type(storage).__name__}')
+        runs = list(storage.load_data(args.fullname, *args.glob_or_file))
+        sources = [short_filename(path) for path, _, _ in runs]
+        common = len(commonpath(sources)) if sources else 0
+        benchmarks = []
+        for (path, iterations, data), source in zip(runs, sources):
+            stats = StreamingStats()
+            for duration in data:
+                stats.update(duration)
+            benchmarks.append(
+                {
+                    'name': args.fullname.split('::')[-1],
+                    'fullname': args.fullname,
+                    'group': None,
+                    'param': None,
+                    'params': None,
+                    'path': str(path),
+                    'source': source[common:].lstrip(r'\/'),
+                    'iterations': iterations,
+                    **stats.as_dict(),
+                }
+            )
+        if benchmarks:
+            results_table = TableResults(
+                columns=args.columns,
+                sort='fullname',
+                histogram=first_or_value(args.histogram, False),
+                name_format=NAME_FORMATTERS['normal'],
+                logger=logger,
+                scale_unit=partial(hook.pytest_benchmark_scale_unit, config=None),
+            )
+            groups = hook.pytest_benchmark_group_stats(benchmarks=benchmarks, group_by='fullname', config=None)
+            results_table.display(TerminalReporter(), groups, progress_reporter=report_noprogress)
+        else:
+            logger.warning(f'No rounds data for {args.fullname!r} in {storage}.')
+    elif args.command == 'precision':
+        # the cache is per machine, like the benchmarks saved from pytest
+        storage = load_storage(args.storage, logger=logger, netrc=args.netrc, default_machine_id=get_machine_id())
+        runtime_id = get_runtime_id()
+        precision_cache = storage.load_cache('precision')
+        for timer in args.timers or [NameWrapper(default_timer)]:
+            precision = compute_timer_precision(timer.target)
+            precision_cache[str(timer)] = {'precision': precision, 'runtime': runtime_id}
+            print(f'{timer}: {format_time(precision)}s')
+        storage.save_cache('precision', precision_cache)
+        close_storage(storage)
+    elif args.command == 'flush':
+        if not hasattr(storage, 'flush'):
+            parser.error(f'flush is not supported by {type(storage).__name__}')
+        storage.flush()
     elif args.command is None:
         parser.error('missing command (available commands: {})'.format(', '.join(map(repr, parser.commands.choices))))
     else:
@@ -3,19 +3,32 @@
   PYTEST_DONT_REWRITE
 """
 
+import asyncio
 import cProfile
 import gc
+import inspect
+import multiprocessing
+import multiprocessing.connection
+import os
 import pstats
 import sys
+import threading
 import time
 import traceback
+import tracemalloc
 import typing
+from contextlib import ExitStack
 from math import ceil
 from pathlib import Path
 
+import pytest
+
+from .runner import make_empty_measure
+from .runner import make_measure
 from .timers import compute_timer_precision
 from .utils import NameWrapper
 from .utils import format_time
+from .utils import get_source_hash
 from .utils import slugify
 
 statistics: typing.Any
@@ -27,7 +40,17 @@ except (ImportError, SyntaxError):
     statistics = None
 else:
     statistics_error = None
+    from .stats import GCStats
+    from .stats import MemoryStats
     from .stats import Metadata
+    from .stats import ResourceStats
+    from .stats import RunningStats
+    from .stats import fit_complexity
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore[assignment]
 
 
 class FixtureAlreadyUsed(Exception):
@@ -58,8 +81,83 @@ class PauseInstrumentation:
             sys.setprofile(self.prev_profiler)
 
 
+class GCRecorder:
+    """
+    Records the garbage collections (how many for each generation and the time spent in them) that happen while active,
+    using :data:`gc.callbacks`.
+    """
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.collections = [0, 0, 0]
+        self.duration = 0
+        self.start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.start = self.timer()
+        elif self.start is not None:
+            self.duration += self.timer() - self.start
+            self.collections[info['generation']] += 1
+            self.start = None
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        gc.callbacks.remove(self)
+
+
+class ResourceRecorder:
+    """
+    Records the OS resource usage while active: CPU times, context switches and page faults from :func:`resource.getrusage`
+    and the bytes read and written (by any read/write syscall, thus including cached I/O) from ``/proc/self/io``.
+    Counters that are not available on the platform are recorded as zeros.
+    """
+
+    io_path = Path('/proc/self/io')
+    io_available = True
+
+    def __init__(self):
+        self.start = None
+        self.usage = None
+        self.io_read = 0
+
+    def snapshot(self):
+        if resource is None:
+            values = [0.0, 0.0, 0, 0, 0, 0]
+        else:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            values = [usage.ru_utime, usage.ru_stime, usage.ru_nvcsw, usage.ru_nivcsw, usage.ru_minflt, usage.ru_majflt]
+        io = {}
+        self.io_read = 0
+        if self.io_available:
+            try:
+                text = self.io_path.read_text()
+                io = dict(line.split(': ') for line in text.splitlines())
+            except (OSError, ValueError):
+                ResourceRecorder.io_available = False
+            else:
+                self.io_read = len(text)
+        values.append(int(io.get('rchar', 0)))
+        values.append(int(io.get('wchar', 0)))
+        return values
+
+    def __enter__(self):
+        self.start = self.snapshot()
+        # the read of /proc/self/io is accounted after the snapshot was taken
+        self.start[-2] += self.io_read
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.usage = [end - start for start, end in zip(self.start, self.snapshot())]
+
+
 class BenchmarkFixture:
     _precisions: typing.ClassVar[dict[str, float]] = {}
+    _overheads: typing.ClassVar[dict[tuple[str, int, int], float]] = {}
+    _overhead_rounds = 5
 
     def __init__(
         self,
@@ -79,6 +177,16 @@ class BenchmarkFixture:
         cprofile,
         cprofile_loops,
         cprofile_dump,
+        memory=False,
+        gc_stats=False,
+        os_stats=False,
+        unroll=1,
+        subtract_overhead=False,
+        target_precision=None,
+        calibration_cache=None,
+        precision_cache=None,
+        streaming_stats=False,
+        bootstrap=None,
         group=None,
     ):
         self.name = node.name
@@ -103,6 +211,15 @@ class BenchmarkFixture:
         self._add_stats = add_stats
         self._calibration_precision = calibration_precision
         self._warmup = warmup and warmup_iterations
+        self._unroll = unroll
+        self._subtract_overhead = subtract_overhead
+        self._target_precision = target_precision
+        self._calibration_cache = calibration_cache
+        self._precision_cache = precision_cache
+        self._streaming_stats = streaming_stats
+        self._bootstrap = bootstrap
+        self._gc_stats = gc_stats
+        self._os_stats = os_stats
         self._logger = logger
         self._warner = warner
         self._cleanup_callbacks = []
@@ -111,48 +228,118 @@ class BenchmarkFixture:
         self.cprofile_loops = cprofile_loops
         self.cprofile_dump = cprofile_dump
         self.cprofile_stats = None
+        self.memory = memory
         self.stats = None
+        self._all_stats = []
+        self._loop = None
 
     @property
     def enabled(self):
         return not self.disabled
 
     def _get_precision(self, timer):
+        name = str(NameWrapper(timer))
         if timer in self._precisions:
             timer_precision = self._precisions[timer]
+        elif self._precision_cache and name in self._precision_cache:
+            timer_precision = self._precisions[timer] = self._precision_cache[name]
+            self._logger.debug('')
+            self._logger.debug(f'Using cached precision for {name} ... {format_time(timer_precision)}s.', blue=True, bold=True)
         else:
             timer_precision = self._precisions[timer] = compute_timer_precision(timer)
+            if self._precision_cache is not None:
+                self._precision_cache[name] = timer_precision
             self._logger.debug('')
-            self._logger.debug(f'Computing precision for {NameWrapper(timer)} ... {format_time(timer_precision)}s.', blue=True, bold=True)
+            self._logger.debug(f'Computing precision for {name} ... {format_time(timer_precision)}s.', blue=True, bold=True)
         return timer_precision
 
+    def _get_overhead(self, loops_range):
+        """
+        Measures (once per timer, loop size and unroll factor) how long the timing loop takes with nothing in it.
+        """
+        key = self._timer, len(loops_range) if loops_range else 0, self._unroll
+        if key in self._overheads:
+            overhead = self._overheads[key]
+        else:
+            measure = make_empty_measure(self._unroll)
+            durations = []
+            with PauseInstrumentation():
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    for _ in range(self._overhead_rounds):
+                        duration = measure(loops_range, self._timer)
+                        durations.append(duration if loops_range else duration[0])
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+            overhead = self._overheads[key] = min(durations)
+            self._logger.debug(
+                f'  Measured overhead for {NameWrapper(self._timer)} with {key[1]} loops ... {format_time(overhead)}s.', blue=True
+            )
+        return overhead
+
+    def _get_loop(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise pytest.UsageError(
+                "Can't benchmark coroutine functions from a running event loop (eg: an async test). "
+                'The benchmark fixture runs its own loop, use it from a regular (non-async) test.'
+            )
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def _make_sync(self, function):
+        """
+        Returns a plain callable for `function`. Coroutine functions are run to completion in the fixture's event loop.
+        """
+        if not inspect.iscoroutinefunction(function):
+            return function
+        loop = self._get_loop()
+
+        def wrapper(*args, **kwargs):
+            return loop.run_until_complete(function(*args, **kwargs))
+
+        return wrapper
+
+    def _make_measure(self, function_to_benchmark, args, kwargs):
+        if inspect.iscoroutinefunction(function_to_benchmark):
+            loop = self._get_loop()
+            async_measure = make_measure(function_to_benchmark, args, kwargs, unroll=self._unroll, is_async=True)
+
+            def measure(loops_range, timer):
+                # The loop is reused for all the rounds and the timer only runs inside the coroutine,
+                # thus the loop and task setup costs are not included in the measurements.
+                return loop.run_until_complete(async_measure(loops_range, timer))
+
+            return measure
+        else:
+            return make_measure(function_to_benchmark, args, kwargs, unroll=self._unroll)
+
     def _make_runner(self, function_to_benchmark, args, kwargs):
+        measure = self._make_measure(function_to_benchmark, args, kwargs)
+
         def runner(loops_range, timer=self._timer):
             gc_enabled = gc.isenabled()
             if self._disable_gc:
                 gc.disable()
             try:
-                if loops_range:
-                    start = timer()
-                    for _ in loops_range:
-                        function_to_benchmark(*args, **kwargs)
-                    end = timer()
-                    return end - start
-                else:
-                    start = timer()
-                    result = function_to_benchmark(*args, **kwargs)
-                    end = timer()
-                    return end - start, result
+                return measure(loops_range, timer)
             finally:
                 if gc_enabled:
                     gc.enable()
 
         return runner
 
-    def _make_stats(self, iterations):
+    def _make_stats(self, iterations, overhead):
         bench_stats = Metadata(
             self,
             iterations=iterations,
+            overhead=overhead if self._subtract_overhead else 0,
             options={
                 'disable_gc': self._disable_gc,
                 'timer': self._timer,
@@ -160,9 +347,23 @@ class BenchmarkFixture:
                 'max_time': self._max_time,
                 'min_time': self._min_time,
                 'warmup': self._warmup,
+                'unroll': self._unroll,
+                'overhead': overhead,
+                'subtract_overhead': self._subtract_overhead,
+                'target_precision': self._target_precision,
+                'memory': self.memory,
+                'gc_stats': self._gc_stats,
+                'os_stats': self._os_stats,
+                'streaming_stats': self._streaming_stats,
+                'bootstrap': self._bootstrap,
             },
         )
+        if self._gc_stats:
+            bench_stats.gc = GCStats()
+        if self._os_stats:
+            bench_stats.resources = ResourceStats()
         self._add_stats(bench_stats)
+        self._all_stats.append(bench_stats)
         self.stats = bench_stats
         return bench_stats
 
@@ -175,6 +376,57 @@ class BenchmarkFixture:
             stats.dump_stats(output_file)
             self._logger.info(f'Saved profile: {output_file}', bold=True)
 
+    def _run_round(self, runner, loops_range, stats):
+        """
+        Runs a measured round and adds it to the stats (with the garbage collections that happened and the resource usage,
+        if enabled). Returns whatever the runner returned.
+        """
+        if stats.gc is None and stats.resources is None:
+            output = runner(loops_range)
+        else:
+            with ExitStack() as stack:
+                resource_recorder = stats.resources is not None and stack.enter_context(ResourceRecorder())
+                gc_recorder = stats.gc is not None and stack.enter_context(GCRecorder(self._timer))
+                output = runner(loops_range)
+            if gc_recorder:
+                stats.gc.update(gc_recorder.collections, gc_recorder.duration)
+            if resource_recorder:
+                stats.resources.update(resource_recorder.usage)
+        stats.update(output if loops_range else output[0])
+        return output
+
+    def _measure_memory(self, call_target, args, kwargs):
+        """
+        Runs ``call_target`` once under :mod:`tracemalloc`. Returns the peak and the net (still allocated on return,
+        including the returned value) traced bytes, and the net change in allocated blocks.
+        """
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            gc.collect()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            blocks = sys.getallocatedblocks()
+            result = call_target(*args, **kwargs)
+            blocks = sys.getallocatedblocks() - blocks
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        del result
+        return peak - before, current - before, blocks
+
+    def _run_memory(self, call_target, rounds, make_arguments, teardown=None):
+        self._logger.debug(f'  Running {rounds} rounds x 1 iterations with tracemalloc ...', yellow=True, bold=True)
+        self.stats.memory = MemoryStats()
+        for _ in range(rounds):
+            args, kwargs = make_arguments()
+            with PauseInstrumentation():
+                self.stats.memory.update(*self._measure_memory(call_target, args, kwargs))
+            if teardown is not None:
+                teardown(*args, **kwargs)
+
     def __call__(self, function_to_benchmark, *args, **kwargs):
         if self._mode:
             self.has_error = True
@@ -206,47 +458,364 @@ class BenchmarkFixture:
             self.has_error = True
             raise
 
+    def threads(self, target, *args, counts=(1, 2, 4, 8), **kwargs):
+        """
+        Runs ``target(*args, **kwargs)`` concurrently from each of the given thread ``counts`` and adds a result for every
+        count. Useful to see how code that releases the GIL (or runs on a free-threaded build) scales.
+        """
+        if self._mode:
+            self.has_error = True
+            raise FixtureAlreadyUsed(f'Fixture can only be used once. Previously it was used in {self._mode} mode.')
+        try:
+            self._mode = 'benchmark.threads(...)'
+            return self._raw_threads(target, args, kwargs, counts)
+        except Exception:
+            self.has_error = True
+            raise
+
+    def processes(self, target, *args, workers=None, **kwargs):
+        """
+        Runs ``target(*args, **kwargs)`` at the same time in ``workers`` forked processes (by default, as many as the CPUs)
+        to measure the aggregate throughput.
+        """
+        if self._mode:
+            self.has_error = True
+            raise FixtureAlreadyUsed(f'Fixture can only be used once. Previously it was used in {self._mode} mode.')
+        try:
+            self._mode = 'benchmark.processes(...)'
+            return self._raw_processes(target, args, kwargs, workers)
+        except Exception:
+            self.has_error = True
+            raise
+
+    def sweep(self, target, sizes, make_input=None):
+        """
+        Runs ``target(make_input(size))`` (or ``target(size)`` if there's no ``make_input``) for each of the given ``sizes``
+        and adds a result for every size. The medians are fitted against the usual complexity classes and the best fit is
+        stored in each result. Returns the list of results from ``target``.
+        """
+        if self._mode:
+            self.has_error = True
+            raise FixtureAlreadyUsed(f'Fixture can only be used once. Previously it was used in {self._mode} mode.')
+        try:
+            self._mode = 'benchmark.sweep(...)'
+            return self._raw_sweep(target, sizes, make_input)
+        except Exception:
+            self.has_error = True
+            raise
+
     def _raw(self, function_to_benchmark, *args, **kwargs):
         loops_range = None
 
         if self.enabled:
-            runner = self._make_runner(function_to_benchmark, args, kwargs)
+            loops_range = self._run_rounds(function_to_benchmark, args, kwargs)
+        if self.cprofile_loops is None:
+            cprofile_loops = loops_range or range(1)
+        else:
+            cprofile_loops = range(self.cprofile_loops)
+        call_target = self._make_sync(function_to_benchmark)
+        if self.enabled and self.memory:
+            self._run_memory(call_target, self._min_rounds, lambda: (args, kwargs))
+        if self.enabled and self.cprofile:
+            with PauseInstrumentation():
+                profile = cProfile.Profile()
+                for _ in cprofile_loops:
+                    function_result = profile.runcall(call_target, *args, **kwargs)
+                self._save_cprofile(profile)
+        else:
+            function_result = call_target(*args, **kwargs)
+        return function_result
+
+    def _run_rounds(self, function_to_benchmark, args, kwargs, param=None):
+        """
+        Calibrates and runs all the rounds for a new result. Returns the ``loops_range`` used in the rounds.
+        """
+        runner = self._make_runner(function_to_benchmark, args, kwargs)
+
+        with PauseInstrumentation():
+            duration, iterations, loops_range = self._calibrate_timer(runner, self._get_calibration_key(function_to_benchmark, param))
+
+        # Choose how many times we must repeat the test
+        rounds = ceil(self._max_time / duration)
+        rounds = max(rounds, self._min_rounds)
+        rounds = min(rounds, sys.maxsize)
+
+        stats = self._make_stats(iterations, self._get_overhead(loops_range))
 
+        self._logger.debug(
+            f'  Running {"up to " if self._target_precision else ""}{rounds} rounds x {iterations} iterations ...',
+            yellow=True,
+            bold=True,
+        )
+        run_start = time.time()
+        if self._warmup:
+            warmup_rounds = min(rounds, max(1, int(self._warmup / iterations)))
+            self._logger.debug(f'  Warmup {warmup_rounds} rounds x {iterations} iterations ...')
+            with PauseInstrumentation():
+                for _ in range(warmup_rounds):
+                    runner(loops_range)
+        with PauseInstrumentation():
+            if self._target_precision:
+                self._run_until_precise(runner, loops_range, stats, rounds)
+            else:
+                for _ in range(rounds):
+                    self._run_round(runner, loops_range, stats)
+        self._logger.debug(f'  Ran for {format_time(time.time() - run_start)}s.', yellow=True, bold=True)
+        return loops_range
+
+    def _run_until_precise(self, runner, loops_range, stats, max_rounds):
+        """
+        Runs rounds until the 95% confidence interval of the mean is narrower than the target precision. The rounds count
+        computed from ``max_time`` is used as a cap.
+        """
+        running_stats = RunningStats()
+        for _ in range(max_rounds):
+            self._run_round(runner, loops_range, stats)
+            running_stats.update(stats.stats.last)
+            if running_stats.count >= self._min_rounds and running_stats.relative_precision <= self._target_precision:
+                self._logger.debug(
+                    f'  Reached target precision ({running_stats.relative_precision:.2%}) after {running_stats.count} rounds.',
+                    green=True,
+                )
+                break
+        else:
+            self._logger.debug(
+                f'  Stopped without reaching target precision ({running_stats.relative_precision:.2%}) after {running_stats.count} rounds.',
+                red=True,
+            )
+
+    def _raw_threads(self, target, args, kwargs, counts):
+        if inspect.iscoroutinefunction(target):
+            raise TypeError("Can't use coroutine functions with `benchmark.threads`.")
+        if not counts or not all(isinstance(count, int) and count > 0 for count in counts):
+            raise ValueError('Must have positive ints for `counts`.')
+
+        if self.enabled:
+            # calibration is done single-threaded, every thread does the same number of iterations per round
+            runner = self._make_runner(target, args, kwargs)
             with PauseInstrumentation():
-                duration, iterations, loops_range = self._calibrate_timer(runner)
+                duration, iterations, loops_range = self._calibrate_timer(runner, self._get_calibration_key(target))
 
-            # Choose how many times we must repeat the test
             rounds = ceil(self._max_time / duration)
             rounds = max(rounds, self._min_rounds)
             rounds = min(rounds, sys.maxsize)
 
-            stats = self._make_stats(iterations)
+            measure = make_measure(target, args, kwargs, unroll=self._unroll)
+            overhead = self._get_overhead(loops_range)
+            baseline = None
+            for count in sorted(set(counts)):
+                stats = self._make_stats(iterations, overhead)
+                self._add_param(stats, 'threads', count)
+                self._logger.debug(f'  Running {rounds} rounds x {iterations} iterations in {count} threads ...', yellow=True, bold=True)
+                run_start = time.time()
+                with PauseInstrumentation():
+                    wall_time = self._run_threads(measure, loops_range, count, rounds, stats)
+                self._logger.debug(f'  Ran for {format_time(time.time() - run_start)}s.', yellow=True, bold=True)
+                aggregate_ops = count * rounds * iterations / wall_time if wall_time else float('inf')
+                if baseline is None:
+                    baseline = count, aggregate_ops
+                baseline_count, baseline_ops = baseline
+                stats.threads = {
+                    'threads': count,
+                    'aggregate_ops': aggregate_ops,
+                    'scaling': aggregate_ops / baseline_ops * baseline_count / count if baseline_ops else 0.0,
+                }
+        return target(*args, **kwargs)
+
+    def _raw_sweep(self, target, sizes, make_input):
+        sizes = sorted(set(sizes))
+        if len(sizes) < 2 or not all(isinstance(size, int) and size > 0 for size in sizes):
+            raise ValueError('Must have at least 2 different positive ints for `sizes`.')
+        inputs = [make_input(size) if make_input else size for size in sizes]
 
-            self._logger.debug(f'  Running {rounds} rounds x {iterations} iterations ...', yellow=True, bold=True)
+        if self.enabled:
+            results = []
+            for size, value in zip(sizes, inputs):
+                self._logger.debug(f'  Size {size}:', yellow=True)
+                self._run_rounds(target, (value,), {}, param=f'size={size}')
+                self._add_param(self.stats, 'size', size)
+                results.append(self.stats)
+            complexity, coef, rms = fit_complexity(sizes, [stats.stats.median for stats in results])
+            for size, stats in zip(sizes, results):
+                stats.sweep = {
+                    'size': size,
+                    'complexity': complexity,
+                    'complexity_coef': coef,
+                    'complexity_rms': rms,
+                }
+        call_target = self._make_sync(target)
+        return [call_target(value) for value in inputs]
+
+    def _raw_processes(self, target, args, kwargs, workers):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if inspect.iscoroutinefunction(target):
+            raise TypeError("Can't use coroutine functions with `benchmark.processes`.")
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError('Must have positive int for `workers`.')
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError('`benchmark.processes` requires the fork start method (not available on this platform).')
+
+        if self.enabled:
+            # calibration is done in this process, every worker does the same number of iterations per round
+            runner = self._make_runner(target, args, kwargs)
+            with PauseInstrumentation():
+                duration, iterations, loops_range = self._calibrate_timer(runner, self._get_calibration_key(target))
+
+            rounds = ceil(self._max_time / duration)
+            rounds = max(rounds, self._min_rounds)
+            rounds = min(rounds, sys.maxsize)
+
+            measure = make_measure(target, args, kwargs, unroll=self._unroll)
+            stats = self._make_stats(iterations, self._get_overhead(loops_range))
+            self._logger.debug(f'  Running {rounds} rounds x {iterations} iterations in {workers} processes ...', yellow=True, bold=True)
             run_start = time.time()
-            if self._warmup:
-                warmup_rounds = min(rounds, max(1, int(self._warmup / iterations)))
-                self._logger.debug(f'  Warmup {warmup_rounds} rounds x {iterations} iterations ...')
-                with PauseInstrumentation():
-                    for _ in range(warmup_rounds):
-                        runner(loops_range)
             with PauseInstrumentation():
-                for _ in range(rounds):
-                    stats.update(runner(loops_range))
+                durations, wall_time = self._run_processes(measure, loops_range, workers, rounds)
             self._logger.debug(f'  Ran for {format_time(time.time() - run_start)}s.', yellow=True, bold=True)
-        if self.cprofile_loops is None:
-            cprofile_loops = loops_range or range(1)
-        else:
-            cprofile_loops = range(self.cprofile_loops)
-        if self.enabled and self.cprofile:
-            with PauseInstrumentation():
-                profile = cProfile.Profile()
-                for _ in cprofile_loops:
-                    function_result = profile.runcall(function_to_benchmark, *args, **kwargs)
-                self._save_cprofile(profile)
+            per_worker = [type(stats.stats)() for _ in range(workers)]
+            for index, duration in enumerate(durations):
+                per_worker[index // rounds].update(stats.update(duration))
+            stats.processes = {
+                'workers': workers,
+                'aggregate_ops': workers * rounds * iterations / wall_time if wall_time else float('inf'),
+                'per_worker': [worker_stats.as_dict() for worker_stats in per_worker],
+            }
+        return target(*args, **kwargs)
+
+    def _run_processes(self, measure, loops_range, workers, rounds):
+        """
+        Runs ``rounds`` rounds in ``workers`` forked processes. In every round the workers are released together from a
+        barrier. The durations are written in shared memory (worker by worker). Returns the durations and the total wall
+        time (from the release until the last worker finished).
+        """
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(workers + 1)
+        durations = context.Array('d', workers * rounds, lock=False)
+        errors = context.SimpleQueue()
+        finished = context.Array('b', workers, lock=False)
+
+        def worker(index):
+            try:
+                for position in range(index * rounds, (index + 1) * rounds):
+                    barrier.wait()
+                    durations[position] = measure(loops_range, self._timer)
+                    barrier.wait()
+                finished[index] = 1
+            except threading.BrokenBarrierError:
+                pass
+            except BaseException:
+                errors.put(traceback.format_exc())
+                barrier.abort()
+
+        def watchdog():
+            # a worker that dies hard (killed, crashed) never gets to the barrier again, the others would wait for it forever
+            # (the workers that exit after the last round are fine, the others might still be returning from the barrier)
+            pending = {process.sentinel: index for index, process in enumerate(processes)}
+            while pending:
+                for sentinel in multiprocessing.connection.wait(list(pending)):
+                    if not finished[pending.pop(sentinel)]:
+                        barrier.abort()
+                        return
+
+        processes = [context.Process(target=worker, args=(index,), daemon=True) for index in range(workers)]
+        watchdog_thread = threading.Thread(target=watchdog, daemon=True)
+        wall_time = 0
+        completed = 0
+        gc_enabled = gc.isenabled()
+        if self._disable_gc:
+            gc.disable()
+        try:
+            for process in processes:
+                process.start()
+            watchdog_thread.start()
+            for _ in range(rounds):
+                barrier.wait()
+                start = self._timer()
+                barrier.wait()
+                wall_time += self._timer() - start
+                completed += 1
+        except threading.BrokenBarrierError:
+            pass
+        finally:
+            barrier.abort()
+            for process in processes:
+                process.join()
+            if watchdog_thread.is_alive():
+                watchdog_thread.join()
+            if gc_enabled:
+                gc.enable()
+        if not errors.empty():
+            raise RuntimeError(f'A `benchmark.processes` worker has failed:\n{errors.get()}')
+        if completed < rounds:
+            exitcodes = ', '.join(str(process.exitcode) for process in processes)
+            raise RuntimeError(f'A `benchmark.processes` worker has died (exit codes: {exitcodes}).')
+        return durations[:], wall_time
+
+    @staticmethod
+    def _add_param(stats, name, value):
+        """
+        Adds an extra parameter to a result (for the modes that add multiple results).
+        """
+        suffix = f'{name}={value}'
+        if stats.param is None:
+            stats.name = f'{stats.name}[{suffix}]'
+            stats.fullname = f'{stats.fullname}[{suffix}]'
+            stats.param = suffix
         else:
-            function_result = function_to_benchmark(*args, **kwargs)
-        return function_result
+            stats.name = f'{stats.name[:-1]}-{suffix}]'
+            stats.fullname = f'{stats.fullname[:-1]}-{suffix}]'
+            stats.param = f'{stats.param}-{suffix}'
+        stats.params = dict(stats.params or {}, **{name: value})
+
+    def _run_threads(self, measure, loops_range, count, rounds, stats):
+        """
+        Runs ``rounds`` rounds in ``count`` threads. In every round the threads are released together from a barrier and
+        each one records its own duration. Returns the total wall time (from the release until the last thread finished).
+        """
+        barrier = threading.Barrier(count + 1)
+        durations = [[] for _ in range(count)]
+        errors = []
+
+        def worker(thread_durations):
+            try:
+                for _ in range(rounds):
+                    barrier.wait()
+                    thread_durations.append(measure(loops_range, self._timer))
+                    barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            except BaseException as exc:
+                errors.append(exc)
+                barrier.abort()
+
+        threads = [threading.Thread(target=worker, args=(thread_durations,), daemon=True) for thread_durations in durations]
+        wall_time = 0
+        gc_enabled = gc.isenabled()
+        if self._disable_gc:
+            gc.disable()
+        try:
+            for thread in threads:
+                thread.start()
+            for _ in range(rounds):
+                barrier.wait()
+                start = self._timer()
+                barrier.wait()
+                wall_time += self._timer() - start
+        except threading.BrokenBarrierError:
+            pass
+        finally:
+            barrier.abort()
+            for thread in threads:
+                thread.join()
+            if gc_enabled:
+                gc.enable()
+        if errors:
+            raise errors[0]
+        for round_durations in zip(*durations):
+            for duration in round_durations:
+                stats.update(duration)
+        return wall_time
 
     def _raw_pedantic(self, target, args=(), kwargs=None, setup=None, teardown=None, rounds=1, warmup_rounds=0, iterations=1):
         if kwargs is None:
@@ -275,12 +844,13 @@ class BenchmarkFixture:
                     args, kwargs = maybe_args
             return args, kwargs
 
+        call_target = self._make_sync(target)
         if self.disabled:
             args, kwargs = make_arguments()
-            return target(*args, **kwargs)
+            return call_target(*args, **kwargs)
 
-        stats = self._make_stats(iterations)
         loops_range = range(iterations) if iterations > 1 else None
+        stats = self._make_stats(iterations, self._get_overhead(loops_range))
         for _ in range(warmup_rounds):
             args, kwargs = make_arguments()
 
@@ -296,11 +866,9 @@ class BenchmarkFixture:
 
             runner = self._make_runner(target, args, kwargs)
             with PauseInstrumentation():
-                if loops_range:
-                    duration = runner(loops_range)
-                else:
-                    duration, result = runner(loops_range)
-            stats.update(duration)
+                output = self._run_round(runner, loops_range, stats)
+            if not loops_range:
+                _, result = output
 
             if teardown is not None:
                 teardown(*args, **kwargs)
@@ -308,10 +876,13 @@ class BenchmarkFixture:
         if loops_range:
             # if it has been looped then we don't have the result, we need to do 1 extra run for it
             args, kwargs = make_arguments()
-            result = target(*args, **kwargs)
+            result = call_target(*args, **kwargs)
             if teardown is not None:
                 teardown(*args, **kwargs)
 
+        if self.memory:
+            self._run_memory(call_target, rounds, make_arguments, teardown)
+
         if self.cprofile:
             if self.cprofile_loops is None:
                 cprofile_loops = loops_range or range(1)
@@ -322,7 +893,7 @@ class BenchmarkFixture:
             args, kwargs = make_arguments()
             for _ in cprofile_loops:
                 with PauseInstrumentation():
-                    profile.runcall(target, *args, **kwargs)
+                    profile.runcall(call_target, *args, **kwargs)
                 if teardown is not None:
                     teardown(*args, **kwargs)
             self._save_cprofile(profile)
@@ -349,10 +920,37 @@ class BenchmarkFixture:
         while self._cleanup_callbacks:
             callback = self._cleanup_callbacks.pop()
             callback()
+        # the session keeps the results until the end, but not the fixture (and the test node it holds)
+        while self._all_stats:
+            self._all_stats.pop().detach()
+        if self._loop is not None:
+            try:
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            finally:
+                self._loop.close()
+                self._loop = None
         if not self._mode and not self.skipped:
             self._logger.warning('Benchmark fixture was not used at all in this test!', warner=self._warner, suspend=True)
 
-    def _calibrate_timer(self, runner):
+    def _get_calibration_key(self, function, param=None):
+        """
+        Key for the calibration cache: the test, the source of the benchmarked function and the options that change the
+        calibration. Returns ``None`` if the cache is not enabled.
+        """
+        if self._calibration_cache is None:
+            return None
+        return '|'.join(
+            [
+                self.fullname if param is None else f'{self.fullname}[{param}]',
+                get_source_hash(function),
+                str(NameWrapper(self._timer)),
+                str(self._min_time),
+                str(self._calibration_precision),
+                str(self._unroll),
+            ]
+        )
+
+    def _calibrate_timer(self, runner, cache_key=None):
         timer_precision = self._get_precision(self._timer)
         min_time = max(self._min_time, timer_precision * self._calibration_precision)
         min_time_estimate = min_time * 5 / self._calibration_precision
@@ -364,7 +962,10 @@ class BenchmarkFixture:
             bold=True,
         )
 
-        loops = 1
+        cached_loops = self._calibration_cache.get(cache_key) if cache_key else None
+        loops = cached_loops or 1
+        if cached_loops:
+            self._logger.debug(f'    Checking {loops} iterations from the calibration cache.', green=True)
         while True:
             loops_range = range(loops)
             duration = runner(loops_range)
@@ -380,6 +981,12 @@ class BenchmarkFixture:
 
             self._logger.debug(f'    Measured {loops} iterations: {format_time(duration)}s.', yellow=True)
             if duration >= min_time:
+                if cached_loops and loops > 1 and duration >= min_time * 10:
+                    # the cached loops are way too many now (the function got slower), start over
+                    self._logger.debug('    Cached iterations are too slow, recalibrating.', red=True)
+                    cached_loops = None
+                    loops = 1
+                    continue
                 break
 
             if duration >= min_time_estimate:
@@ -393,4 +1000,6 @@ class BenchmarkFixture:
                     break
             else:
                 loops *= 10
+        if cache_key:
+            self._calibration_cache[cache_key] = loops
         return duration, loops, loops_range
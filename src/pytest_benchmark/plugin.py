@@ -3,6 +3,7 @@
   PYTEST_DONT_REWRITE
 """
 
+import argparse
 import operator
 import platform
 import sys
@@ -21,20 +22,26 @@ from .session import PerformanceRegression
 from .timers import default_timer
 from .utils import DEFAULT_COLUMNS
 from .utils import NameWrapper
+from .utils import close_storage
 from .utils import consistent_dumps
 from .utils import get_commit_info
 from .utils import get_current_time
 from .utils import get_tag
 from .utils import operations_unit
+from .utils import parse_bootstrap
 from .utils import parse_columns
 from .utils import parse_compare_fail
 from .utils import parse_cprofile_loops
+from .utils import parse_cpu_list
 from .utils import parse_name_format
+from .utils import parse_precision
 from .utils import parse_rounds
 from .utils import parse_save
+from .utils import parse_sched
 from .utils import parse_seconds
 from .utils import parse_sort
 from .utils import parse_timer
+from .utils import parse_unroll
 from .utils import parse_warmup
 from .utils import time_unit
 
@@ -132,7 +139,7 @@ def add_global_options(addoption, prefix='benchmark-'):
         *[] if prefix else ['-s'],
         metavar='URI',
         default='file://./.benchmarks',
-        help='Specify a path to store the runs as uri in form file://path or'
+        help='Specify a path to store the runs as uri in form file://path, sqlite://path/to/file.db or'
         ' elasticsearch+http[s]://host1,host2/[index/doctype?project_name=Project] '
         '(when --benchmark-save or --benchmark-autosave are used). For backwards compatibility unexpected values '
         'are converted to file://<value>. Default: %(default)r.',
@@ -186,6 +193,14 @@ def pytest_addoption(parser):
         'exceeded if test function is very slow or --benchmark-min-rounds is large (it takes precedence). '
         'Default: %(default)r',
     )
+    group.addoption(
+        '--benchmark-target-precision',
+        metavar='PERCENT',
+        type=parse_precision,
+        default=None,
+        help='Stop running rounds as soon as the 95%% confidence interval of the mean is within PERCENT of the mean '
+        '(eg: 1%%). Rounds still obey --benchmark-min-rounds and --benchmark-max-time (as a cap). Default: disabled.',
+    )
     group.addoption(
         '--benchmark-min-rounds',
         metavar='NUM',
@@ -208,6 +223,20 @@ def pytest_addoption(parser):
         help='Precision to use when calibrating number of iterations. Precision of 10 will make the timer look 10 times'
         ' more accurate, at a cost of less precise measure of deviations. Default: %(default)r',
     )
+    group.addoption(
+        '--benchmark-calibration-cache',
+        action='store_true',
+        default=False,
+        help='Reuse the iteration counts calibrated in previous runs (cached in the storage, per machine, test and source of '
+        'the benchmarked function). The calibration then needs just one check pass. Default: %(default)r',
+    )
+    group.addoption(
+        '--benchmark-precision-cache',
+        action='store_true',
+        default=False,
+        help='Reuse the timer precision measured in previous runs (cached in the storage, per machine) until the '
+        "interpreter or the kernel changes. Use 'pytest-benchmark precision' to measure it again. Default: %(default)r",
+    )
     group.addoption(
         '--benchmark-warmup',
         metavar='KIND',
@@ -225,7 +254,52 @@ def pytest_addoption(parser):
         default=100000,
         help='Max number of iterations to run in the warmup phase. Default: %(default)r',
     )
+    group.addoption(
+        '--benchmark-unroll',
+        metavar='NUM',
+        type=parse_unroll,
+        default=1,
+        help='How many times to repeat the call in the body of the generated timing loop. Higher values reduce the loop '
+        'overhead included in the measurements of very fast functions. The number of iterations is not affected. '
+        'Default: %(default)r',
+    )
+    group.addoption(
+        '--benchmark-subtract-overhead',
+        action='store_true',
+        default=False,
+        help='Subtract the overhead of the timing loop (measured once per timer and loop size by timing an empty loop) from '
+        "the results. The measured overhead is always saved in the benchmark's options.",
+    )
     group.addoption('--benchmark-disable-gc', action='store_true', default=False, help='Disable GC during benchmarks.')
+    group.addoption(
+        '--benchmark-gc-stats',
+        action='store_true',
+        default=False,
+        help='Record the garbage collections (count per generation and time spent) in every round. Adds a GC share column '
+        'and saves stats that exclude the rounds where collections happened.',
+    )
+    group.addoption(
+        '--benchmark-os-stats',
+        action='store_true',
+        default=False,
+        help='Record the OS resource usage (CPU times, context switches, page faults, bytes read and written) in every round. '
+        'Adds CPU share, context switches, page faults and I/O bytes (per iteration) columns.',
+    )
+    group.addoption(
+        '--benchmark-streaming-stats',
+        action='store_true',
+        default=False,
+        help='Use constant memory stats for very long runs: no timings are kept for each round and the quantiles are '
+        'approximated within 1%% (see the docs for details). Default: exact stats.',
+    )
+    group.addoption(
+        '--benchmark-bootstrap',
+        metavar='RESAMPLES',
+        type=parse_bootstrap,
+        default=None,
+        help='Compute 95%% bootstrap confidence intervals for the mean, median and OPS from RESAMPLES resamples of the rounds '
+        '(eg: 1000). Adds Mean, Median and OPS \N{PLUS-MINUS SIGN} columns. Requires NumPy. Default: %(default)r',
+    )
     group.addoption('--benchmark-skip', action='store_true', default=False, help='Skip running any tests that contain benchmarks.')
     group.addoption(
         '--benchmark-disable',
@@ -240,6 +314,38 @@ def pytest_addoption(parser):
         default=False,
         help='Forcibly enable benchmarks. Use this option to override --benchmark-disable (in case you have it in pytest configuration).',
     )
+    group.addoption(
+        '--benchmark-xdist-cpus',
+        metavar='CPUS',
+        type=parse_cpu_list,
+        default=None,
+        help='Allow benchmarks to run with xdist by pinning each worker to a dedicated CPU from the given list '
+        "(eg: '2,3,6-9') or 'isolcpus' to use the CPUs isolated with the isolcpus kernel parameter. "
+        'There must be at least as many CPUs as workers. Results are collected and saved by the main process.',
+    )
+    group.addoption(
+        '--benchmark-cpu-affinity',
+        metavar='CPUS',
+        type=parse_cpu_list,
+        default=None,
+        help="Pin the test process to the given CPUs (eg: '3' or '2,3,6-9') or 'isolcpus' to use the CPUs isolated "
+        "with the isolcpus kernel parameter. Can't be used with --benchmark-xdist-cpus. Default: no pinning.",
+    )
+    group.addoption(
+        '--benchmark-nice',
+        metavar='NUM',
+        type=int,
+        default=None,
+        help='Set the niceness of the test process (lowering it usually requires privileges). Default: unchanged.',
+    )
+    group.addoption(
+        '--benchmark-sched',
+        metavar='POLICY',
+        type=parse_sched,
+        default=None,
+        help="Set the scheduling policy of the test process, with an optional priority (eg: 'fifo:50'). Available POLICY: "
+        "'other', 'batch', 'idle', 'fifo', 'rr' (the realtime policies usually require privileges). Default: unchanged.",
+    )
     group.addoption('--benchmark-only', action='store_true', default=False, help='Only run benchmarks. This overrides --benchmark-skip.')
     group.addoption('--benchmark-save', metavar='NAME', type=parse_save, help="Save the current run into 'STORAGE-PATH/counter_NAME.json'.")
     tag = get_tag()
@@ -254,6 +360,14 @@ def pytest_addoption(parser):
         action='store_true',
         help='Use this to make --benchmark-save and --benchmark-autosave include all the timing data, not just the stats.',
     )
+    group.addoption(
+        '--benchmark-compression',
+        choices=['gzip', 'lzma'],
+        default=None,
+        help='Save the runs (with --benchmark-save or --benchmark-autosave) as compressed files (.json.gz or .json.xz), with '
+        'the timing data packed as base64 float64 (little-endian). Both formats are loaded the same way. '
+        'Only used by the file storage. Default: %(default)r.',
+    )
     group.addoption(
         '--benchmark-json',
         metavar='PATH',
@@ -274,7 +388,8 @@ def pytest_addoption(parser):
         nargs='+',
         type=parse_compare_fail,
         help='Fail test if performance regresses according to given EXPR'
-        ' (eg: min:5%% or mean:0.001 for number of seconds). Can be used multiple times.',
+        ' (eg: min:5%% or mean:0.001 for number of seconds, mean:significant:p=0.01 for a statistically significant'
+        ' slowdown of the rounds, or complexity for a worse fitted complexity class in sweeps). Can be used multiple times.',
     )
     group.addoption(
         '--benchmark-cprofile',
@@ -309,6 +424,13 @@ def pytest_addoption(parser):
         help='Save cprofile dumps as FILENAME-PREFIX-test_name.prof. If FILENAME-PREFIX contains'
         f" slashes ('/') then directories will be created. Default: {cprofile_dump_prefix!r}",
     )
+    group.addoption(
+        '--benchmark-memory',
+        action='store_true',
+        default=False,
+        help='Also measure memory with tracemalloc: after the timed rounds the function is ran for --benchmark-min-rounds '
+        'extra rounds (1 iteration each) recording the peak and net bytes allocated and the net change in allocated blocks.',
+    )
     add_global_options(group.addoption)
     add_display_options(group.addoption)
     add_histogram_options(group.addoption)
@@ -473,6 +595,12 @@ def benchmark(request):
         options: dict[str, object] = dict(marker.kwargs) if marker else {}
         if 'timer' in options:
             options['timer'] = NameWrapper(options['timer'])
+        if options.get('target_precision') is not None:
+            # same values as --benchmark-target-precision (eg: '1%' or 0.01)
+            try:
+                options['target_precision'] = parse_precision(str(options['target_precision']))
+            except argparse.ArgumentTypeError as exc:
+                raise ValueError(f"benchmark mark has an invalid 'target_precision' keyword argument. {exc}") from None
         fixture = BenchmarkFixture(
             node,
             add_stats=bs.benchmarks.append,
@@ -507,8 +635,21 @@ def pytest_runtest_setup(item):
                 'warmup_iterations',
                 'calibration_precision',
                 'cprofile',
+                'memory',
+                'gc_stats',
+                'os_stats',
+                'streaming_stats',
+                'bootstrap',
+                'unroll',
+                'subtract_overhead',
+                'target_precision',
             ):
                 raise ValueError(f"benchmark mark can't have {name!r} keyword argument.")
+        if marker.kwargs.get('bootstrap'):
+            try:
+                import numpy  # noqa: F401, PLC0415
+            except ImportError:
+                raise pytest.UsageError("benchmark mark's 'bootstrap' requires numpy (or pytest-benchmark[numpy]).") from None
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -532,3 +673,10 @@ def pytest_configure(config):
     bs = config._benchmarksession = BenchmarkSession(config)
     bs.handle_loading()
     config.pluginmanager.register(bs, 'pytest-benchmark')
+
+
+def pytest_unconfigure(config):
+    bs = getattr(config, '_benchmarksession', None)
+    if bs is not None:
+        bs.wait_saving()
+        close_storage(bs.storage)
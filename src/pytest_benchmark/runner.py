@@ -0,0 +1,114 @@
+"""
+..
+  PYTEST_DONT_REWRITE
+"""
+
+import keyword
+import typing
+
+_factories: dict[tuple, typing.Callable] = {}
+
+
+def _make_call(arity, kwarg_names):
+    if arity is None:
+        return 'pass'
+    elif kwarg_names is None:
+        return 'target(*args, **kwargs)'
+    params = [f'arg{i}' for i in range(arity)]
+    params.extend(f'{name}=kwarg{i}' for i, name in enumerate(kwarg_names))
+    return 'target({})'.format(', '.join(params))
+
+
+def _make_source(arity, kwarg_names, unroll, is_async):
+    call = _make_call(arity, kwarg_names)
+    if is_async:
+        call = f'await {call}'
+    lines = ['def make_measure(target, args, kwargs):']
+    if arity is not None and kwarg_names is not None:
+        if arity:
+            lines.append('    {}, = args'.format(', '.join(f'arg{i}' for i in range(arity))))
+        lines.extend(f'    kwarg{i} = kwargs[{name!r}]' for i, name in enumerate(kwarg_names))
+    lines.extend(
+        [
+            '',
+            '    {}def measure(loops_range, timer):'.format('async ' if is_async else ''),
+            '        if loops_range:',
+        ]
+    )
+    if unroll > 1:
+        lines.extend(
+            [
+                f'            unrolled, remainder = divmod(len(loops_range), {unroll})',
+                '            unrolled = range(unrolled)',
+                '            remainder = range(remainder)',
+                '            start = timer()',
+                '            for _ in unrolled:',
+            ]
+        )
+        lines.extend([f'                {call}'] * unroll)
+        lines.extend(
+            [
+                '            for _ in remainder:',
+                f'                {call}',
+            ]
+        )
+    else:
+        lines.extend(
+            [
+                '            start = timer()',
+                '            for _ in loops_range:',
+                f'                {call}',
+            ]
+        )
+    lines.extend(
+        [
+            '            end = timer()',
+            '            return end - start',
+            '        else:',
+            '            start = timer()',
+            '            result = {}'.format('None' if arity is None else call),
+            '            end = timer()',
+            '            return end - start, result',
+            '',
+            '    return measure',
+            '',
+        ]
+    )
+    return '\n'.join(lines)
+
+
+def _get_factory(arity, kwarg_names, unroll, is_async):
+    key = arity, kwarg_names, unroll, is_async
+    if key not in _factories:
+        namespace = {}
+        code = compile(_make_source(*key), f'<pytest-benchmark runner {key}>', 'exec')
+        exec(code, namespace)  # noqa: S102
+        _factories[key] = namespace['make_measure']
+    return _factories[key]
+
+
+def make_measure(target, args, kwargs, unroll=1, is_async=False):
+    """
+    Generates a specialized ``measure(loops_range, timer)`` function for calling ``target(*args, **kwargs)``.
+
+    Similarly to :mod:`timeit` the loop is generated code: the arguments are bound to local names instead of being unpacked
+    on every iteration (``target(arg0, arg1, foo=kwarg0)`` instead of ``target(*args, **kwargs)``) and the call is repeated
+    ``unroll`` times in the loop body. The total number of calls is exactly ``len(loops_range)``.
+
+    If ``loops_range`` is empty the target is called just once and a ``(duration, result)`` tuple is returned.
+    """
+    if all(isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name) for name in kwargs):
+        kwarg_names = tuple(kwargs)
+    else:
+        kwarg_names = None
+    factory = _get_factory(len(args), kwarg_names, unroll, is_async)
+    return factory(target, args, kwargs)
+
+
+def make_empty_measure(unroll=1):
+    """
+    Generates a ``measure(loops_range, timer)`` function with the same loop as :func:`make_measure` but with an empty body.
+    Used to measure the overhead of the timing loop itself.
+    """
+    factory = _get_factory(None, None, unroll, False)
+    return factory(None, (), {})
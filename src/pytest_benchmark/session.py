@@ -3,6 +3,7 @@
   PYTEST_DONT_REWRITE
 """
 
+import json
 import os
 from functools import partial
 
@@ -14,9 +15,11 @@ from .logger import Logger
 from .table import TableResults
 from .utils import DEFAULT_COLUMNS
 from .utils import NAME_FORMATTERS
+from .utils import OPTIONAL_COLUMNS
 from .utils import SecondsDecimal
 from .utils import first_or_value
 from .utils import get_machine_id
+from .utils import get_runtime_id
 from .utils import load_storage
 from .utils import load_timer
 from .utils import report_noprogress
@@ -29,9 +32,18 @@ class PerformanceRegression(Exception):
     pass
 
 
+def require_os_function(name, option):
+    if not hasattr(os, name):
+        raise pytest.UsageError(f'{option} requires os.{name} (not available on this platform).')
+
+
 class BenchmarkSession:
     compared_mapping = None
     groups = None
+    xdist_worker = None
+    scheduling = None
+    calibration_cache = None
+    precision_cache = None
 
     def __init__(self, config):
         self.verbose = config.getoption('benchmark_verbose')
@@ -49,11 +61,22 @@ class BenchmarkSession:
             logger=self.logger,
             default_machine_id=self.machine_id,
             netrc=config.getoption('benchmark_netrc'),
+            compression=config.getoption('benchmark_compression'),
+            rootdir=config.rootpath,
         )
         self.cprofile_sort_by = config.getoption('benchmark_cprofile')
         self.cprofile_loops = config.getoption('benchmark_cprofile_loops')
         self.cprofile_top = config.getoption('benchmark_cprofile_top')
         self.cprofile_dump = first_or_value(config.getoption('benchmark_cprofile_dump'), False)
+        if config.getoption('benchmark_calibration_cache'):
+            self.calibration_cache = self.storage.load_cache('calibration')
+        if config.getoption('benchmark_precision_cache'):
+            runtime_id = get_runtime_id()
+            self.precision_cache = {
+                timer: entry['precision']
+                for timer, entry in self.storage.load_cache('precision').items()
+                if isinstance(entry, dict) and entry.get('runtime') == runtime_id
+            }
         self.options = {
             'min_time': SecondsDecimal(config.getoption('benchmark_min_time')),
             'min_rounds': config.getoption('benchmark_min_rounds'),
@@ -63,23 +86,39 @@ class BenchmarkSession:
             'disable_gc': config.getoption('benchmark_disable_gc'),
             'warmup': config.getoption('benchmark_warmup'),
             'warmup_iterations': config.getoption('benchmark_warmup_iterations'),
+            'unroll': config.getoption('benchmark_unroll'),
+            'subtract_overhead': config.getoption('benchmark_subtract_overhead'),
+            'target_precision': config.getoption('benchmark_target_precision'),
             'cprofile': bool(self.cprofile_sort_by),
             'cprofile_loops': self.cprofile_loops,
             'cprofile_dump': self.cprofile_dump,
+            'memory': config.getoption('benchmark_memory'),
+            'gc_stats': config.getoption('benchmark_gc_stats'),
+            'os_stats': config.getoption('benchmark_os_stats'),
+            'streaming_stats': config.getoption('benchmark_streaming_stats'),
+            'bootstrap': config.getoption('benchmark_bootstrap'),
+            'calibration_cache': self.calibration_cache,
+            'precision_cache': self.precision_cache,
         }
         self.skip = config.getoption('benchmark_skip')
         self.disabled = config.getoption('benchmark_disable') and not config.getoption('benchmark_enable')
 
         # Only the main process has the 'dist' field in the config.
-        xdist_worker = os.environ.get('PYTEST_XDIST_WORKER')
-        xdist_active = config.getoption('dist', 'no') != 'no' or xdist_worker
+        self.xdist_worker = os.environ.get('PYTEST_XDIST_WORKER')
+        self.xdist_cpus = config.getoption('benchmark_xdist_cpus')
+        if self.xdist_cpus and config.getoption('benchmark_cpu_affinity'):
+            raise pytest.UsageError("Can't use --benchmark-cpu-affinity with --benchmark-xdist-cpus (it would override the worker's CPU).")
+        xdist_active = config.getoption('dist', 'no') != 'no' or self.xdist_worker
         if xdist_active and not self.skip and not self.disabled:
-            if not xdist_worker:
-                self.logger.warning(
-                    'Benchmarks are automatically disabled because xdist plugin is active. '
-                    'Benchmarks cannot be performed reliably in a parallelized environment.',
-                )
-            self.disabled = True
+            if self.xdist_cpus:
+                self.setup_xdist_cpus()
+            else:
+                if not self.xdist_worker:
+                    self.logger.warning(
+                        'Benchmarks are automatically disabled because xdist plugin is active. '
+                        'Benchmarks cannot be performed reliably in a parallelized environment.',
+                    )
+                self.disabled = True
         if hasattr(config, 'slaveinput'):
             self.disabled = True
         if not statistics and not self.disabled:
@@ -87,10 +126,12 @@ class BenchmarkSession:
                 f'Benchmarks are automatically disabled because we could not import `statistics`\n\n{statistics_error}',
             )
             self.disabled = True
+        if not self.disabled:
+            self.scheduling = self.setup_scheduling()
 
         self.only = config.getoption('benchmark_only')
         self.sort = config.getoption('benchmark_sort')
-        self.columns = config.getoption('benchmark_columns') or DEFAULT_COLUMNS
+        self.columns = config.getoption('benchmark_columns') or [*DEFAULT_COLUMNS, *OPTIONAL_COLUMNS]
         if self.skip and self.only:
             self.skip = False
         if self.disabled and self.only:
@@ -108,8 +149,60 @@ class BenchmarkSession:
         self.name_format = NAME_FORMATTERS[config.getoption('benchmark_name')]
         self.histogram = first_or_value(config.getoption('benchmark_histogram'), False)
 
+    def setup_xdist_cpus(self):
+        require_os_function('sched_setaffinity', '--benchmark-xdist-cpus')
+        if self.xdist_worker:
+            # restarted workers (--max-worker-restart) get new ids, thus they take the CPUs round-robin
+            cpu = self.xdist_cpus[int(self.xdist_worker.lstrip('gw')) % len(self.xdist_cpus)]
+            os.sched_setaffinity(0, {cpu})
+            self.logger.debug(f'Pinned xdist worker {self.xdist_worker} to CPU {cpu}.')
+        else:
+            workers = len(self.config.getoption('tx', None) or ())
+            if workers > len(self.xdist_cpus):
+                raise pytest.UsageError(
+                    f'Not enough CPUs in --benchmark-xdist-cpus for {workers} xdist workers: '
+                    f'{", ".join(map(str, self.xdist_cpus))}. Each worker needs a dedicated CPU.'
+                )
+
+    def setup_scheduling(self):
+        cpu_affinity = self.config.getoption('benchmark_cpu_affinity')
+        nice = self.config.getoption('benchmark_nice')
+        sched = self.config.getoption('benchmark_sched')
+        scheduling = {}
+        try:
+            if cpu_affinity:
+                require_os_function('sched_setaffinity', '--benchmark-cpu-affinity')
+                os.sched_setaffinity(0, cpu_affinity)
+                scheduling['cpu_affinity'] = sorted(os.sched_getaffinity(0))
+            if nice is not None:
+                require_os_function('setpriority', '--benchmark-nice')
+                os.setpriority(os.PRIO_PROCESS, 0, nice)
+                scheduling['nice'] = os.getpriority(os.PRIO_PROCESS, 0)
+            if sched:
+                require_os_function('sched_setscheduler', '--benchmark-sched')
+                policy, priority = sched
+                os.sched_setscheduler(0, getattr(os, f'SCHED_{policy.upper()}'), os.sched_param(priority))
+                scheduling['sched_policy'] = policy
+                scheduling['sched_priority'] = os.sched_getparam(0).sched_priority
+        except OSError as exc:
+            raise pytest.UsageError(f"Can't apply the CPU affinity or scheduling options: {exc}") from None
+        if scheduling:
+            self.logger.debug(f'Applied CPU affinity and scheduling options: {scheduling}')
+        return scheduling
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        # Only happens in the xdist controller: collect the benchmarks the worker has run.
+        output = getattr(node, 'workeroutput', {}).get('benchmarks')
+        if output:
+            from .stats import Metadata  # noqa: PLC0415
+
+            self.benchmarks.extend(Metadata.from_dict(bench) for bench in json.loads(output))
+
     def get_machine_info(self):
         obj = self.config.hook.pytest_benchmark_generate_machine_info(config=self.config)
+        if self.scheduling:
+            obj['scheduling'] = self.scheduling
         self.config.hook.pytest_benchmark_update_machine_info(config=self.config, machine_info=obj)
         return obj
 
@@ -186,7 +279,7 @@ class BenchmarkSession:
         compared_mapping = {}
         if self.compare:
             if self.compare is True:
-                compared_benchmarks = list(self.storage.load())[-1:]
+                compared_benchmarks = self.storage.load_latest()
             else:
                 compared_benchmarks = list(self.storage.load(self.compare))
 
@@ -210,7 +303,29 @@ class BenchmarkSession:
                 self.logger.info(f'Comparing against benchmarks from: {path}', newline=False)
         self.compared_mapping = compared_mapping
 
+    def save_caches(self):
+        # merge with what other processes (eg: xdist workers) might have saved in the meantime
+        if self.calibration_cache and not self.disabled:
+            self.storage.save_cache('calibration', dict(self.storage.load_cache('calibration'), **self.calibration_cache))
+        if self.precision_cache and not self.disabled:
+            runtime_id = get_runtime_id()
+            precision_cache = self.storage.load_cache('precision')
+            precision_cache.update(
+                (timer, {'precision': precision, 'runtime': runtime_id}) for timer, precision in self.precision_cache.items()
+            )
+            self.storage.save_cache('precision', precision_cache)
+
     def finish(self):
+        self.save_caches()
+        if self.xdist_worker and hasattr(self.config, 'workeroutput'):
+            # The xdist controller will do the saving, comparing and displaying.
+            self.config.workeroutput['benchmarks'] = safe_dumps(
+                [
+                    dict(bench.as_dict(include_data=True, cprofile=(self.cprofile_sort_by, self.cprofile_top)), has_error=bench.has_error)
+                    for bench in self.benchmarks
+                ]
+            )
+            return
         self.handle_saving()
         prepared_benchmarks = list(self.prepare_benchmarks())
         if prepared_benchmarks:
@@ -218,6 +333,12 @@ class BenchmarkSession:
                 config=self.config, benchmarks=prepared_benchmarks, group_by=self.group_by
             )
 
+    def wait_saving(self):
+        # some storages (elasticsearch) save in the background, while the results are displayed
+        wait = getattr(self.storage, 'wait', None)
+        if wait:
+            wait()
+
     def display(self, tr):
         if not self.groups:
             return
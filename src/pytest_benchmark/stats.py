@@ -3,16 +3,425 @@
   PYTEST_DONT_REWRITE
 """
 
+import math
 import operator
 import pstats
 import statistics
+from array import array
 from bisect import bisect_left
 from bisect import bisect_right
 
+from .utils import COMPLEXITY_CLASSES
 from .utils import cached_property
 from .utils import funcname
 from .utils import get_cprofile_functions
 
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore[assignment]
+
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 0
+
+# Two-sided 95% critical values of Student's t distribution for 1 to 30 degrees of freedom.
+T_CRITICAL_95 = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)  # fmt: skip
+
+
+COMPLEXITY_MODELS = dict(
+    zip(
+        COMPLEXITY_CLASSES,
+        (
+            lambda n: 1.0,
+            lambda n: math.log2(n),
+            lambda n: n,
+            lambda n: n * math.log2(n),
+            lambda n: n * n,
+        ),
+    )
+)
+
+
+def t_critical_95(df):
+    if df <= len(T_CRITICAL_95):
+        return T_CRITICAL_95[df - 1]
+    else:
+        return 1.96
+
+
+def incomplete_beta(x, a, b, iterations=200, epsilon=1e-15):
+    """
+    Regularized incomplete beta function, evaluated with Lentz's algorithm for its continued fraction.
+    """
+    if x <= 0:
+        return 0.0
+    elif x >= 1:
+        return 1.0
+    elif x > (a + 1) / (a + b + 2):
+        # the continued fraction converges quickly only for small x
+        return 1.0 - incomplete_beta(1 - x, b, a, iterations, epsilon)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)) / a
+    tiny = 1e-300
+    f = c = 1.0
+    d = 0.0
+    for i in range(iterations * 2 + 1):
+        m = i // 2
+        if not i:
+            numerator = 1.0
+        elif i % 2:
+            numerator = -((a + m) * (a + b + m) * x) / ((a + 2 * m) * (a + 2 * m + 1))
+        else:
+            numerator = (m * (b - m) * x) / ((a + 2 * m - 1) * (a + 2 * m))
+        d = 1.0 + numerator * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + numerator / c
+        c = c if abs(c) > tiny else tiny
+        f *= c * d
+        if abs(1.0 - c * d) < epsilon:
+            break
+    return front * (f - 1.0)
+
+
+def welch_t_test(current, compared):
+    """
+    One-sided Welch's t-test for ``current`` having a greater mean than ``compared``. Returns a ``(p_value, effect_size)``
+    tuple, the effect size is Cohen's d.
+    """
+    n1, n2 = len(current), len(compared)
+    mean1, mean2 = statistics.fmean(current), statistics.fmean(compared)
+    var1, var2 = statistics.variance(current, mean1), statistics.variance(compared, mean2)
+    pooled = math.sqrt((var1 + var2) / 2)
+    effect_size = (mean1 - mean2) / pooled if pooled else math.copysign(math.inf, mean1 - mean2) if mean1 != mean2 else 0.0
+    stderr2 = var1 / n1 + var2 / n2
+    if not stderr2:
+        return (0.0 if mean1 > mean2 else 1.0), effect_size
+    t = (mean1 - mean2) / math.sqrt(stderr2)
+    df = stderr2**2 / ((var1 / n1) ** 2 / (n1 - 1) + (var2 / n2) ** 2 / (n2 - 1))
+    tail = incomplete_beta(df / (df + t * t), df / 2, 0.5) / 2
+    return (tail if t > 0 else 1 - tail), effect_size
+
+
+def mann_whitney_u_test(current, compared):
+    """
+    One-sided Mann-Whitney U test for ``current`` having greater values than ``compared`` (normal approximation with tie
+    and continuity corrections). Returns a ``(p_value, effect_size)`` tuple, the effect size is the rank-biserial
+    correlation (from -1 to 1).
+    """
+    n1, n2 = len(current), len(compared)
+    values = sorted([(value, True) for value in current] + [(value, False) for value in compared])
+    total = n1 + n2
+    rank_sum = 0.0
+    ties = 0
+    start = 0
+    while start < total:
+        stop = start + 1
+        while stop < total and values[stop][0] == values[start][0]:
+            stop += 1
+        count = stop - start
+        ties += count**3 - count
+        rank = (start + stop + 1) / 2
+        rank_sum += rank * sum(1 for _, is_current in values[start:stop] if is_current)
+        start = stop
+    u = rank_sum - n1 * (n1 + 1) / 2
+    effect_size = 2 * u / (n1 * n2) - 1
+    sigma = math.sqrt(n1 * n2 / 12 * (total + 1 - ties / (total * (total - 1))))
+    if not sigma:
+        return 1.0, effect_size
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 1 - statistics.NormalDist().cdf(z), effect_size
+
+
+def fit_complexity(sizes, times):
+    """
+    Fits ``time = coef * f(size)`` for every model in :data:`COMPLEXITY_MODELS` (least squares, no intercept) and returns a
+    ``(complexity, coef, rms)`` tuple for the best fit. The ``rms`` is the root mean square of the residuals relative to the mean
+    time. On ties the simpler model wins.
+    """
+    mean = statistics.fmean(times)
+    best = None
+    for complexity, model in COMPLEXITY_MODELS.items():
+        values = [model(size) for size in sizes]
+        denominator = sum(value * value for value in values)
+        if not denominator:
+            continue
+        coef = sum(time * value for time, value in zip(times, values)) / denominator
+        rms = math.sqrt(statistics.fmean((time - coef * value) ** 2 for time, value in zip(times, values)))
+        rms = rms / mean if mean else 0.0
+        if best is None or rms < best[2]:
+            best = complexity, coef, rms
+    return best
+
+
+def median_between(start, stop, value_at):
+    """
+    Median of the sorted values with ranks from ``start`` to ``stop`` (exclusive). The values are taken from ``value_at(rank)``.
+    """
+    middle = start + (stop - start) // 2
+    if (stop - start) % 2:
+        return value_at(middle)
+    else:
+        return (value_at(middle - 1) + value_at(middle)) / 2
+
+
+def compute_q1(rounds, value_at):
+    # See: https://en.wikipedia.org/wiki/Quartile#Computing_methods
+    if rounds == 1:
+        return value_at(0)
+    elif rounds % 2:  # Method 3
+        n, q = rounds // 4, rounds % 4
+        if q == 1:
+            return 0.25 * value_at(n - 1) + 0.75 * value_at(n)
+        else:
+            return 0.75 * value_at(n) + 0.25 * value_at(n + 1)
+    else:  # Method 2
+        return median_between(0, rounds // 2, value_at)
+
+
+def compute_q3(rounds, value_at):
+    # See: https://en.wikipedia.org/wiki/Quartile#Computing_methods
+    if rounds == 1:
+        return value_at(0)
+    elif rounds % 2:  # Method 3
+        n, q = rounds // 4, rounds % 4
+        if q == 1:
+            return 0.75 * value_at(3 * n) + 0.25 * value_at(3 * n + 1)
+        else:
+            return 0.25 * value_at(3 * n + 1) + 0.75 * value_at(3 * n + 2)
+    else:  # Method 2
+        return median_between(rounds // 2, rounds, value_at)
+
+
+def compute_vectorized(data):
+    """
+    Computes all the :class:`Stats` fields at once with NumPy: one sort and a few binary searches on a float64 view of ``data``
+    instead of a pass in pure Python for every field.
+    """
+    values = numpy.asarray(data, dtype=numpy.float64)
+    ordered = numpy.sort(values)
+    rounds = len(ordered)
+    value_at = ordered.item
+    total = float(values.sum())
+    mean = total / rounds
+    stddev = float(values.std(ddof=1)) if rounds > 1 else 0
+    q1 = compute_q1(rounds, value_at)
+    q3 = compute_q3(rounds, value_at)
+    iqr = q3 - q1
+    low = int(ordered.searchsorted(q1 - 1.5 * iqr, side='left'))
+    high = int(ordered.searchsorted(q3 + 1.5 * iqr, side='right'))
+    iqr_outliers = low + rounds - high
+    stddev_outliers = (
+        int(ordered.searchsorted(mean - stddev, side='left')) + rounds - int(ordered.searchsorted(mean + stddev, side='right'))
+    )
+    return {
+        'min': value_at(0),
+        'max': value_at(-1),
+        'mean': mean,
+        'stddev': stddev,
+        'rounds': rounds,
+        'median': median_between(0, rounds, value_at),
+        'iqr': iqr,
+        'q1': q1,
+        'q3': q3,
+        'iqr_outliers': iqr_outliers,
+        'stddev_outliers': stddev_outliers,
+        'outliers': f'{stddev_outliers};{iqr_outliers}',
+        'ld15iqr': value_at(low),
+        'hd15iqr': value_at(high) if high < rounds else value_at(-1),
+        'ops': rounds / total if total else 0,
+        'total': total,
+    }
+
+
+def compute_bootstrap(data, resamples, confidence=BOOTSTRAP_CONFIDENCE, seed=BOOTSTRAP_SEED, chunk_size=2**20):
+    """
+    Percentile bootstrap confidence intervals for the ``mean``, ``median`` and ``ops`` of ``data`` (requires NumPy).
+
+    The resamples are drawn in chunks of about ``chunk_size`` values (thus the memory used doesn't depend on ``resamples``)
+    from a generator seeded with ``seed`` (thus the intervals are reproducible). Returns the ``mean_ci``, ``median_ci`` and
+    ``ops_ci`` columns (the half-width of the interval relative to the estimate) and the intervals in ``bootstrap``.
+    """
+    values = numpy.asarray(data, dtype=numpy.float64)
+    rounds = len(values)
+    rng = numpy.random.default_rng(seed)
+    means = numpy.empty(resamples)
+    medians = numpy.empty(resamples)
+    per_chunk = max(1, chunk_size // rounds)
+    for start in range(0, resamples, per_chunk):
+        stop = min(start + per_chunk, resamples)
+        sample = values[rng.integers(0, rounds, size=(stop - start, rounds))]
+        means[start:stop] = sample.mean(axis=1)
+        medians[start:stop] = numpy.median(sample, axis=1)
+    tail = (1 - confidence) / 2
+    intervals = {
+        'mean': [float(value) for value in numpy.quantile(means, [tail, 1 - tail])],
+        'median': [float(value) for value in numpy.quantile(medians, [tail, 1 - tail])],
+    }
+    low, high = intervals['mean']
+    intervals['ops'] = [1 / high if high else 0, 1 / low if low else 0]
+    estimates = {
+        'mean': float(values.mean()),
+        'median': float(numpy.median(values)),
+    }
+    estimates['ops'] = 1 / estimates['mean'] if estimates['mean'] else 0
+    result = {f'{field}_ci': (high - low) / 2 / estimates[field] if estimates[field] else 0.0 for field, (low, high) in intervals.items()}
+    result['bootstrap'] = {'resamples': resamples, 'confidence': confidence, 'seed': seed, **intervals}
+    return result
+
+
+class stats_field:
+    """
+    A cached :class:`Stats` field, stored in the ``_<name>`` slot. If NumPy is available the first field that is accessed
+    computes (and stores) all of them with :func:`compute_vectorized`.
+    """
+
+    def __init__(self, func):
+        self.__doc__ = func.__doc__
+        self.func = func
+        self.slot = f'_{func.__name__}'
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            pass
+        if numpy is not None and obj.data:
+            for field, value in compute_vectorized(obj.data).items():
+                setattr(obj, f'_{field}', value)
+        else:
+            setattr(obj, self.slot, self.func(obj))
+        return getattr(obj, self.slot)
+
+
+class RunningStats:
+    """
+    Welford's online algorithm for the mean and variance. Used to decide when to stop running rounds without having to
+    recompute the stats over the whole data for every round.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def relative_precision(self):
+        """
+        Half-width of the 95% confidence interval of the mean, relative to the mean.
+        """
+        if self.count < 2 or not self.mean:
+            return float('inf')
+        stderr = (self.m2 / (self.count - 1) / self.count) ** 0.5
+        return t_critical_95(self.count - 1) * stderr / self.mean
+
+
+class MemoryStats:
+    """
+    Peak and net traced memory (in bytes) and the net change in allocated blocks for each round that ran under
+    :mod:`tracemalloc`. The summary is the median of the rounds.
+    """
+
+    fields = ('mem_peak', 'mem_net', 'mem_blocks')
+
+    def __init__(self):
+        self.data = []
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def update(self, peak, net, blocks):
+        self.data.append([peak, net, blocks])
+
+    def as_dict(self):
+        return {field: statistics.median_low(values) for field, values in zip(self.fields, zip(*self.data))}
+
+
+class GCStats:
+    """
+    Garbage collections that happened in each round: how many collections ran for each generation and how long they took
+    (in seconds).
+    """
+
+    def __init__(self):
+        self.data = []
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def update(self, collections, duration):
+        self.data.append([*collections, duration])
+
+    @property
+    def collections(self):
+        return [sum(counts) for counts in zip(*(row[:3] for row in self.data))]
+
+    @property
+    def time(self):
+        return sum(row[3] for row in self.data)
+
+    @property
+    def affected_rounds(self):
+        return sum(1 for row in self.data if any(row[:3]))
+
+    def as_dict(self):
+        return {
+            'gc_collections': self.collections,
+            'gc_time': self.time,
+            'gc_rounds': self.affected_rounds,
+        }
+
+
+class ResourceStats:
+    """
+    OS resource usage in each round: user and system CPU time, voluntary and involuntary context switches, minor and major
+    page faults, bytes read and written.
+    """
+
+    fields = (
+        'user_time',
+        'system_time',
+        'voluntary_switches',
+        'involuntary_switches',
+        'minor_faults',
+        'major_faults',
+        'read_bytes',
+        'write_bytes',
+    )
+
+    def __init__(self):
+        self.data = []
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def update(self, usage):
+        self.data.append(usage)
+
+    def as_dict(self, iterations, total):
+        """
+        Everything is averaged per iteration (like the timings), except ``cpu_share`` that is the CPU time relative to the
+        total measured time.
+        """
+        count = len(self.data) * iterations
+        totals = dict(zip(self.fields, (sum(values) for values in zip(*self.data))))
+        result = {f'os_{field}': value / count for field, value in totals.items()}
+        result['cpu_share'] = (totals['user_time'] + totals['system_time']) / total if total else 0.0
+        result['ctx_switches'] = (totals['voluntary_switches'] + totals['involuntary_switches']) / count
+        result['page_faults'] = (totals['minor_faults'] + totals['major_faults']) / count
+        result['io_bytes'] = (totals['read_bytes'] + totals['write_bytes']) / count
+        return result
+
 
 class Stats:
     fields = (
@@ -33,9 +442,12 @@ class Stats:
         'ops',
         'total',
     )
+    # no __dict__: there can be a lot of these, and the cached fields are stored in slots (see stats_field)
+    __slots__ = ('data', '_sorted_data', *(f'_{field}' for field in fields))
 
     def __init__(self):
-        self.data = []
+        # a compact buffer of doubles instead of a list of float objects (8 bytes per round instead of 32)
+        self.data = array('d')
 
     def __bool__(self):
         return bool(self.data)
@@ -49,34 +461,42 @@ class Stats:
     def update(self, duration):
         self.data.append(duration)
 
-    @cached_property
+    @property
+    def last(self):
+        return self.data[-1]
+
+    @property
     def sorted_data(self):
-        return sorted(self.data)
+        try:
+            return self._sorted_data
+        except AttributeError:
+            self._sorted_data = sorted(self.data)
+            return self._sorted_data
 
-    @cached_property
+    @stats_field
     def total(self):
         return sum(self.data)
 
-    @cached_property
+    @stats_field
     def min(self):
         return min(self.data)
 
-    @cached_property
+    @stats_field
     def max(self):
         return max(self.data)
 
-    @cached_property
+    @stats_field
     def mean(self):
         return statistics.mean(self.data)
 
-    @cached_property
+    @stats_field
     def stddev(self):
         if len(self.data) > 1:
             return statistics.stdev(self.data)
         else:
             return 0
 
-    @property
+    @stats_field
     def stddev_outliers(self):
         """
         Count of StdDev outliers: what's beyond (Mean - StdDev, Mean - StdDev)
@@ -89,15 +509,15 @@ class Stats:
                 count += 1
         return count
 
-    @cached_property
+    @stats_field
     def rounds(self):
         return len(self.data)
 
-    @cached_property
+    @stats_field
     def median(self):
         return statistics.median(self.data)
 
-    @cached_property
+    @stats_field
     def ld15iqr(self):
         """
         Tukey-style Lowest Datum within 1.5 IQR under Q1.
@@ -107,7 +527,7 @@ class Stats:
         else:
             return self.sorted_data[bisect_left(self.sorted_data, self.q1 - 1.5 * self.iqr)]
 
-    @cached_property
+    @stats_field
     def hd15iqr(self):
         """
         Tukey-style Highest Datum within 1.5 IQR over Q3.
@@ -121,45 +541,19 @@ class Stats:
             else:
                 return self.sorted_data[pos]
 
-    @cached_property
+    @stats_field
     def q1(self):
-        rounds = self.rounds
-        data = self.sorted_data
-
-        # See: https://en.wikipedia.org/wiki/Quartile#Computing_methods
-        if rounds == 1:
-            return data[0]
-        elif rounds % 2:  # Method 3
-            n, q = rounds // 4, rounds % 4
-            if q == 1:
-                return 0.25 * data[n - 1] + 0.75 * data[n]
-            else:
-                return 0.75 * data[n] + 0.25 * data[n + 1]
-        else:  # Method 2
-            return statistics.median(data[: rounds // 2])
+        return compute_q1(self.rounds, self.sorted_data.__getitem__)
 
-    @cached_property
+    @stats_field
     def q3(self):
-        rounds = self.rounds
-        data = self.sorted_data
-
-        # See: https://en.wikipedia.org/wiki/Quartile#Computing_methods
-        if rounds == 1:
-            return data[0]
-        elif rounds % 2:  # Method 3
-            n, q = rounds // 4, rounds % 4
-            if q == 1:
-                return 0.75 * data[3 * n] + 0.25 * data[3 * n + 1]
-            else:
-                return 0.25 * data[3 * n + 1] + 0.75 * data[3 * n + 2]
-        else:  # Method 2
-            return statistics.median(data[rounds // 2 :])
+        return compute_q3(self.rounds, self.sorted_data.__getitem__)
 
-    @cached_property
+    @stats_field
     def iqr(self):
         return self.q3 - self.q1
 
-    @property
+    @stats_field
     def iqr_outliers(self):
         """
         Count of Tukey outliers: what's beyond (Q1 - 1.5IQR, Q3 + 1.5IQR)
@@ -172,6 +566,158 @@ class Stats:
                 count += 1
         return count
 
+    @stats_field
+    def outliers(self):
+        return f'{self.stddev_outliers};{self.iqr_outliers}'
+
+    @stats_field
+    def ops(self):
+        if self.total:
+            return self.rounds / self.total
+        return 0
+
+
+class StreamingStats:
+    """
+    Constant memory alternative to :class:`Stats` for very long runs (no per-round data is kept).
+
+    The ``min``, ``max``, ``total``, ``rounds`` and ``ops`` are exact, the ``mean`` and ``stddev`` are computed with Welford's
+    algorithm. The quantiles (``median``, ``q1``, ``q3``, ``ld15iqr``, ``hd15iqr``) come from a logarithmic histogram (like
+    DDSketch) and are within ``relative_accuracy`` of the value of a round with the right rank. The outliers are counted from
+    the same histogram, thus rounds that are close to the outlier limits may be counted wrong.
+    """
+
+    fields = Stats.fields
+    relative_accuracy = 0.01
+    gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+
+    def __init__(self):
+        self.running = RunningStats()
+        self.buckets = {}
+        self.zeros = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+        self.last = None
+
+    @classmethod
+    def from_sketch(cls, sketch):
+        """
+        Recreates the stats from the output of :meth:`as_sketch`.
+        """
+        self = cls()
+        self.running.count = sketch['count']
+        self.running.mean = sketch['mean']
+        self.running.m2 = sketch['m2']
+        self.buckets = dict(sketch['buckets'])
+        self.zeros = sketch['zeros']
+        self.min = sketch['min']
+        self.max = sketch['max']
+        self.total = sketch['total']
+        return self
+
+    def as_sketch(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'count': self.running.count,
+            'mean': self.running.mean,
+            'm2': self.running.m2,
+            'buckets': sorted(self.buckets.items()),
+            'zeros': self.zeros,
+            'min': self.min,
+            'max': self.max,
+            'total': self.total,
+        }
+
+    def __bool__(self):
+        return bool(self.running.count)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.fields}
+
+    def update(self, duration):
+        self.running.update(duration)
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.last = duration
+        if duration > 0:
+            index = math.ceil(math.log(duration, self.gamma))
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        else:
+            self.zeros += 1
+
+    @cached_property
+    def histogram(self):
+        """
+        Sorted list of ``(value, count)`` tuples. The value of each bucket is the one with the smallest relative error to any
+        of the rounds from the bucket (clamped to the actual minimum and maximum).
+        """
+        histogram = [(0.0, self.zeros)] if self.zeros else []
+        histogram.extend(
+            (min(max(2 * self.gamma**index / (self.gamma + 1), self.min), self.max), self.buckets[index]) for index in sorted(self.buckets)
+        )
+        return histogram
+
+    def _value_at(self, rank):
+        for value, count in self.histogram:
+            if rank < count:
+                return value
+            rank -= count
+        return self.max
+
+    def _count_outside(self, low, high):
+        return sum(count for value, count in self.histogram if value < low or value > high)
+
+    @property
+    def rounds(self):
+        return self.running.count
+
+    @property
+    def mean(self):
+        return self.running.mean
+
+    @property
+    def stddev(self):
+        if self.running.count > 1:
+            return math.sqrt(self.running.m2 / (self.running.count - 1))
+        else:
+            return 0
+
+    @property
+    def stddev_outliers(self):
+        return self._count_outside(self.mean - self.stddev, self.mean + self.stddev)
+
+    @cached_property
+    def median(self):
+        return median_between(0, self.rounds, self._value_at)
+
+    @cached_property
+    def q1(self):
+        return compute_q1(self.rounds, self._value_at)
+
+    @cached_property
+    def q3(self):
+        return compute_q3(self.rounds, self._value_at)
+
+    @cached_property
+    def iqr(self):
+        return self.q3 - self.q1
+
+    @cached_property
+    def ld15iqr(self):
+        low = self.q1 - 1.5 * self.iqr
+        return next((value for value, _ in self.histogram if value >= low), self.max)
+
+    @cached_property
+    def hd15iqr(self):
+        high = self.q3 + 1.5 * self.iqr
+        return next((value for value, _ in self.histogram if value > high), self.max)
+
+    @property
+    def iqr_outliers(self):
+        return self._count_outside(self.q1 - 1.5 * self.iqr, self.q3 + 1.5 * self.iqr)
+
     @cached_property
     def outliers(self):
         return f'{self.stddev_outliers};{self.iqr_outliers}'
@@ -185,8 +731,32 @@ class Stats:
 
 class Metadata:
     cprofile_stats: pstats.Stats
+    cprofile_functions: list | None
+    __slots__ = (
+        '_bootstrap',
+        '_has_error',
+        'cprofile_functions',
+        'cprofile_stats',
+        'extra_info',
+        'fixture',
+        'fullname',
+        'gc',
+        'group',
+        'iterations',
+        'memory',
+        'name',
+        'options',
+        'overhead',
+        'param',
+        'params',
+        'processes',
+        'resources',
+        'stats',
+        'sweep',
+        'threads',
+    )
 
-    def __init__(self, fixture, iterations, options):
+    def __init__(self, fixture, iterations, options, overhead=0):
         self.name = fixture.name
         self.fullname = fixture.fullname
         self.group = fixture.group
@@ -194,11 +764,75 @@ class Metadata:
         self.params = fixture.params
         self.extra_info = fixture.extra_info
         self.cprofile_stats = fixture.cprofile_stats
+        self.cprofile_functions = None
 
         self.iterations = iterations
-        self.stats = Stats()
+        self.overhead = overhead
+        self.stats = StreamingStats() if options.get('streaming_stats') else Stats()
+        self.memory = None
+        self.gc = None
+        self.resources = None
+        self.threads = None
+        self.processes = None
+        self.sweep = None
         self.options = options
         self.fixture = fixture
+        self._has_error = False
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Recreates a benchmark from the output of :meth:`as_dict` (``include_data`` is required). Used to collect the
+        benchmarks that ran in xdist workers.
+        """
+        self = cls.__new__(cls)
+        self.name = data['name']
+        self.fullname = data['fullname']
+        self.group = data['group']
+        self.param = data['param']
+        self.params = data['params']
+        self.extra_info = data['extra_info']
+        self.cprofile_stats = None
+        self.cprofile_functions = data.get('cprofile')
+
+        self.iterations = data['stats']['iterations']
+        self.overhead = 0
+        if 'sketch' in data['stats']:
+            self.stats = StreamingStats.from_sketch(data['stats']['sketch'])
+        else:
+            self.stats = Stats()
+            self.stats.data.extend(data['stats']['data'])
+        if 'mem_data' in data['stats']:
+            self.memory = MemoryStats()
+            self.memory.data.extend(data['stats']['mem_data'])
+        else:
+            self.memory = None
+        if 'gc_data' in data['stats']:
+            self.gc = GCStats()
+            self.gc.data.extend(data['stats']['gc_data'])
+        else:
+            self.gc = None
+        if 'os_data' in data['stats']:
+            self.resources = ResourceStats()
+            self.resources.data.extend(data['stats']['os_data'])
+        else:
+            self.resources = None
+        if 'threads' in data['stats']:
+            self.threads = {key: data['stats'][key] for key in ('threads', 'aggregate_ops', 'scaling')}
+        else:
+            self.threads = None
+        if 'workers' in data['stats']:
+            self.processes = {key: data['stats'][key] for key in ('workers', 'aggregate_ops', 'per_worker')}
+        else:
+            self.processes = None
+        if 'complexity' in data['stats']:
+            self.sweep = {key: data['stats'][key] for key in ('size', 'complexity', 'complexity_coef', 'complexity_rms')}
+        else:
+            self.sweep = None
+        self.options = data['options']
+        self.fixture = None
+        self._has_error = data.get('has_error', False)
+        return self
 
     def __bool__(self):
         return bool(self.stats)
@@ -218,10 +852,53 @@ class Metadata:
         except AttributeError:
             return getattr(self, key)
 
+    @property
+    def gc_free_stats(self):
+        """
+        Stats for just the rounds where no garbage collection happened (not available with streaming stats).
+        """
+        if isinstance(self.stats, StreamingStats):
+            return None
+        stats = Stats()
+        stats.data.extend(duration for duration, row in zip(self.stats.data, self.gc.data) if not any(row[:3]))
+        return stats
+
+    @property
+    def bootstrap(self):
+        """
+        The bootstrap confidence intervals (see :func:`compute_bootstrap`), if enabled with the ``bootstrap`` option. Not
+        available with streaming stats or less than 2 rounds.
+        """
+        try:
+            return self._bootstrap
+        except AttributeError:
+            pass
+        resamples = self.options.get('bootstrap')
+        if not resamples or isinstance(self.stats, StreamingStats) or self.stats.rounds < 2:
+            self._bootstrap = None
+        else:
+            self._bootstrap = compute_bootstrap(self.stats.data, resamples)
+        return self._bootstrap
+
+    @property
+    def complexity(self):
+        return self.sweep['complexity'] if self.sweep else None
+
     @property
     def has_error(self):
+        if self.fixture is None:
+            return self._has_error
         return self.fixture.has_error
 
+    def detach(self):
+        """
+        Drops the reference to the fixture (thus to the test node and everything else the fixture holds) once the test is
+        done. Only the error flag is needed from it.
+        """
+        if self.fixture is not None:
+            self._has_error = self.fixture.has_error
+            self.fixture = None
+
     def as_dict(self, include_data=True, flat=False, stats=True, cprofile=None):
         result = {
             'group': self.group,
@@ -249,11 +926,40 @@ class Metadata:
                 # if we want only one column, or we already have all available functions
                 if cprofile_sort_by is None or len(cprofile_functions) == len(cprofile_list):
                     break
+        elif self.cprofile_functions:
+            result['cprofile'] = self.cprofile_functions
         if stats:
             stats = self.stats.as_dict()
             if include_data:
-                stats['data'] = self.stats.data
+                if isinstance(self.stats, StreamingStats):
+                    stats['sketch'] = self.stats.as_sketch()
+                else:
+                    stats['data'] = self.stats.data.tolist()
             stats['iterations'] = self.iterations
+            if self.memory:
+                stats.update(self.memory.as_dict())
+                if include_data:
+                    stats['mem_data'] = self.memory.data
+            if self.gc:
+                stats.update(self.gc.as_dict())
+                total = self.stats.total * self.iterations
+                stats['gc_share'] = self.gc.time / total if total else 0.0
+                gc_free_stats = self.gc_free_stats
+                stats['gc_free'] = gc_free_stats.as_dict() if gc_free_stats else None
+                if include_data:
+                    stats['gc_data'] = self.gc.data
+            if self.resources:
+                stats.update(self.resources.as_dict(self.iterations, self.stats.total * self.iterations))
+                if include_data:
+                    stats['os_data'] = self.resources.data
+            if self.threads:
+                stats.update(self.threads)
+            if self.processes:
+                stats.update(self.processes)
+            if self.sweep:
+                stats.update(self.sweep)
+            if self.bootstrap:
+                stats.update(self.bootstrap)
             if flat:
                 result.update(stats)
             else:
@@ -261,7 +967,14 @@ class Metadata:
         return result
 
     def update(self, duration):
-        self.stats.update(duration / self.iterations)
+        """
+        Adds the duration of a round (minus the overhead, if any) divided by the number of iterations. Returns that value.
+        """
+        if self.overhead:
+            duration = max(duration - self.overhead, 0)
+        duration /= self.iterations
+        self.stats.update(duration)
+        return duration
 
 
 def normalize_stats(stats):
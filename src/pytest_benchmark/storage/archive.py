@@ -0,0 +1,101 @@
+import json
+import mmap
+import os
+import sys
+from hashlib import sha1
+
+from . import pack_data
+from . import unpack_data
+
+INDEX_NAME = 'index.jsonl'
+
+
+class DataArchive:
+    """
+    Columnar archive of the round timings: for each benchmark (by fullname) there's a file with the rounds of all the
+    runs as contiguous little-endian doubles, and an index (``index.jsonl``) with a line for each run and benchmark (the
+    run file, the fullname, the iterations and where the rounds are).
+
+    The rounds are read through ``mmap``, thus slicing the history of a benchmark doesn't decode the runs or copy data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _get_file(self, fullname):
+        # fullnames have all sorts of characters (and can get quite long)
+        return self.path.joinpath(f'{sha1(fullname.encode(), usedforsecurity=False).hexdigest()}.f8')
+
+    def append(self, run, benchmarks):
+        """
+        Appends the rounds of the ``benchmarks`` (that have data) from the ``run`` file.
+        """
+        entries = []
+        for bench in benchmarks:
+            data = bench['stats'].get('data')
+            if not data:
+                continue
+            self.path.mkdir(parents=True, exist_ok=True)
+            with self._get_file(bench['fullname']).open('ab') as fh:
+                # the index line is written after the data, thus a partially written run is just ignored (but its
+                # trailing bytes need to go, otherwise the rounds after it would be misaligned)
+                start, torn = divmod(fh.seek(0, os.SEEK_END), 8)
+                if torn:
+                    fh.truncate(start * 8)
+                fh.write(pack_data(data))
+            entries.append(
+                {
+                    'run': run,
+                    'fullname': bench['fullname'],
+                    'iterations': bench['stats'].get('iterations', 1),
+                    'start': start,
+                    'count': len(data),
+                }
+            )
+        if entries:
+            with self.path.joinpath(INDEX_NAME).open('a', encoding='utf8') as fh:
+                fh.writelines(f'{json.dumps(entry)}\n' for entry in entries)
+
+    def read_index(self, fullname=None):
+        entries = []
+        try:
+            with self.path.joinpath(INDEX_NAME).open(encoding='utf8') as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:  # partially written line
+                        continue
+                    if fullname is None or entry['fullname'] == fullname:
+                        entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def load(self, fullname):
+        """
+        Returns a dict of run file to ``(iterations, data)`` for the ``fullname`` benchmark. The ``data`` is a read-only
+        memoryview of doubles (on big-endian machines it's a list).
+
+        The runs that the archive doesn't fully have (the data file is missing or shorter than what the index says) are
+        left out, thus they get loaded from the run files.
+        """
+        entries = self.read_index(fullname)
+        if not entries:
+            return {}
+        try:
+            with self._get_file(fullname).open('rb') as fh:
+                size = os.fstat(fh.fileno()).st_size
+                # the mapping stays valid after the file is closed (and gets unmapped when the views are released)
+                view = memoryview(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)) if size else memoryview(b'')
+        except OSError:
+            return {}
+        count = size // 8
+        entries = [entry for entry in entries if entry['start'] + entry['count'] <= count]
+        if sys.byteorder == 'little':
+            view = view[: count * 8].cast('d')
+            return {entry['run']: (entry['iterations'], view[entry['start'] : entry['start'] + entry['count']]) for entry in entries}
+        else:
+            return {
+                entry['run']: (entry['iterations'], unpack_data(view[entry['start'] * 8 : (entry['start'] + entry['count']) * 8]))
+                for entry in entries
+            }
@@ -1,9 +1,12 @@
 import re
+import threading
+import time
 import uuid
 from datetime import date
 from datetime import datetime
 from decimal import Decimal
 from functools import partial
+from pathlib import Path
 
 from ..stats import normalize_stats
 
@@ -13,6 +16,16 @@ try:
 except ImportError as exc:
     raise ImportError('Please install elasticsearch or pytest-benchmark[elasticsearch]') from exc
 
+BULK_SIZE = 500  # documents per bulk request
+BULK_BYTES = 5 * 1024 * 1024  # (roughly) the maximum size of a bulk request
+RETRIES = 3
+BACKOFF = 0.5  # seconds to wait before the first retry (doubled after each retry)
+RETRY_STATUSES = (429, 502, 503, 504)
+SPOOL_PATH = Path('.benchmarks', 'elasticsearch-spool.jsonl')  # relative to the rootdir
+
+# elasticsearch>=8 raises ApiError for the error responses (older clients raise TransportError for everything)
+ERRORS = (elasticsearch.TransportError, getattr(elasticsearch, 'ApiError', elasticsearch.TransportError))
+
 
 class BenchmarkJSONSerializer(JSONSerializer):
     def default(self, data):
@@ -33,17 +46,55 @@ def _mask_hosts(hosts):
     return masked_hosts
 
 
+def _batches(actions):
+    """
+    Splits the ``actions`` in batches of at most ``BULK_SIZE`` actions and ``BULK_BYTES`` characters.
+    """
+    batch = []
+    size = 0
+    for action in actions:
+        if batch and (len(batch) >= BULK_SIZE or size + len(action) > BULK_BYTES):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(action)
+        size += len(action)
+    if batch:
+        yield batch
+
+
+def _is_retryable(exc):
+    return isinstance(exc, elasticsearch.ConnectionError) or getattr(exc, 'status_code', None) in RETRY_STATUSES
+
+
 class ElasticsearchStorage:
-    def __init__(self, hosts, index, doctype, project_name, logger, default_machine_id=None):
+    """
+    Saves each benchmark as a document. The documents are sent with the bulk API (in batches of ``BULK_SIZE``) from a
+    background thread, thus the terminal summary doesn't wait on the cluster - :meth:`wait` is called when pytest exits.
+
+    Failed requests are retried with exponential backoff. The documents that still can't be sent are appended to a
+    spool file (``.benchmarks/elasticsearch-spool.jsonl`` in the rootdir), for :meth:`flush` (``pytest-benchmark flush``).
+    """
+
+    def __init__(self, hosts, index, doctype, project_name, logger, default_machine_id=None, spool=None):
         self._es_hosts = hosts
         self._es_index = index
         self._es_doctype = doctype
-        self._es = elasticsearch.Elasticsearch(self._es_hosts, serializer=BenchmarkJSONSerializer())
+        self._serializer = BenchmarkJSONSerializer()
+        self._es = elasticsearch.Elasticsearch(self._es_hosts, serializer=self._serializer)
         self._project_name = project_name
+        self._spool_path = Path(spool or SPOOL_PATH)
+        self._saving = None
+        self._saved = None
         self.default_machine_id = default_machine_id
         self.logger = logger
         self._cache = {}
-        self._create_index()
+        self._index_created = False
+        try:
+            self._create_index()
+        except elasticsearch.ConnectionError:
+            # saving will try again (and spool the documents if the cluster is still unreachable)
+            pass
 
     def __str__(self):
         return str(self._es_hosts)
@@ -52,6 +103,15 @@ class ElasticsearchStorage:
     def location(self):
         return str(self._es_hosts)
 
+    def load_cache(self, name):
+        """
+        Caches are not stored in elasticsearch.
+        """
+        return {}
+
+    def save_cache(self, name, data):
+        pass
+
     def query(self):
         """
         Returns sorted records names (ids) that corresponds with project.
@@ -73,6 +133,12 @@ class ElasticsearchStorage:
                 normalize_stats(bench['stats'])
             yield key, data
 
+    def load_latest(self):
+        """
+        Loads just the latest run (a list with a single ``(key, data)`` tuple, or an empty list if there are no runs).
+        """
+        return list(self.load())[-1:]
+
     def _search(self, project, id_prefix=None):
         body = {
             'size': 1000,
@@ -112,10 +178,11 @@ class ElasticsearchStorage:
                 result[key] = run_info
         return result
 
-    def load_benchmarks(self, *args):
+    def load_benchmarks(self, *args, fields=None, workers=None):
         """
         Yield benchmarks that corresponds with project. Put path and
-        source (uncommon part of path) to benchmark dict.
+        source (uncommon part of path) to benchmark dict. Only keep the
+        ``fields`` if given. The ``workers`` argument is ignored.
         """
         id_prefix = args[0] if args else None
         r = self._search(self._project_name, id_prefix)
@@ -123,10 +190,13 @@ class ElasticsearchStorage:
             bench = self._benchmark_from_es_record(hit['_source'])
             bench.update(bench.pop('stats'))
             bench['source'] = bench['benchmark_id']
+            if fields:
+                bench = {key: value for key, value in bench.items() if key in fields or key == 'source'}
             yield bench
 
     def save(self, output_json, save):
         output_benchmarks = output_json.pop('benchmarks')
+        actions = []
         for bench in output_benchmarks:
             # add top level info from output_json dict to each record
             bench.update(output_json)
@@ -135,15 +205,144 @@ class ElasticsearchStorage:
                 benchmark_id = self.default_machine_id + '_' + benchmark_id
             doc_id = benchmark_id + '_' + bench['fullname']
             bench['benchmark_id'] = benchmark_id
-            self._es.index(
-                index=self._es_index,
-                doc_type=self._es_doctype,
-                body=bench,
-                id=doc_id,
-            )
+            actions.append(self._make_action(doc_id, bench))
+        # one save at a time, so the spool keeps the order of the runs
+        self.wait()
+        self._saving = threading.Thread(target=self._save_in_background, args=(actions,), name='pytest-benchmark-elasticsearch')
+        self._saving.start()
+
+    def wait(self):
+        """
+        Waits for the background saving (if any) to finish and reports how it went.
+        """
+        if self._saving is None:
+            return
+        self._saving.join()
+        self._saving = None
+        self._report(*self._saved)
+
+    def _spool(self, pending):
+        self._spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._spool_path.open('a', encoding='utf8') as fh:
+            fh.writelines(pending)
+
+    def flush(self):
+        """
+        Sends the documents from the spool file. The ones that still can't be sent are kept in the spool.
+        """
+        try:
+            lines = self._spool_path.read_text(encoding='utf8').splitlines(keepends=True)
+        except FileNotFoundError:
+            lines = []
+        # an action is a metadata line and a document line (an incomplete last line is from an interrupted write)
+        actions = [lines[pos] + lines[pos + 1] for pos in range(0, len(lines) - 1, 2) if lines[pos + 1].endswith('\n')]
+        if not actions:
+            self.logger.info(f'Nothing to flush in {self._spool_path}.')
+            return
+        indexed, errors, pending, error = self._send(actions)
+        if pending:
+            self._spool_path.write_text(''.join(pending), encoding='utf8')
+        else:
+            self._spool_path.unlink()
+        self._report(indexed, errors, pending, error, f'They are still in {self._spool_path}')
+
+    def _dumps(self, data):
+        data = self._serializer.dumps(data)
+        # the serializers of elasticsearch>=8 return bytes
+        return data.decode() if isinstance(data, bytes) else data
+
+    def _make_action(self, doc_id, bench):
+        """
+        Makes the lines of the bulk API request that indexes ``bench``.
+        """
+        metadata = {'_index': self._es_index, '_id': doc_id}
+        if elasticsearch.VERSION[0] < 8:
+            # mapping types are gone in elasticsearch 8
+            metadata['_type'] = self._es_doctype
+        return f'{self._dumps({"index": metadata})}\n{self._dumps(bench)}\n'
+
+    def _save_in_background(self, actions):
+        indexed, errors, pending, error = 0, [], actions, None
+        outcome = 'They are lost'
+        try:
+            try:
+                indexed, errors, pending, error = self._send(actions)
+            except Exception as exc:
+                # indexing is idempotent (the documents have ids), thus it's fine to spool everything
+                error = exc
+            if pending:
+                self._spool(pending)
+                outcome = f'They are in {self._spool_path}'
+        except Exception as exc:
+            outcome = f'They are lost, could not write them in {self._spool_path}: {exc}'
+        finally:
+            # wait() always has something to report
+            self._saved = indexed, errors, pending, error, outcome
+
+    def _send(self, actions):
+        """
+        Sends the ``actions`` in batches. Returns the number of indexed documents, the errors for the rejected documents,
+        the actions that couldn't be sent and the last error. Stops at the first batch that can't be sent.
+        """
+        indexed = 0
+        errors = []
+        batches = list(_batches(actions))
+        for position, batch in enumerate(batches):
+            batch_indexed, pending, error = self._send_batch(batch, errors)
+            indexed += batch_indexed
+            if pending:
+                return indexed, errors, pending + [action for batch in batches[position + 1 :] for action in batch], error
+        return indexed, errors, [], None
+
+    def _send_batch(self, batch, errors):
+        indexed = 0
+        error = None
+        for attempt in range(RETRIES + 1):
+            if attempt:
+                time.sleep(BACKOFF * 2 ** (attempt - 1))
+            try:
+                if not self._index_created:
+                    self._create_index()
+                response = self._bulk(''.join(batch))
+            except ERRORS as exc:
+                error = exc
+                if _is_retryable(exc):
+                    continue
+                return indexed, batch, error
+            retry = []
+            for action, item in zip(batch, response['items']):
+                (result,) = item.values()
+                if result.get('status') in RETRY_STATUSES:
+                    retry.append(action)
+                elif 'error' in result:
+                    errors.append(f'{result.get("_id")}: {result["error"]}')
+                else:
+                    indexed += 1
+            if not retry:
+                return indexed, [], None
+            batch = retry
+            error = f'{len(retry)} documents rejected with status {RETRY_STATUSES}'
+        return indexed, batch, error
+
+    def _bulk(self, body):
+        if hasattr(self._es, 'options'):
+            # elasticsearch>=8 retries by itself (without backoff) - the retries are done in _send_batch
+            return self._es.options(max_retries=0).bulk(body=body)
+        else:
+            return self._es.bulk(body=body)
+
+    def _report(self, indexed, errors, pending, error, outcome):
         # hide user's credentials before logging
         masked_hosts = _mask_hosts(self._es_hosts)
-        self.logger.info(f'Saved benchmark data to {masked_hosts} to index {self._es_index} as doctype {self._es_doctype}')
+        if indexed:
+            self.logger.info(f'Saved benchmark data to {masked_hosts} to index {self._es_index} as doctype {self._es_doctype}')
+        if errors:
+            self.logger.error('Elasticsearch rejected {} documents:\n{}'.format(len(errors), '\n'.join(errors)))
+        if pending:
+            self.logger.warning(
+                f'Could not send {len(pending)} documents to {masked_hosts} ({error}). '
+                f'{outcome}, run `pytest-benchmark flush` (with the same --storage) to send them later.'
+            )
 
     def _create_index(self):
         mapping = {
@@ -187,6 +386,15 @@ class ElasticsearchStorage:
                                 'min_time': {'type': 'double'},
                                 'timer': {'type': 'string'},
                                 'warmup': {'type': 'boolean'},
+                                'unroll': {'type': 'long'},
+                                'overhead': {'type': 'double'},
+                                'subtract_overhead': {'type': 'boolean'},
+                                'target_precision': {'type': 'double'},
+                                'memory': {'type': 'boolean'},
+                                'gc_stats': {'type': 'boolean'},
+                                'os_stats': {'type': 'boolean'},
+                                'streaming_stats': {'type': 'boolean'},
+                                'bootstrap': {'type': 'long'},
                             }
                         },
                         'stats': {
@@ -207,10 +415,25 @@ class ElasticsearchStorage:
                                 'stddev': {'type': 'double'},
                                 'stddev_outliers': {'type': 'long'},
                                 'ops': {'type': 'double'},
+                                'mem_peak': {'type': 'long'},
+                                'mem_net': {'type': 'long'},
+                                'mem_blocks': {'type': 'long'},
+                                'gc_time': {'type': 'double'},
+                                'gc_share': {'type': 'double'},
+                                'gc_rounds': {'type': 'long'},
+                                'cpu_share': {'type': 'double'},
+                                'ctx_switches': {'type': 'double'},
+                                'page_faults': {'type': 'double'},
+                                'io_bytes': {'type': 'double'},
                             }
                         },
                     }
                 }
             }
         }
-        self._es.indices.create(index=self._es_index, ignore=400, body=mapping)
+        if hasattr(self._es, 'options'):
+            # elasticsearch>=8 takes the transport options only through options()
+            self._es.options(ignore_status=400).indices.create(index=self._es_index, body=mapping)
+        else:
+            self._es.indices.create(index=self._es_index, ignore=400, body=mapping)
+        self._index_created = True
@@ -1,16 +1,146 @@
+import gzip
 import json
+import lzma
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from os.path import commonpath
 from pathlib import Path
+from pathlib import PurePath
 
 from ..stats import normalize_stats
 from ..utils import safe_dumps
 from ..utils import short_filename
+from . import decode_data
+from . import encode_data
+from .archive import DataArchive
+
+INDEX_NAME = '.index.jsonl'
+ARCHIVE_NAME = '.data'
+MIN_FILES_PER_WORKER = 16
+COMPRESSIONS = {
+    'gzip': ('.json.gz', gzip.compress),
+    'lzma': ('.json.xz', lzma.compress),
+}
+SUFFIXES = ('.json', *(suffix for suffix, _ in COMPRESSIONS.values()))
+
+
+def read_file(file):
+    """
+    Reads a saved run, decompressing it if needed.
+    """
+    if file.name.endswith('.gz'):
+        return gzip.decompress(file.read_bytes()).decode('utf8')
+    elif file.name.endswith('.xz'):
+        return lzma.decompress(file.read_bytes()).decode('utf8')
+    else:
+        # no newline translation, the offsets in the index are byte offsets
+        return file.read_bytes().decode('utf8')
+
+
+def encode_run(output_json):
+    """
+    Returns a copy of ``output_json`` with the round timings encoded by :func:`~pytest_benchmark.storage.encode_data`.
+    """
+    return dict(
+        output_json,
+        benchmarks=[
+            dict(bench, stats=dict(bench['stats'], data=encode_data(bench['stats']['data']))) if 'data' in bench['stats'] else bench
+            for bench in output_json['benchmarks']
+        ],
+    )
+
+
+def find_benchmarks(text, benchmarks):
+    """
+    Finds the ``(start, end)`` offsets of each benchmark in ``text`` (a run saved with ``indent=4``). Returns ``None`` if
+    the file was formatted differently.
+    """
+    offsets = []
+    position = 0
+    for bench in benchmarks:
+        # the benchmarks are 2 levels deep (in the "benchmarks" list)
+        chunk = safe_dumps(bench, ensure_ascii=True, indent=4).replace('\n', '\n        ')
+        start = text.find(chunk, position)
+        if start == -1:
+            return None
+        position = start + len(chunk)
+        offsets.append((start, position))
+    return offsets
+
+
+def make_index_entry(file, text, data):
+    stat = file.stat()
+    num, _, name = short_filename(PurePath(file.name)).partition('_')
+    # offsets in compressed files would be useless
+    offsets = find_benchmarks(text, data['benchmarks']) if file.suffix == '.json' and text.isascii() else None
+    return {
+        'file': file.name,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'num': int(num) if num.isdigit() else None,
+        'name': name,
+        'commit': (data.get('commit_info') or {}).get('id'),
+        'datetime': data.get('datetime'),
+        'benchmarks': [bench['fullname'] for bench in data['benchmarks']],
+        'offsets': offsets,
+    }
+
+
+def load_benchmarks_file(file, offsets=None, fields=None):
+    """
+    Loads the benchmarks (with the stats merged in) from ``file``, only decoding the slices at ``offsets`` if given and
+    only keeping the ``fields`` if given.
+
+    Returns a ``(benchmarks, error)`` tuple, as this also runs in worker processes.
+    """
+    try:
+        benchmarks = None
+        if offsets:
+            start = offsets[0][0]
+            with file.open('rb') as fh:
+                fh.seek(start)
+                chunk = fh.read(offsets[-1][1] - start)
+            try:
+                benchmarks = [json.loads(chunk[begin - start : end - start]) for begin, end in offsets]
+            except ValueError:
+                # the offsets don't match the file after all (the index is only checked by size and mtime), decode all of it
+                pass
+        elif offsets is not None:
+            benchmarks = []
+        if benchmarks is None:
+            benchmarks = json.loads(read_file(file))['benchmarks']
+        for bench in benchmarks:
+            bench.update(normalize_stats(bench.pop('stats')))
+    except Exception as exc:
+        return None, str(exc)
+    if fields:
+        benchmarks = [{key: value for key, value in bench.items() if key in fields} for bench in benchmarks]
+    for bench in benchmarks:
+        if 'data' in bench:
+            bench['data'] = decode_data(bench['data'])
+    return benchmarks, None
 
 
 class FileStorage:
-    def __init__(self, path, logger, default_machine_id=None):
+    """
+    Stores each run in a json file, in a directory for each machine.
+
+    With ``compression`` (``'gzip'`` or ``'lzma'``) the runs are saved as compressed files and the round timings are
+    packed (see :func:`~pytest_benchmark.storage.encode_data`). The runs are loaded the same way regardless of format.
+
+    Every directory also has an index (``.index.jsonl``) with a line for each run: the number, name, commit, datetime,
+    the fullnames of the benchmarks and their byte offsets in the file. It is updated on each save and it's only used
+    for the files that didn't change since they were indexed.
+
+    The rounds data (if saved) is also appended to a :class:`~pytest_benchmark.storage.archive.DataArchive` (in
+    ``.data``), see :meth:`load_data`.
+    """
+
+    def __init__(self, path, logger, default_machine_id=None, compression=None):
         self.path = Path(path)
         self.default_machine_id = default_machine_id
+        self.compression = compression
         try:
             self.path.mkdir(parents=True)
         except OSError:
@@ -18,6 +148,7 @@ class FileStorage:
         self.path = self.path.resolve()
         self.logger = logger
         self._cache = {}
+        self._indexes = {}
 
     def __str__(self):
         return str(self.path)
@@ -34,25 +165,127 @@ class FileStorage:
             pass
         return path.joinpath(name)
 
-    @property
-    def _next_num(self):
-        files = self.query('[0-9][0-9][0-9][0-9]_*')
-        files.sort(reverse=True)
-        if not files:
-            return '0001'
-        for f in files:
+    def _read_index(self, path):
+        """
+        Reads the index of the ``path`` directory (a dict of file name to entry). The entries may be stale.
+        """
+        if path not in self._indexes:
+            index = {}
             try:
-                return f'{int(str(f.name).split("_")[0]) + 1:04}'
-            except ValueError:
-                raise
+                with path.joinpath(INDEX_NAME).open(encoding='utf8') as fh:
+                    for line in fh:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:  # partially written line
+                            continue
+                        index[entry['file']] = entry
+            except OSError:
+                pass
+            self._indexes[path] = index
+        return self._indexes[path]
+
+    def _get_index_entry(self, file):
+        """
+        Returns the index entry of ``file``, or ``None`` if it wasn't indexed or it changed after that.
+        """
+        entry = self._read_index(file.parent).get(file.name)
+        if entry is None:
+            return None
+        try:
+            stat = file.stat()
+        except OSError:
+            return None
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry
+
+    def _update_index(self, path):
+        """
+        Adds the missing (or changed) files from the ``path`` directory to its index, and drops the removed ones.
+        """
+        index = self._read_index(path)
+        files = {entry.name: Path(entry.path) for entry in os.scandir(path) if entry.name.endswith(SUFFIXES) and entry.is_file()}
+        stale = index.keys() - files.keys()
+        added = []
+        for name, file in sorted(files.items()):
+            if self._get_index_entry(file) is None:
+                if name in index:
+                    stale.add(name)
+                try:
+                    text = read_file(file)
+                    entry = make_index_entry(file, text, json.loads(text))
+                except Exception as exc:
+                    self.logger.warning(f'Failed to index {file}: {exc}')
+                    continue
+                added.append(entry)
+        for name in stale:
+            del index[name]
+        index.update((entry['file'], entry) for entry in added)
+        if stale:
+            self._write_index(path, index.values())
+        elif added:
+            self._append_index(path, added)
+        return index
+
+    def _append_index(self, path, entries):
+        with path.joinpath(INDEX_NAME).open('a', encoding='utf8') as fh:
+            fh.writelines(f'{json.dumps(entry)}\n' for entry in entries)
+
+    def _write_index(self, path, entries):
+        index_file = path.joinpath(INDEX_NAME)
+        tmp_file = index_file.with_name(f'{INDEX_NAME}.{os.getpid()}')
+        with tmp_file.open('w', encoding='utf8') as fh:
+            fh.writelines(f'{json.dumps(entry)}\n' for entry in entries)
+        tmp_file.replace(index_file)
+
+    def _next_num(self, index):
+        return max((entry['num'] for entry in index.values() if entry['num'] is not None), default=0) + 1
 
     def save(self, output_json, save):
-        output_file = self.get(f'{self._next_num}_{save}.json')
+        path = self.get('')
+        index = self._update_index(path)
+        if self.compression:
+            suffix, compress = COMPRESSIONS[self.compression]
+            text = safe_dumps(encode_run(output_json), ensure_ascii=True)
+            content = compress(text.encode())
+        else:
+            suffix = '.json'
+            text = safe_dumps(output_json, ensure_ascii=True, indent=4)
+            content = text.encode()
+        output_file = path.joinpath(f'{self._next_num(index):04}_{save}{suffix}')
         assert not output_file.exists()
         with output_file.open('wb') as fh:
-            fh.write(safe_dumps(output_json, ensure_ascii=True, indent=4).encode())
+            fh.write(content)
+        entry = index[output_file.name] = make_index_entry(output_file, text, output_json)
+        self._append_index(path, [entry])
+        DataArchive(path.joinpath(ARCHIVE_NAME)).append(output_file.name, output_json['benchmarks'])
         self.logger.info(f'Saved benchmark data in: {output_file}')
 
+    def _get_cache_file(self, name):
+        # kept in a subdirectory so the cache files don't get mixed with the saved runs
+        return self.path.joinpath('.cache', self.default_machine_id or '', f'{name}.json')
+
+    def load_cache(self, name):
+        """
+        Loads the ``name`` cache (a dict) for this machine. Returns an empty dict if there's no cache or it can't be read.
+        """
+        cache_file = self._get_cache_file(name)
+        try:
+            return json.loads(cache_file.read_text(encoding='utf8'))
+        except FileNotFoundError:
+            return {}
+        except Exception as exc:
+            self.logger.warning(f'Failed to load {cache_file}: {exc}')
+            return {}
+
+    def save_cache(self, name, data):
+        cache_file = self._get_cache_file(name)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}')
+        with tmp_file.open('wb') as fh:
+            fh.write(safe_dumps(data, ensure_ascii=True, indent=4, sort_keys=True).encode())
+        tmp_file.replace(cache_file)
+        self.logger.debug(f'Saved {name} cache in: {cache_file}')
+
     def query(self, *globs_or_files):
         files = []
         globs = []
@@ -80,13 +313,14 @@ class FileStorage:
                 platform_glob = self.default_machine_id or '*'
                 (filename_glob,) = parts or ['']
 
-            filename_glob = filename_glob.rstrip('*') + '*.json'
+            filename_glob = filename_glob.rstrip('*') + '*'
             globs.append((platform_glob, filename_glob))
 
-        files.extend(
-            (file for platform_glob, filename_glob in globs for path in self.path.glob(platform_glob) for file in path.glob(filename_glob))
-        )
-        files.extend((file for _, filename_glob in globs for file in self.path.glob(filename_glob)))
+        matches = [
+            file for platform_glob, filename_glob in globs for path in self.path.glob(platform_glob) for file in path.glob(filename_glob)
+        ]
+        matches.extend(file for _, filename_glob in globs for file in self.path.glob(filename_glob))
+        files.extend(file for file in matches if file.name.endswith(SUFFIXES))
         return sorted(files, key=lambda file: (file.name, file.parent))
 
     def load(self, *globs_or_files):
@@ -98,27 +332,99 @@ class FileStorage:
                 data = self._cache[file]
             else:
                 try:
-                    data = json.loads(file.read_text(encoding='utf8'))
+                    data = json.loads(read_file(file))
                     for bench in data['benchmarks']:
-                        normalize_stats(bench['stats'])
+                        stats = normalize_stats(bench['stats'])
+                        if 'data' in stats:
+                            stats['data'] = decode_data(stats['data'])
                 except Exception as exc:
                     self.logger.warning(f'Failed to load {file}: {exc}')
                     continue
                 self._cache[file] = data
-            try:
-                relpath = file.relative_to(self.path)
-            except ValueError:
-                relpath = file
-            yield relpath, data
+            yield self._get_relpath(file), data
+
+    def load_latest(self):
+        """
+        Loads just the latest run (a list with a single ``(path, data)`` tuple, or an empty list if there are no runs).
+        """
+        files = self.query('[0-9][0-9][0-9][0-9]_')
+        return list(self.load(files[-1])) if files else []
+
+    def _get_relpath(self, file):
+        try:
+            return file.relative_to(self.path)
+        except ValueError:
+            return file
+
+    def load_benchmarks(self, *globs_or_files, fields=None, workers=None):
+        """
+        Yields the benchmarks from the matching runs, flattened (the stats are merged in) and with the ``path`` and
+        ``source`` of the run added. If ``fields`` is given the other fields (eg: the rounds data) are dropped right
+        after each file is decoded.
+
+        The files are decoded in ``workers`` processes. By default that's one per CPU when there are many files.
+        """
+        if not globs_or_files:
+            globs_or_files = ('[0-9][0-9][0-9][0-9]_',)
+
+        files = self.query(*globs_or_files)
+        paths = [self._get_relpath(file) for file in files]
+        sources = [short_filename(path) for path in paths]
+        common = len(commonpath(sources)) if sources else 0
+        offsets = []
+        for file in files:
+            entry = self._get_index_entry(file)
+            offsets.append(entry and entry['offsets'])
+        fields = fields and frozenset(fields)
+        if workers is None:
+            workers = min(os.cpu_count() or 1, len(files) // MIN_FILES_PER_WORKER)
+
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as executor:
+                chunksize = max(1, len(files) // (workers * 4))
+                yield from self._iter_benchmarks(
+                    files, paths, sources, common, executor.map(load_benchmarks_file, files, offsets, repeat(fields), chunksize=chunksize)
+                )
+        else:
+            yield from self._iter_benchmarks(files, paths, sources, common, map(load_benchmarks_file, files, offsets, repeat(fields)))
+
+    def load_data(self, fullname, *globs_or_files):
+        """
+        Yields ``(path, iterations, data)`` for each matching run that has the rounds data of the ``fullname`` benchmark.
+        The ``data`` comes from the archive (a memoryview of the mapped file, no copies) or, for the runs saved before the
+        archive existed, from the run file.
+        """
+        if not globs_or_files:
+            globs_or_files = ('[0-9][0-9][0-9][0-9]_',)
 
-    def load_benchmarks(self, *globs_or_files):
-        sources = [(short_filename(path), path, data) for path, data in self.load(*globs_or_files)]
-        common = len(commonpath([src for src, _, _ in sources])) if sources else 0
-        for source, path, data in sources:
+        archives = {}
+        for file in self.query(*globs_or_files):
+            if file.parent not in archives:
+                archives[file.parent] = DataArchive(file.parent.joinpath(ARCHIVE_NAME)).load(fullname)
+            if file.name in archives[file.parent]:
+                iterations, data = archives[file.parent][file.name]
+            else:
+                entry = self._get_index_entry(file)
+                if entry and fullname not in entry['benchmarks']:
+                    continue
+                benchmarks, error = load_benchmarks_file(file, entry and entry['offsets'], ('fullname', 'iterations', 'data'))
+                if error:
+                    self.logger.warning(f'Failed to load {file}: {error}')
+                    continue
+                bench = next((bench for bench in benchmarks if bench['fullname'] == fullname and bench.get('data')), None)
+                if bench is None:
+                    continue
+                iterations, data = bench['iterations'], bench['data']
+            yield self._get_relpath(file), iterations, data
+
+    def _iter_benchmarks(self, files, paths, sources, common, results):
+        for file, path, source, (benchmarks, error) in zip(files, paths, sources, results):
+            if error:
+                self.logger.warning(f'Failed to load {file}: {error}')
+                continue
             source = source[common:].lstrip(r'\/')
 
-            for bench in data['benchmarks']:
-                bench.update(bench.pop('stats'))
+            for bench in benchmarks:
                 bench['path'] = str(path)
                 bench['source'] = source
                 yield bench
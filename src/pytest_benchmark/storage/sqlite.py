@@ -0,0 +1,274 @@
+import json
+import sqlite3
+import sys
+from os.path import commonpath
+from pathlib import Path
+from pathlib import PurePosixPath
+
+from ..stats import normalize_stats
+from ..utils import safe_dumps
+from ..utils import short_filename
+from . import pack_data
+from . import unpack_data
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS machines (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    commit_id TEXT,
+    project TEXT,
+    info TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS commits_commit_id ON commits (commit_id);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    machine INTEGER NOT NULL REFERENCES machines (id),
+    num INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    file TEXT NOT NULL,
+    datetime TEXT,
+    version TEXT,
+    machine_info TEXT NOT NULL,
+    commit_ref INTEGER REFERENCES commits (id),
+    extra TEXT NOT NULL,
+    UNIQUE (machine, num)
+);
+CREATE INDEX IF NOT EXISTS runs_file ON runs (file);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    run INTEGER NOT NULL REFERENCES runs (id),
+    position INTEGER NOT NULL,
+    fullname TEXT NOT NULL,
+    document TEXT NOT NULL,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS benchmarks_run ON benchmarks (run, position);
+CREATE INDEX IF NOT EXISTS benchmarks_fullname ON benchmarks (fullname);
+CREATE TABLE IF NOT EXISTS caches (
+    machine TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (machine, name)
+);
+"""
+
+
+class SQLiteStorage:
+    """
+    Stores the runs in a SQLite database, with indexed tables for the machines, commits, runs and benchmarks. The round
+    timings (``stats.data``) are kept in BLOBs, everything else in JSON documents.
+
+    The runs are named like the files of :class:`~pytest_benchmark.storage.file.FileStorage` (``<machine>/0001_<name>``)
+    and accept the same globs, thus ``--benchmark-compare``, ``pytest-benchmark list`` and ``pytest-benchmark compare``
+    work the same way (but only the matching runs are read).
+    """
+
+    def __init__(self, path, logger, default_machine_id=None):
+        self.path = Path(path)
+        self.default_machine_id = default_machine_id
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = self.path.resolve()
+        self.logger = logger
+        self._connection = sqlite3.connect(self.path, timeout=30)
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def __str__(self):
+        return str(self.path)
+
+    @property
+    def location(self):
+        return str(self.path)
+
+    def close(self):
+        self._connection.close()
+
+    def _get_id(self, table, key, **values):
+        """
+        Returns the id of the row from ``table`` that has the given ``key`` value (inserting it if missing).
+        """
+        # the table and column names come from this class (never from user input), the values are bound as parameters
+        row = self._connection.execute(f'SELECT id FROM {table} WHERE {key} = ?', (values[key],)).fetchone()  # noqa: S608
+        if row:
+            return row[0]
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' * len(values))
+        return self._connection.execute(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', tuple(values.values())).lastrowid  # noqa: S608
+
+    def _get_where(self, globs):
+        """
+        Translates the ``platform-glob/filename-glob`` or ``filename-glob`` globs (like in
+        :meth:`FileStorage.query <pytest_benchmark.storage.file.FileStorage.query>`) to a WHERE clause.
+        """
+        if not globs:
+            globs = ('*',)
+        clauses = []
+        params = []
+        for globish in globs:
+            parts = PurePosixPath(globish).parts
+            if len(parts) > 2:
+                raise ValueError(f"{globish!r} isn't an acceptable glob. Expected 'platform-glob/filename-glob' or 'filename-glob'.")
+            elif len(parts) == 2:
+                platform_glob, filename_glob = parts
+            else:
+                platform_glob = self.default_machine_id or '*'
+                (filename_glob,) = parts or ['']
+            clauses.append('(machines.name GLOB ? AND runs.file GLOB ?)')
+            params.extend([platform_glob, filename_glob.rstrip('*') + '*'])
+        return ' OR '.join(clauses), params
+
+    def _query_runs(self, globs, last=False):
+        where, params = self._get_where(globs)
+        # same order as FileStorage.query
+        order = 'runs.file DESC, machines.name DESC LIMIT 1' if last else 'runs.file, machines.name'
+        return self._connection.execute(
+            # the WHERE clause only has placeholders (see _get_where) and the ORDER BY is fixed
+            f"""
+            SELECT runs.id, machines.name, runs.file, runs.datetime, runs.version, runs.machine_info, commits.info, runs.extra
+            FROM runs JOIN machines ON machines.id = runs.machine LEFT JOIN commits ON commits.id = runs.commit_ref
+            WHERE {where}
+            ORDER BY {order}
+            """,  # noqa: S608
+            params,
+        ).fetchall()
+
+    def query(self, *globs):
+        return [PurePosixPath(machine, file) for _, machine, file, *_ in self._query_runs(globs)]
+
+    def _load_run(self, row, with_data=True):
+        run_id, machine, file, datetime, version, machine_info, commit_info, extra = row
+        benchmarks = []
+        if with_data:
+            query = 'SELECT document, data FROM benchmarks WHERE run = ? ORDER BY position'
+        else:
+            query = 'SELECT document, NULL FROM benchmarks WHERE run = ? ORDER BY position'
+        for document, data in self._connection.execute(query, (run_id,)):
+            bench = json.loads(document)
+            if data is not None:
+                bench['stats']['data'] = unpack_data(data)
+            normalize_stats(bench['stats'])
+            benchmarks.append(bench)
+        return PurePosixPath(machine, file), {
+            'machine_info': json.loads(machine_info),
+            'commit_info': json.loads(commit_info) if commit_info else {},
+            'benchmarks': benchmarks,
+            'datetime': datetime,
+            'version': version,
+            **json.loads(extra),
+        }
+
+    def load(self, *globs):
+        if not globs:
+            globs = ('[0-9][0-9][0-9][0-9]_',)
+        for row in self._query_runs(globs):
+            yield self._load_run(row)
+
+    def load_latest(self):
+        """
+        Loads just the latest run (a list with a single ``(path, data)`` tuple, or an empty list if there are no runs).
+        """
+        return [self._load_run(row) for row in self._query_runs(('[0-9][0-9][0-9][0-9]_',), last=True)]
+
+    def load_benchmarks(self, *globs, fields=None, workers=None):
+        """
+        Yields the benchmarks from the matching runs, flattened and with the ``path`` and ``source`` added. If ``fields``
+        is given the other fields are dropped. The ``workers`` argument is ignored (there's a single connection).
+        """
+        if not globs:
+            globs = ('[0-9][0-9][0-9][0-9]_',)
+        rows = self._query_runs(globs)
+        sources = [short_filename(PurePosixPath(machine, file)) for _, machine, file, *_ in rows]
+        common = len(commonpath(sources)) if sources else 0
+        for row, source in zip(rows, sources):
+            # the BLOBs are only read (and unpacked) if the rounds data is needed
+            path, data = self._load_run(row, with_data=not fields or 'data' in fields)
+            source = source[common:].lstrip(r'\/')
+
+            for bench in data['benchmarks']:
+                bench.update(bench.pop('stats'))
+                if fields:
+                    bench = {key: value for key, value in bench.items() if key in fields}
+                bench['path'] = str(path)
+                bench['source'] = source
+                yield bench
+
+    def load_data(self, fullname, *globs):
+        """
+        Yields ``(path, iterations, data)`` for each matching run that has the rounds data of the ``fullname`` benchmark.
+        The ``data`` is a memoryview of the BLOB (no decoding).
+        """
+        where, params = self._get_where(globs or ('[0-9][0-9][0-9][0-9]_',))
+        for machine, file, iterations, data in self._connection.execute(
+            # the WHERE clause only has placeholders (see _get_where)
+            f"""
+            SELECT machines.name, runs.file, json_extract(benchmarks.document, '$.stats.iterations'), benchmarks.data
+            FROM benchmarks JOIN runs ON runs.id = benchmarks.run JOIN machines ON machines.id = runs.machine
+            WHERE benchmarks.fullname = ? AND benchmarks.data IS NOT NULL AND ({where})
+            ORDER BY runs.file, machines.name
+            """,  # noqa: S608
+            [fullname, *params],
+        ):
+            yield PurePosixPath(machine, file), iterations, memoryview(data).cast('d') if sys.byteorder == 'little' else unpack_data(data)
+
+    def save(self, output_json, save):
+        output_json = json.loads(safe_dumps(output_json, ensure_ascii=True))
+        machine_name = self.default_machine_id or ''
+        with self._connection:
+            # take the write lock right away, otherwise concurrent saves could get the same number
+            self._connection.execute('BEGIN IMMEDIATE')
+            machine = self._get_id('machines', 'name', name=machine_name)
+            commit_info = output_json.pop('commit_info', None)
+            if commit_info is None:
+                commit = None
+            else:
+                commit = self._get_id(
+                    'commits',
+                    'info',
+                    commit_id=commit_info.get('id'),
+                    project=commit_info.get('project'),
+                    info=json.dumps(commit_info, sort_keys=True),
+                )
+            (num,) = self._connection.execute('SELECT COALESCE(MAX(num), 0) + 1 FROM runs WHERE machine = ?', (machine,)).fetchone()
+            file = f'{num:04}_{save}'
+            benchmarks = output_json.pop('benchmarks')
+            run = self._connection.execute(
+                'INSERT INTO runs (machine, num, name, file, datetime, version, machine_info, commit_ref, extra) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    machine,
+                    num,
+                    save,
+                    file,
+                    output_json.pop('datetime', None),
+                    output_json.pop('version', None),
+                    json.dumps(output_json.pop('machine_info', {})),
+                    commit,
+                    json.dumps(output_json),
+                ),
+            ).lastrowid
+            rows = []
+            for position, bench in enumerate(benchmarks):
+                data = bench['stats'].pop('data', None)
+                rows.append((run, position, bench['fullname'], json.dumps(bench), None if data is None else pack_data(data)))
+            self._connection.executemany('INSERT INTO benchmarks (run, position, fullname, document, data) VALUES (?, ?, ?, ?, ?)', rows)
+        self.logger.info(f'Saved benchmark data in: {self.path} as {PurePosixPath(machine_name, file)}')
+
+    def load_cache(self, name):
+        """
+        Loads the ``name`` cache (a dict) for this machine. Returns an empty dict if there's no cache.
+        """
+        row = self._connection.execute(
+            'SELECT data FROM caches WHERE machine = ? AND name = ?', (self.default_machine_id or '', name)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save_cache(self, name, data):
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO caches (machine, name, data) VALUES (?, ?, ?)',
+                (self.default_machine_id or '', name, safe_dumps(data, ensure_ascii=True, sort_keys=True)),
+            )
+        self.logger.debug(f'Saved {name} cache in: {self.path}')
@@ -6,13 +6,22 @@
 import operator
 from math import isinf
 
+from .utils import BOOTSTRAP_COLUMNS
+from .utils import CONCURRENCY_COLUMNS
+from .utils import GC_COLUMNS
+from .utils import MEMORY_COLUMNS
+from .utils import OPTIONAL_COLUMNS
+from .utils import OS_COLUMNS
+from .utils import SWEEP_COLUMNS
 from .utils import report_online_progress
 from .utils import report_progress
 
 NUMBER_FMT = '{0:,.4f}'
 ALIGNED_NUMBER_FMT = '{0:>{1},.4f}{2:<{3}}'
 STAT_PROPS = ('min', 'max', 'mean', 'median', 'iqr', 'stddev', 'ops')
+UNSCALED_PROPS = ('outliers', 'rounds', 'iterations', *OPTIONAL_COLUMNS)
 DELTA = '\N{GREEK CAPITAL LETTER DELTA}'
+PLUS_MINUS = '\N{PLUS-MINUS SIGN}'
 
 
 def compute_best_worst(benchmarks, progress_reporter, tr, line):
@@ -52,16 +61,36 @@ class TableResults:
             'median': 'Median',
             'outliers': 'Outliers',
             'ops': f'OPS ({ops_unit}ops/s)' if ops_unit else 'OPS',
+            'mem_peak': 'Peak mem (B)',
+            'mem_net': 'Net mem (B)',
+            'mem_blocks': 'Blocks',
+            'gc_share': 'GC share',
+            'cpu_share': 'CPU share',
+            'ctx_switches': 'Ctx switches',
+            'page_faults': 'Page faults',
+            'io_bytes': 'I/O (B)',
+            'threads': 'Threads',
+            'workers': 'Workers',
+            'aggregate_ops': 'Agg. ops/s',
+            'scaling': 'Scaling',
+            'complexity': 'Complexity',
+            'mean_ci': f'Mean {PLUS_MINUS}',
+            'median_ci': f'Median {PLUS_MINUS}',
+            'ops_ci': f'OPS {PLUS_MINUS}',
         }
         return unit, adjustment, ops_adjustment, labels
 
     def display(self, tr, groups, progress_reporter=report_progress):
         tr.write_line('')
         report_online_progress(progress_reporter, tr, 'Computing stats ...')
+        shown_optional = set()
         for line, (group, benchmarks) in progress_reporter(groups, tr, 'Computing stats ... group {pos}/{total}'):
             benchmarks = sorted(benchmarks, key=operator.itemgetter(self.sort))
             for bench in benchmarks:
                 bench['name'] = self.name_format(bench)
+            # optional columns (memory, gc) are only shown if there's at least one benchmark that has them
+            columns = [prop for prop in self.columns if prop not in OPTIONAL_COLUMNS or any(prop in bench for bench in benchmarks)]
+            shown_optional.update(prop for prop in columns if prop in OPTIONAL_COLUMNS)
 
             solo = len(benchmarks) == 1
             best, worst = compute_best_worst(benchmarks, progress_reporter, tr, line)
@@ -81,11 +110,12 @@ class TableResults:
             for prop in STAT_PROPS:
                 if prop not in widths:
                     widths[prop] = 2 + max(len(labels[prop]), max(len(NUMBER_FMT.format(bench[prop] * adjustment)) for bench in benchmarks))
+            for prop in OPTIONAL_COLUMNS:
+                widths[prop] = 2 + max(len(labels[prop]), max(len(format_optional(prop, bench.get(prop))) for bench in benchmarks))
 
             rpadding = 0 if solo else 10
             labels_line = labels['name'].ljust(widths['name']) + ''.join(
-                labels[prop].rjust(widths[prop]) + (' ' * rpadding if prop not in ['outliers', 'rounds', 'iterations'] else '')
-                for prop in self.columns
+                labels[prop].rjust(widths[prop]) + (' ' * rpadding if prop not in UNSCALED_PROPS else '') for prop in columns
             )
             report_online_progress(progress_reporter, tr, '')
             tr.write_line(
@@ -101,7 +131,7 @@ class TableResults:
             for bench in benchmarks:
                 has_error = bench.get('has_error')
                 tr.write(bench['name'].ljust(widths['name']), red=has_error, invert=has_error)
-                for prop in self.columns:
+                for prop in columns:
                     if prop in ('min', 'max', 'mean', 'stddev', 'median', 'iqr'):
                         tr.write(
                             ALIGNED_NUMBER_FMT.format(
@@ -123,6 +153,8 @@ class TableResults:
                             red=not solo and bench[prop] == worst.get(prop),
                             bold=True,
                         )
+                    elif prop in OPTIONAL_COLUMNS:
+                        tr.write(format_optional(prop, bench.get(prop)).rjust(widths[prop]))
                     else:
                         tr.write('{0:>{1}}'.format(bench[prop], widths[prop]))
                 tr.write('\n')
@@ -142,6 +174,30 @@ class TableResults:
         tr.write_line('Legend:')
         tr.write_line('  Outliers: 1 Standard Deviation from Mean; 1.5 IQR (InterQuartile Range) from 1st Quartile and 3rd Quartile.')
         tr.write_line('  OPS: Operations Per Second, computed as 1 / Mean')
+        if shown_optional.intersection(MEMORY_COLUMNS):
+            tr.write_line(
+                '  Peak mem, Net mem: bytes allocated at peak and still allocated after a call (tracemalloc); '
+                'Blocks: net change in allocated blocks. Medians of the memory rounds.'
+            )
+        if shown_optional.intersection(GC_COLUMNS):
+            tr.write_line('  GC share: time spent in garbage collection as a share of the total measured time.')
+        if shown_optional.intersection(OS_COLUMNS):
+            tr.write_line(
+                '  CPU share: user and system CPU time as a share of the total measured time; '
+                'Ctx switches, Page faults, I/O: per iteration.'
+            )
+        if shown_optional.intersection(CONCURRENCY_COLUMNS):
+            tr.write_line(
+                '  Agg. ops/s: calls per second from all the threads (or worker processes) together; '
+                'Scaling: Agg. ops/s relative to the lowest thread count, divided by the ratio of thread counts.'
+            )
+        if shown_optional.intersection(SWEEP_COLUMNS):
+            tr.write_line('  Complexity: best fit of the medians from all the sizes of a benchmark.sweep.')
+        if shown_optional.intersection(BOOTSTRAP_COLUMNS):
+            tr.write_line(
+                f'  Mean {PLUS_MINUS}, Median {PLUS_MINUS}, OPS {PLUS_MINUS}: half-width of the 95% bootstrap confidence interval, '
+                'relative to the estimate.'
+            )
 
 
 class CompareBetweenResults(TableResults):
@@ -261,6 +317,21 @@ class CompareBetweenResults(TableResults):
         tr.write_line('')
 
 
+def format_optional(prop, value):
+    if value is None:
+        return 'N/A'
+    elif prop in ('gc_share', 'cpu_share', 'scaling'):
+        return f'{value:.2%}'
+    elif prop in BOOTSTRAP_COLUMNS:
+        return f'{PLUS_MINUS}{value:.2%}'
+    elif isinstance(value, str):
+        return value
+    elif isinstance(value, float):
+        return f'{value:,.2f}'
+    else:
+        return f'{value:,}'
+
+
 def compute_baseline_scale(baseline, value, width):
     if not width:
         return ''
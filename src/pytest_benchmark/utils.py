@@ -4,6 +4,8 @@
 """
 
 import argparse
+import hashlib
+import inspect
 import json
 import netrc
 import os
@@ -23,8 +25,16 @@ from urllib.parse import parse_qs
 from urllib.parse import urlparse
 
 TIME_UNITS = {'': 'Seconds', 'm': 'Milliseconds (ms)', 'u': 'Microseconds (us)', 'n': 'Nanoseconds (ns)'}
-ALLOWED_COLUMNS = ['min', 'max', 'mean', 'stddev', 'median', 'iqr', 'ops', 'outliers', 'rounds', 'iterations']
+MEMORY_COLUMNS = ['mem_peak', 'mem_net', 'mem_blocks']
+GC_COLUMNS = ['gc_share']
+OS_COLUMNS = ['cpu_share', 'ctx_switches', 'page_faults', 'io_bytes']
+CONCURRENCY_COLUMNS = ['threads', 'workers', 'aggregate_ops', 'scaling']
+SWEEP_COLUMNS = ['complexity']
+BOOTSTRAP_COLUMNS = ['mean_ci', 'median_ci', 'ops_ci']
+OPTIONAL_COLUMNS = [*MEMORY_COLUMNS, *GC_COLUMNS, *OS_COLUMNS, *CONCURRENCY_COLUMNS, *SWEEP_COLUMNS, *BOOTSTRAP_COLUMNS]
+ALLOWED_COLUMNS = ['min', 'max', 'mean', 'stddev', 'median', 'iqr', 'ops', 'outliers', 'rounds', 'iterations', *OPTIONAL_COLUMNS]
 DEFAULT_COLUMNS = ['min', 'max', 'mean', 'stddev', 'median', 'iqr', 'outliers', 'ops', 'rounds', 'iterations']
+COMPLEXITY_CLASSES = ('O(1)', 'O(log n)', 'O(n)', 'O(n log n)', 'O(n^2)')
 
 
 class SecondsDecimal(Decimal):
@@ -69,6 +79,14 @@ def get_machine_id():
     )
 
 
+def get_runtime_id():
+    """
+    Identifies the exact interpreter build and the kernel. Cached measurements (like the timer precision) are not reused
+    if this changes.
+    """
+    return f'{sys.version} ({platform.platform()})'
+
+
 class Fallback:
     def __init__(self, fallback, exceptions):
         self.fallback = fallback
@@ -199,7 +217,8 @@ def short_filename(path, machine_id=None):
         if not pos and part == machine_id:
             continue
         if pos == last:
-            part = part.rsplit('.', 1)[0]
+            # also strip the .json from compressed runs (.json.gz and .json.xz)
+            part = part.rsplit('.', 2 if part.endswith(('.gz', '.xz')) else 1)[0]
             # if len(part) > 16:
             #     part = "%.13s..." % part
         parts.append(part)
@@ -244,12 +263,84 @@ class DifferenceRegressionCheck(RegressionCheck):
         return current[self.field] - compared[self.field]
 
 
+class ComplexityRegressionCheck(RegressionCheck):
+    def __init__(self, threshold=0):
+        super().__init__('complexity', threshold)
+
+    def compute(self, current, compared):
+        current = current.get(self.field)
+        compared = compared.get(self.field)
+        if current not in COMPLEXITY_CLASSES or compared not in COMPLEXITY_CLASSES:
+            return 0
+        return COMPLEXITY_CLASSES.index(current) - COMPLEXITY_CLASSES.index(compared)
+
+    def fails(self, current, compared):
+        val = self.compute(current, compared)
+        if val > self.threshold:
+            return (
+                f'Field {self.field!r} has failed {self.__class__.__name__}: '
+                f'{compared.get(self.field)} -> {current.get(self.field)} ({val} > {self.threshold})'
+            )
+
+
+class SignificanceRegressionCheck(RegressionCheck):
+    """
+    Fails if the rounds of the current run are significantly slower than the compared ones: Welch's t-test for the ``mean``
+    and the Mann-Whitney U test for the ``median`` (one-sided, at the ``p`` significance level). If any of the runs doesn't
+    have the rounds data this falls back to a :class:`PercentageRegressionCheck` with the ``fallback`` threshold.
+    """
+
+    def __init__(self, field, p=0.05, fallback=5):
+        super().__init__(field, p)
+        self.fallback = PercentageRegressionCheck(field, fallback)
+
+    def compute(self, current, compared):
+        from .stats import mann_whitney_u_test  # noqa: PLC0415
+        from .stats import welch_t_test  # noqa: PLC0415
+
+        test = welch_t_test if self.field == 'mean' else mann_whitney_u_test
+        return test(current['data'], compared['data'])
+
+    def fails(self, current, compared):
+        if len(current.get('data') or ()) < 2 or len(compared.get('data') or ()) < 2:
+            return self.fallback.fails(current, compared)
+        p_value, effect_size = self.compute(current, compared)
+        if p_value < self.threshold:
+            change = self.fallback.compute(current, compared)
+            return (
+                f'Field {self.field!r} has failed {self.__class__.__name__}: p={p_value:.6f} < {self.threshold} '
+                f'(effect size: {effect_size:+.3f}, change: {change:+.2f}%)'
+            )
+
+
+def get_source_hash(function):
+    """
+    Short hash of the source code of ``function`` (or just its name if the source is not available, eg: builtins).
+    """
+    try:
+        source = inspect.getsource(function)
+    except (OSError, TypeError):
+        source = funcname(function)
+    return hashlib.sha1(source.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
 def parse_compare_fail(
     string,
     rex=re.compile(
         r'^(?P<field>min|max|mean|median|stddev|iqr):' r'((?P<percentage>[0-9]+)%|(?P<difference>[0-9]*\.?[0-9]+([eE][-+]?[' r'0-9]+)?))$'
     ),
+    complexity_rex=re.compile(r'^complexity(:(?P<classes>[0-9]+))?$'),
+    significant_rex=re.compile(r'^(?P<field>mean|median):significant(:p=(?P<p>0?\.[0-9]+))?(:(?P<fallback>[0-9]+)%)?$'),
 ):
+    m = complexity_rex.match(string)
+    if m:
+        return ComplexityRegressionCheck(int(m.group('classes') or 0))
+    m = significant_rex.match(string)
+    if m:
+        g = m.groupdict()
+        if g['p'] and not 0 < float(g['p']) < 1:
+            raise argparse.ArgumentTypeError(f'Invalid p value in: {string!r}. Must be between 0 and 1.')
+        return SignificanceRegressionCheck(g['field'], float(g['p'] or 0.05), int(g['fallback'] or 5))
     m = rex.match(string)
     if m:
         g = m.groupdict()
@@ -371,6 +462,100 @@ def parse_rounds(string):
         return value
 
 
+def parse_unroll(string):
+    try:
+        value = int(string)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(exc) from None
+    else:
+        if value < 1:
+            raise argparse.ArgumentTypeError('Value for --benchmark-unroll must be at least 1.')
+        return value
+
+
+def parse_workers(string):
+    try:
+        value = int(string)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(exc) from None
+    else:
+        if value < 1:
+            raise argparse.ArgumentTypeError('Value for --workers must be at least 1.')
+        return value
+
+
+def parse_bootstrap(string):
+    try:
+        value = int(string)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(exc) from None
+    if value < 2:
+        raise argparse.ArgumentTypeError('Value for --benchmark-bootstrap must be at least 2.')
+    try:
+        import numpy  # noqa: F401, PLC0415
+    except ImportError:
+        raise argparse.ArgumentTypeError('--benchmark-bootstrap requires numpy (or pytest-benchmark[numpy]).') from None
+    return value
+
+
+def parse_precision(string):
+    string = string.strip()
+    try:
+        if string.endswith('%'):
+            value = float(string[:-1]) / 100
+        else:
+            value = float(string)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'Could not parse value: {string!r}. Expected a percentage (eg: 1%) or a fraction (eg: 0.01).'
+        ) from None
+    if not 0 < value < 1:
+        raise argparse.ArgumentTypeError(f'Invalid value: {string!r}. Must be between 0% and 100%.')
+    return value
+
+
+def parse_cpu_list(string):
+    string = string.strip()
+    if string == 'isolcpus':
+        path = Path('/sys/devices/system/cpu/isolated')
+        try:
+            string = path.read_text().strip()
+        except OSError as exc:
+            raise argparse.ArgumentTypeError(f"Can't read the isolated CPUs from {path}: {exc}") from None
+        if not string:
+            raise argparse.ArgumentTypeError('There are no isolated CPUs (see the isolcpus kernel parameter).')
+    cpus = []
+    for part in string.split(','):
+        try:
+            if '-' in part:
+                start, end = part.split('-')
+                cpus.extend(range(int(start), int(end) + 1))
+            else:
+                cpus.append(int(part))
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"Could not parse value: {string!r}. Expected a CPU list (eg: '2,3,6-9') or 'isolcpus'."
+            ) from None
+    return list(dict.fromkeys(cpus))
+
+
+SCHED_POLICIES = ('other', 'batch', 'idle', 'fifo', 'rr')
+
+
+def parse_sched(string):
+    policy, _, priority = string.strip().lower().partition(':')
+    if policy not in SCHED_POLICIES:
+        raise argparse.ArgumentTypeError(f'Invalid scheduling policy: {policy!r}. Must be one of: {", ".join(map(repr, SCHED_POLICIES))}.')
+    if priority:
+        try:
+            priority = int(priority)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'Could not parse priority: {priority!r}. Expected an integer.') from None
+    else:
+        priority = 1 if policy in ('fifo', 'rr') else 0
+    return policy, priority
+
+
 def parse_seconds(string):
     try:
         return SecondsDecimal(string).as_string
@@ -431,18 +616,34 @@ def load_storage(storage, **kwargs):
     if '://' not in storage:
         storage = 'file://' + storage
     netrc_file = kwargs.pop('netrc')  # only used by elasticsearch storage
+    compression = kwargs.pop('compression', None)  # only used by file storage
+    rootdir = kwargs.pop('rootdir', None)  # only used by elasticsearch storage
     if storage.startswith('file://'):
         from .storage.file import FileStorage  # noqa: PLC0415
 
-        return FileStorage(storage[len('file://') :], **kwargs)
+        return FileStorage(storage[len('file://') :], compression=compression, **kwargs)
+    elif storage.startswith('sqlite://'):
+        from .storage.sqlite import SQLiteStorage  # noqa: PLC0415
+
+        return SQLiteStorage(storage[len('sqlite://') :], **kwargs)
     elif storage.startswith('elasticsearch+'):
+        from .storage.elasticsearch import SPOOL_PATH  # noqa: PLC0415
         from .storage.elasticsearch import ElasticsearchStorage  # noqa: PLC0415
 
         # TODO update benchmark_autosave
         args = parse_elasticsearch_storage(storage[len('elasticsearch+') :], netrc_file=netrc_file)
-        return ElasticsearchStorage(*args, **kwargs)
+        return ElasticsearchStorage(*args, spool=Path(rootdir or '.', SPOOL_PATH), **kwargs)
     else:
-        raise argparse.ArgumentTypeError('Storage must be in form of file://path or elasticsearch+http[s]://host1,host2/index/doctype')
+        raise argparse.ArgumentTypeError(
+            'Storage must be in form of file://path, sqlite://path or elasticsearch+http[s]://host1,host2/index/doctype'
+        )
+
+
+def close_storage(storage):
+    # some storages (sqlite) keep a connection open
+    close = getattr(storage, 'close', None)
+    if close:
+        close()
 
 
 def time_unit(value):
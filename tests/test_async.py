@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+pytest_plugins = ('pytester',)
+
+
+async def sleeper(duration=0.000001):
+    await asyncio.sleep(duration)
+    return 123
+
+
+def test_single(benchmark):
+    assert benchmark(sleeper) == 123
+    assert benchmark.stats.stats.rounds >= 5
+
+
+def test_same_loop(benchmark):
+    loops = set()
+
+    async def stuff(foo, bar=123):
+        loops.add(asyncio.get_running_loop())
+        return foo, bar
+
+    assert benchmark(stuff, 1, bar=2) == (1, 2)
+    assert len(loops) == 1
+
+
+def test_pedantic(benchmark):
+    runs = []
+
+    async def stuff(foo, bar=123):
+        runs.append((foo, bar))
+        return 'result'
+
+    def setup():
+        return [1], {'bar': 2}
+
+    def teardown(foo, bar=123):
+        runs.append('teardown')
+
+    assert benchmark.pedantic(stuff, setup=setup, teardown=teardown, rounds=2) == 'result'
+    assert runs == [(1, 2), 'teardown', (1, 2), 'teardown']
+
+
+def test_pedantic_iterations(benchmark):
+    runs = []
+
+    async def stuff():
+        runs.append('stuff')
+        return 'result'
+
+    assert benchmark.pedantic(stuff, iterations=10, rounds=3) == 'result'
+    assert len(runs) == 31
+
+
+@pytest.mark.benchmark(cprofile=True)
+def test_cprofile(benchmark):
+    assert benchmark(sleeper) == 123
+    assert benchmark.stats.cprofile_stats
+
+
+def test_loop_closed(benchmark):
+    benchmark(sleeper)
+    loop = benchmark._loop
+    benchmark._cleanup()
+    assert loop.is_closed()
+    assert benchmark._loop is None
+
+
+def test_disabled(testdir):
+    test = testdir.makepyfile(
+        """
+import asyncio
+
+async def stuff():
+    await asyncio.sleep(0)
+    return 123
+
+def test_stuff(benchmark):
+    assert benchmark(stuff) == 123
+
+def test_stuff_pedantic(benchmark):
+    assert benchmark.pedantic(stuff) == 123
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-disable', test)
+    result.stdout.fnmatch_lines(['*= 2 passed in *'])
+
+
+def test_running_loop(benchmark):
+    async def main():
+        benchmark(sleeper)
+
+    with pytest.raises(pytest.UsageError, match=r"Can't benchmark coroutine functions from a running event loop"):
+        asyncio.run(main())
@@ -1,4 +1,5 @@
 import json
+import os
 import platform
 
 import pytest
@@ -37,7 +38,8 @@ def test_help(testdir):
             '  --benchmark-compare-fail=EXPR?[[]EXPR?...[]]',
             '  --benchmark-cprofile=COLUMN',
             '  --benchmark-storage=URI',
-            "                        *Default: 'file://./.benchmarks'.",
+            '                        *Default:',
+            "                        'file://./.benchmarks'.",
             '  --benchmark-verbose   *',
             '  --benchmark-sort=COL  *',
             '  --benchmark-group-by=LABEL',
@@ -638,6 +640,68 @@ def test_compare_last(testdir):
     )
 
 
+def test_fixture_detached(testdir):
+    test = testdir.makepyfile(
+        """
+def test_first(benchmark):
+    benchmark(sum, range(10))
+
+def test_second(request):
+    [bench] = request.config._benchmarksession.benchmarks
+    assert bench.fixture is None
+    assert bench.has_error is False
+    assert bench.stats.rounds
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-max-time=0.001', test)
+    result.stdout.fnmatch_lines(['*2 passed*'])
+
+
+def test_compare_significant(testdir):
+    # a fake clock, thus the rounds (and the p-values) don't depend on the noise of the machine
+    test = testdir.makepyfile(
+        """
+from itertools import cycle
+
+SCALE = 1
+
+class Clock:
+    now = 0.0
+
+    def timer(self):
+        return self.now
+
+def test_sum(benchmark):
+    clock = Clock()
+    benchmark._timer = clock.timer
+    durations = cycle([1.0, 1.1, 0.9, 1.05, 0.95, 1.2])
+
+    def tick():
+        clock.now += next(durations) * SCALE
+
+    benchmark.pedantic(tick, rounds=30)
+"""
+    )
+    testdir.runpytest_subprocess('--benchmark-autosave', '--benchmark-save-data', test)
+    test.write(test.read().replace('SCALE = 1', 'SCALE = 2'))
+    result = testdir.runpytest_subprocess('--benchmark-compare', '--benchmark-compare-fail=median:significant:p=0.01', test)
+    result.stderr.fnmatch_lines(
+        [
+            '*Performance has regressed:',
+            "\ttest_sum (0001_*) - Field 'median' has failed SignificanceRegressionCheck: p=0.000000 < 0.01 (effect size: +1.000, change: +100.00%)",
+        ]
+    )
+    assert result.ret
+    result = testdir.runpytest_subprocess('--benchmark-compare', '--benchmark-compare-fail=mean:significant:p=0.01', test)
+    result.stderr.fnmatch_lines(
+        [
+            '*Performance has regressed:',
+            "\ttest_sum (0001_*) - Field 'mean' has failed SignificanceRegressionCheck: p=0.000000 < 0.01 (effect size: +6.517, change: +100.00%)",
+        ]
+    )
+    assert result.ret
+
+
 def test_compare_non_existing(testdir):
     test = testdir.makepyfile(SIMPLE_TEST)
     testdir.runpytest_subprocess('--benchmark-max-time=0.0000001', '--doctest-modules', '--benchmark-autosave', test)
@@ -703,6 +767,39 @@ def test_verbose(testdir):
     )
 
 
+def test_calibration_cache(testdir):
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess('--benchmark-max-time=0.0000001', '--benchmark-calibration-cache', '--benchmark-verbose', test)
+    result.stdout.fnmatch_lines(['* 2 passed*'])
+    [cache_file] = testdir.tmpdir.join('.benchmarks', '.cache').visit('calibration.json')
+    cache = json.loads(cache_file.read())
+    assert len(cache) == 2
+    assert all(isinstance(loops, int) for loops in cache.values())
+    result = testdir.runpytest_subprocess('--benchmark-max-time=0.0000001', '--benchmark-calibration-cache', '--benchmark-verbose', test)
+    result.stderr.fnmatch_lines(
+        [
+            '  Calibrating to target round *s; will estimate when reaching *s (using: *, precision: *).',
+            '    Checking * iterations from the calibration cache.',
+            '    Measured * iterations: *s.',
+        ]
+    )
+
+
+def test_precision_cache(testdir):
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess('--benchmark-max-time=0.0000001', '--benchmark-precision-cache', '--benchmark-verbose', test)
+    result.stderr.fnmatch_lines(['Computing precision for time.perf_counter ... *s.'])
+    [cache_file] = testdir.tmpdir.join('.benchmarks', '.cache').visit('precision.json')
+    cache = json.loads(cache_file.read())
+    assert cache['time.perf_counter']['precision'] > 0
+    result = testdir.runpytest_subprocess('--benchmark-max-time=0.0000001', '--benchmark-precision-cache', '--benchmark-verbose', test)
+    result.stderr.fnmatch_lines(['Using cached precision for time.perf_counter ... *s.'])
+    cache['time.perf_counter']['runtime'] = 'Something else'
+    cache_file.write(json.dumps(cache))
+    result = testdir.runpytest_subprocess('--benchmark-max-time=0.0000001', '--benchmark-precision-cache', '--benchmark-verbose', test)
+    result.stderr.fnmatch_lines(['Computing precision for time.perf_counter ... *s.'])
+
+
 def test_save(testdir):
     test = testdir.makepyfile(SIMPLE_TEST)
     result = testdir.runpytest_subprocess('--doctest-modules', '--benchmark-save=foobar', '--benchmark-max-time=0.0000001', test)
@@ -924,6 +1021,314 @@ def test_xdist_verbose(testdir):
     )
 
 
+def test_xdist_cpus(testdir):
+    pytest.importorskip('xdist')
+    if not hasattr(os, 'sched_getaffinity'):
+        pytest.skip('os.sched_getaffinity is not available')
+    cpu = min(os.sched_getaffinity(0))
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess(
+        '-n', '1', f'--benchmark-xdist-cpus={cpu}', '--benchmark-json=out.json', '--benchmark-cprofile=cumtime', test
+    )
+    result.stdout.fnmatch_lines(
+        [
+            '*- benchmark: 2 tests -*',
+            'Name (time in ?s) * Min *',
+            '------*',
+            'test_fast *',
+            'test_slow *',
+            '------*',
+            '* 2 passed*',
+        ]
+    )
+    assert 'automatically disabled' not in result.stderr.str()
+    with open('out.json') as fh:
+        data = json.load(fh)
+    assert sorted(bench['name'] for bench in data['benchmarks']) == ['test_fast', 'test_slow']
+    for bench in data['benchmarks']:
+        assert bench['stats']['rounds'] >= 1
+        assert 'cprofile' in bench
+
+
+def test_xdist_cpus_worker_restarted(testdir, monkeypatch):
+    if not hasattr(os, 'sched_getaffinity'):
+        pytest.skip('os.sched_getaffinity is not available')
+    cpu = min(os.sched_getaffinity(0))
+    test = testdir.makepyfile(SIMPLE_TEST)
+    monkeypatch.setenv('PYTEST_XDIST_WORKER', 'gw3')
+    result = testdir.runpytest_subprocess(f'--benchmark-xdist-cpus={cpu}', '--benchmark-verbose', test)
+    result.stderr.fnmatch_lines([f'*Pinned xdist worker gw3 to CPU {cpu}.*'])
+    assert result.ret == 0
+
+
+def test_xdist_cpus_not_enough(testdir):
+    pytest.importorskip('xdist')
+    if not hasattr(os, 'sched_getaffinity'):
+        pytest.skip('os.sched_getaffinity is not available')
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess('-n', '2', '--benchmark-xdist-cpus=0', test)
+    result.stderr.fnmatch_lines(['*Not enough CPUs in --benchmark-xdist-cpus for 2 xdist workers: 0.*'])
+
+
+def test_scheduling(testdir):
+    if not hasattr(os, 'sched_setscheduler'):
+        pytest.skip('os.sched_setscheduler is not available')
+    cpu = min(os.sched_getaffinity(0))
+    nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 1, 19)
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess(
+        f'--benchmark-cpu-affinity={cpu}', f'--benchmark-nice={nice}', '--benchmark-sched=batch', '--benchmark-json=out.json', test
+    )
+    result.stdout.fnmatch_lines(['* 2 passed*'])
+    with open('out.json') as fh:
+        data = json.load(fh)
+    assert data['machine_info']['scheduling'] == {
+        'cpu_affinity': [cpu],
+        'nice': nice,
+        'sched_policy': 'batch',
+        'sched_priority': 0,
+    }
+
+
+def test_scheduling_bad_policy(testdir):
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess('--benchmark-sched=foo', test)
+    result.stderr.fnmatch_lines(
+        [
+            "*: error: argument --benchmark-sched: Invalid scheduling policy: 'foo'. Must be one of: "
+            "'other', 'batch', 'idle', 'fifo', 'rr'.",
+        ]
+    )
+
+
+def test_scheduling_xdist_cpus(testdir):
+    test = testdir.makepyfile(SIMPLE_TEST)
+    result = testdir.runpytest_subprocess('--benchmark-cpu-affinity=0', '--benchmark-xdist-cpus=0', test)
+    result.stderr.fnmatch_lines(["*Can't use --benchmark-cpu-affinity with --benchmark-xdist-cpus*"])
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+
+
+def test_scheduling_disabled(testdir):
+    test = testdir.makepyfile(SIMPLE_TEST)
+    # an impossible policy would fail if it was applied
+    result = testdir.runpytest_subprocess('--benchmark-disable', '--benchmark-sched=fifo:1000', test)
+    result.stdout.fnmatch_lines(['* 2 passed*'])
+
+
+def test_memory(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+def test_alloc(benchmark):
+    benchmark(lambda: [0] * 10000)
+
+@pytest.mark.benchmark(memory=False)
+def test_no_memory(benchmark):
+    benchmark(lambda: None)
+
+def test_pedantic(benchmark):
+    benchmark.pedantic(bytearray, args=(50000,), rounds=3)
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-memory', '--benchmark-json=out.json', '--benchmark-sort=name', test)
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Rounds  Iterations  Peak mem (B)  Net mem (B)  Blocks',
+            '------*',
+            'test_alloc * 80,??? * 80,??? * ?',
+            'test_no_memory * N/A * N/A * N/A',
+            'test_pedantic * 50,??? * 50,??? * ?',
+            '------*',
+            '',
+            'Legend:',
+            '*',
+            '*',
+            '  Peak mem, Net mem: *',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    benchmarks = {bench['name']: bench for bench in data['benchmarks']}
+    assert benchmarks['test_alloc']['options']['memory'] is True
+    assert benchmarks['test_alloc']['stats']['mem_net'] >= 80000
+    assert len(benchmarks['test_alloc']['stats']['mem_data']) == 5
+    assert len(benchmarks['test_pedantic']['stats']['mem_data']) == 3
+    assert 'mem_peak' not in benchmarks['test_no_memory']['stats']
+
+
+def test_gc_stats(testdir):
+    test = testdir.makepyfile(
+        """
+import gc
+
+def test_collect(benchmark):
+    benchmark.pedantic(gc.collect, args=(0,), rounds=5)
+
+def test_nothing(benchmark):
+    benchmark(lambda: None)
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-gc-stats', '--benchmark-json=out.json', '--benchmark-sort=name', test)
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Rounds  Iterations  GC share',
+            '------*',
+            'test_collect * 5 * 1 * ?*.??%',
+            'test_nothing * ?*.??%',
+            '------*',
+            '',
+            'Legend:',
+            '*',
+            '*',
+            '  GC share: *',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    benchmarks = {bench['name']: bench for bench in data['benchmarks']}
+    stats = benchmarks['test_collect']['stats']
+    assert benchmarks['test_collect']['options']['gc_stats'] is True
+    assert stats['gc_collections'][0] >= 5
+    assert stats['gc_rounds'] == 5
+    assert stats['gc_free'] is None
+    assert len(stats['gc_data']) == 5
+    stats = benchmarks['test_nothing']['stats']
+    assert stats['gc_free']['rounds'] + stats['gc_rounds'] == stats['rounds']
+
+
+def test_os_stats(testdir):
+    test = testdir.makepyfile(
+        """
+def test_write(benchmark, tmp_path):
+    benchmark.pedantic((tmp_path / 'out').write_bytes, args=(b'x' * 1000,), rounds=5)
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-os-stats', '--benchmark-json=out.json', test)
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Rounds  Iterations  CPU share  Ctx switches  Page faults * I/O (B)',
+            '------*',
+            'test_write * 5 * 1 * ?*.??% * ?*.?? * ?*.?? * ?*.??',
+            '------*',
+            '',
+            'Legend:',
+            '*',
+            '*',
+            '  CPU share: *',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    [bench] = data['benchmarks']
+    assert bench['options']['os_stats'] is True
+    assert len(bench['stats']['os_data']) == 5
+    assert bench['stats']['os_user_time'] >= 0
+    assert 0 <= bench['stats']['cpu_share']
+
+
+def test_streaming_stats(testdir):
+    test = testdir.makepyfile(
+        """
+def test_sum(benchmark):
+    benchmark.pedantic(sum, args=(range(100),), rounds=100)
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-streaming-stats', '--benchmark-json=out.json', test)
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Rounds  Iterations',
+            '------*',
+            'test_sum * 100 * 1',
+            '------*',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    [bench] = data['benchmarks']
+    assert bench['options']['streaming_stats'] is True
+    assert bench['stats']['rounds'] == 100
+    assert bench['stats']['min'] <= bench['stats']['median'] <= bench['stats']['max']
+    assert 'data' not in bench['stats']
+    assert sum(count for _, count in bench['stats']['sketch']['buckets']) + bench['stats']['sketch']['zeros'] == 100
+
+
+def test_bootstrap(testdir):
+    pytest.importorskip('numpy')
+    test = testdir.makepyfile(
+        """
+def test_sum(benchmark):
+    benchmark.pedantic(sum, args=(range(100),), rounds=50)
+"""
+    )
+    result = testdir.runpytest_subprocess(
+        '--benchmark-bootstrap=100', '--benchmark-columns=mean,median_ci,ops_ci', '--benchmark-json=out.json', test
+    )
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Mean  Median \N{PLUS-MINUS SIGN} * OPS \N{PLUS-MINUS SIGN}',
+            '------*',
+            'test_sum * \N{PLUS-MINUS SIGN}*.??% * \N{PLUS-MINUS SIGN}*.??%',
+            '------*',
+            '',
+            'Legend:',
+            '*',
+            '*',
+            '  Mean \N{PLUS-MINUS SIGN}, Median \N{PLUS-MINUS SIGN}, OPS \N{PLUS-MINUS SIGN}: *',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    [bench] = data['benchmarks']
+    assert bench['options']['bootstrap'] == 100
+    assert bench['stats']['bootstrap']['resamples'] == 100
+    low, high = bench['stats']['bootstrap']['mean']
+    assert low <= bench['stats']['mean'] <= high
+    assert bench['stats']['mean_ci'] >= 0
+
+
+def test_target_precision_marker_invalid(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(target_precision='foo')
+def test_sum(benchmark):
+    benchmark(sum, range(100))
+"""
+    )
+    result = testdir.runpytest_subprocess(test)
+    result.stdout.fnmatch_lines(
+        [
+            "E * ValueError: benchmark mark has an invalid 'target_precision' keyword argument. Could not parse value: 'foo'. "
+            'Expected a percentage (eg: 1%) or a fraction (eg: 0.01).'
+        ]
+    )
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+
+
+def test_bootstrap_marker_without_numpy(testdir):
+    testdir.makeconftest(
+        """
+import sys
+
+sys.modules['numpy'] = None
+"""
+    )
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(bootstrap=100)
+def test_sum(benchmark):
+    benchmark(sum, range(100))
+"""
+    )
+    result = testdir.runpytest_subprocess(test)
+    result.stdout.fnmatch_lines(["E * pytest.UsageError: benchmark mark's 'bootstrap' requires numpy (or pytest-benchmark?numpy?)."])
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+
+
 def test_cprofile(testdir):
     test = testdir.makepyfile(SIMPLE_TEST)
     result = testdir.runpytest_subprocess('--benchmark-cprofile=cumtime', test)
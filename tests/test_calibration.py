@@ -1,5 +1,6 @@
 import time
 from functools import partial
+from itertools import cycle
 
 import pytest
 
@@ -61,3 +62,92 @@ def test_calibrate_stuck(benchmark, minimum, additive, skew_ratio):
     benchmark._timer = partial(next, t)
     benchmark._min_time = minimum
     benchmark(t.send, True)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def timer(self):
+        self.now += 0.000000001
+        return self.now
+
+    def tick(self):
+        self.now += 1
+
+
+@pytest.mark.benchmark(max_time=0, min_rounds=2)
+def test_calibration_cache(benchmark):
+    clock = Clock()
+    calls = []
+
+    def tick():
+        calls.append(None)
+        clock.now += 0.000001
+
+    benchmark._timer = clock.timer
+    benchmark._calibration_cache = {}
+    benchmark._calibration_cache[benchmark._get_calibration_key(tick)] = 10
+    benchmark(tick)
+    assert benchmark.stats.iterations == 10
+    # a single check pass, 2 rounds and the final call
+    assert len(calls) == 10 + 2 * 10 + 1
+
+
+@pytest.mark.benchmark(max_time=0, min_rounds=2)
+def test_calibration_cache_too_slow(benchmark):
+    clock = Clock()
+    calls = []
+
+    def tick():
+        calls.append(None)
+        clock.now += 0.000001
+
+    benchmark._timer = clock.timer
+    benchmark._calibration_cache = cache = {}
+    key = benchmark._get_calibration_key(tick)
+    cache[key] = 10000
+    benchmark(tick)
+    assert benchmark.stats.iterations == 10
+    assert cache == {key: 10}
+    assert len(calls) == 10000 + 1 + 10 + 2 * 10 + 1
+
+
+@pytest.mark.benchmark(max_time=10, min_rounds=2, target_precision=0.01)
+def test_target_precision(benchmark):
+    clock = Clock()
+    benchmark._timer = clock.timer
+    benchmark(clock.tick)
+    assert benchmark.stats.stats.rounds == 2
+    assert benchmark.stats.options['target_precision'] == 0.01
+
+
+@pytest.mark.benchmark(max_time=10, min_rounds=2, target_precision='1%')
+def test_target_precision_percent(benchmark):
+    clock = Clock()
+    benchmark._timer = clock.timer
+    benchmark(clock.tick)
+    assert benchmark.stats.stats.rounds == 2
+    assert benchmark.stats.options['target_precision'] == 0.01
+
+
+@pytest.mark.benchmark(max_time=10, min_rounds=2)
+def test_target_precision_disabled(benchmark):
+    clock = Clock()
+    benchmark._timer = clock.timer
+    benchmark(clock.tick)
+    assert benchmark.stats.stats.rounds == 10
+    assert benchmark.stats.options['target_precision'] is None
+
+
+@pytest.mark.benchmark(max_time=10, min_rounds=2, target_precision=0.000001)
+def test_target_precision_not_reached(benchmark):
+    clock = Clock()
+    benchmark._timer = clock.timer
+    durations = cycle([1, 2])
+
+    def tick():
+        clock.now += next(durations)
+
+    benchmark(tick)
+    assert benchmark.stats.stats.rounds == 10
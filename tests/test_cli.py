@@ -1,3 +1,4 @@
+import json
 import sys
 from collections import namedtuple
 from pathlib import Path
@@ -27,25 +28,30 @@ def test_help(testdir):
     result.stdout.fnmatch_lines(
         [
             'usage: py.test-benchmark *',
-            '                         {help,list,compare} ...',
+            '                         {help,list,compare,history,precision,flush} ...',
             '',
             "pytest_benchmark's management commands.",
             '',
             'option*:',
             '  -h*, --help [[]COMMAND[]]*',
             '  --storage*, -s URI*',
-            '                        file://path or elasticsearch+http[s]://host1,host2/[in',
-            '                        dex/doctype?project_name=Project] (when --benchmark-',
-            '                        save or --benchmark-autosave are used). For backwards',
-            '                        compatibility unexpected values are converted to',
-            "                        file://<value>. Default: 'file://./.benchmarks'.",
+            '                        file://path, sqlite://path/to/file.db or elasticsearch',
+            '                        +http[s]://host1,host2/[index/doctype?project_name=Pro',
+            '                        ject] (when --benchmark-save or --benchmark-autosave',
+            '                        are used). For backwards compatibility unexpected',
+            '                        values are converted to file://<value>. Default:',
+            "                        'file://./.benchmarks'.",
             '  --verbose, -v         Dump diagnostic and progress information.',
             '',
             'commands:',
-            '  {help,list,compare}',
+            '  {help,list,compare,history,precision,flush}',
             '    help                Display help and exit.',
             '    list                List saved runs.',
             '    compare             Compare saved runs.',
+            '    history             Show the stats of a benchmark in each saved run.',
+            '    precision           Measure the precision of timers and save it in the',
+            '                        cache used by --benchmark-precision-cache.',
+            '    flush               Send the spooled runs to the elasticsearch storage.',
         ]
     )
     assert result.ret == 0
@@ -94,7 +100,7 @@ def test_help_compare(testdir, args):
             '                                 [--time-unit COLUMN]',
             '                                 [--histogram [FILENAME-PREFIX]]',
             '                                 [--between COLUMNS] [--csv [FILENAME]]',
-            '                                 [-k EXPR]',
+            '                                 [-k EXPR] [--workers NUM]',
             '                                 [[]glob_or_file *[]]',
             '',
             'Compare saved runs.',
@@ -132,6 +138,8 @@ def test_help_compare(testdir, args):
             '  -k EXPR               Only show benchmarks matching the given expression.',
             "                        Uses the same syntax as pytest's -k option (e.g. 'foo",
             "                        and not bar').",
+            '  --workers NUM         Number of processes used to decode the saved runs.',
+            '                        Default: one per CPU if there are many files.',
             '',
             'examples:',
             '',
@@ -198,6 +206,21 @@ def pytest_benchmark_scale_unit(config, unit, benchmarks, best, worst, sort):
     assert result.ret == 0
 
 
+def test_hooks_fields(testdir: Testdir):
+    # the custom hooks get all the fields
+    testdir.makepyfile(
+        conftest="""
+def pytest_benchmark_group_stats(config, benchmarks, group_by):
+    benchmarks = list(benchmarks)
+    assert all('options' in bench for bench in benchmarks)
+    return [('min_rounds={}'.format(benchmarks[0]['options']['min_rounds']), benchmarks)]
+    """
+    )
+    result = testdir.run('py.test-benchmark', '--storage', STORAGE, 'compare', '0001')
+    result.stdout.fnmatch_lines(["* benchmark 'min_rounds=5': 1 tests *"])
+    assert result.ret == 0
+
+
 def test_list(testdir):
     result = testdir.run('py.test-benchmark', '--storage', STORAGE, 'list')
     assert result.stderr.lines == []
@@ -238,6 +261,21 @@ def test_list(testdir):
     assert result.ret == 0
 
 
+def test_precision(testdir):
+    result = testdir.run('py.test-benchmark', '--storage', testdir.tmpdir, 'precision', 'time.perf_counter', 'time.monotonic')
+    result.stdout.fnmatch_lines(
+        [
+            'time.perf_counter: *s',
+            'time.monotonic: *s',
+        ]
+    )
+    assert result.ret == 0
+    [cache_file] = testdir.tmpdir.join('.cache').visit('precision.json')
+    cache = json.loads(cache_file.read())
+    assert sorted(cache) == ['time.monotonic', 'time.perf_counter']
+    assert cache['time.perf_counter']['precision'] > 0
+
+
 @pytest.mark.parametrize(
     ('name', 'name_pattern_generator'),
     [
@@ -465,3 +503,43 @@ def test_compare_filter(testdir):
     # No filter shows all
     result = testdir.run('py.test-benchmark', 'compare', '--columns', 'min,max')
     result.stdout.fnmatch_lines(['*benchmark: 3 tests*'])
+
+
+def test_compare_workers(testdir):
+    results = [
+        testdir.run('py.test-benchmark', '--storage', STORAGE, 'compare', '--columns=min,max', '--workers', workers).stdout.lines
+        for workers in ('1', '3')
+    ]
+    assert results[0] == results[1]
+    LineMatcher(results[0]).fnmatch_lines(['---*--- benchmark: 30 tests ---*---'])
+    result = testdir.run('py.test-benchmark', '--storage', STORAGE, 'compare', '--workers', '0')
+    result.stderr.fnmatch_lines(['*error: argument --workers: Value for --workers must be at least 1.'])
+    assert result.ret == 2
+
+
+def test_history(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.001)
+def test_sum(benchmark):
+    benchmark(sum, range(10))
+"""
+    )
+    for _ in range(2):
+        testdir.runpytest_subprocess('--benchmark-autosave', '--benchmark-save-data', test)
+    result = testdir.run('py.test-benchmark', 'history', 'test_history.py::test_sum', '--columns=min,max,rounds')
+    result.stdout.fnmatch_lines(
+        [
+            "---*--- benchmark 'test_history.py::test_sum': 2 tests ---*---",
+            'Name (time in ?s) * Min * Max * Rounds',
+            '---*---',
+            'test_sum (0001_*) *',
+            'test_sum (0002_*) *',
+            '---*---',
+        ]
+    )
+    assert result.ret == 0
+    result = testdir.run('py.test-benchmark', 'history', 'test_history.py::test_nope')
+    result.stderr.fnmatch_lines(["*No rounds data for 'test_history.py::test_nope' in *"])
@@ -0,0 +1,270 @@
+import pytest
+
+pytest.importorskip('elasticsearch')
+
+import copy
+import json
+import logging
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import elasticsearch
+
+from pytest_benchmark.storage import elasticsearch as elasticsearch_storage
+from pytest_benchmark.storage.elasticsearch import ElasticsearchStorage
+from pytest_benchmark.utils import load_storage
+
+pytest_plugins = ('pytester',)
+
+logger = logging.getLogger(__name__)
+
+THIS = Path(__file__)
+BENCHFILE = THIS.with_name('test_storage') / '0030_5b78858eb718649a31fb93d8dc96ca2cee41a4cd_20150815_030419_uncommitted-changes.json'
+SAVE_DATA = json.loads(BENCHFILE.read_text(encoding='utf8'))
+SAVE_DATA['commit_info'] = {'id': 'abc123', 'project': 'foobar'}
+
+
+class FakeElasticsearchHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/':
+            self.reply(200, {'version': {'number': '7.17.0', 'build_flavor': 'default'}, 'tagline': 'You Know, for Search'})
+        else:
+            self.reply(404, {'error': 'not_found', 'status': 404})
+
+    do_HEAD = do_GET
+
+    def do_PUT(self):
+        if urlparse(self.path).path.endswith('/_bulk'):  # elasticsearch>=9 uses PUT
+            self.do_POST()
+            return
+        self.read_body()
+        index = urlparse(self.path).path.strip('/')
+        if index in self.server.indices:
+            self.reply(400, {'error': {'type': 'resource_already_exists_exception'}, 'status': 400})
+        else:
+            self.server.indices.add(index)
+            self.reply(200, {'acknowledged': True, 'index': index})
+
+    def do_POST(self):
+        body = self.read_body()
+        if not urlparse(self.path).path.endswith('/_bulk'):
+            self.reply(404, {'error': 'not_found', 'status': 404})
+            return
+        self.server.bulk_requests.append(body)
+        if self.server.failures:
+            self.server.failures -= 1
+            self.reply(429, {'error': {'type': 'es_rejected_execution_exception'}, 'status': 429})
+            return
+        lines = body.splitlines()
+        items = []
+        for metadata, source in zip(lines[::2], lines[1::2]):
+            ((action, metadata),) = json.loads(metadata).items()
+            self.server.documents[metadata['_id']] = json.loads(source)
+            items.append({action: {'_index': metadata['_index'], '_id': metadata['_id'], 'status': 201, 'result': 'created'}})
+        self.reply(200, {'took': 1, 'errors': False, 'items': items})
+
+
+class FakeElasticsearch(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeElasticsearchHandler)
+        self.indices = set()
+        self.documents = {}
+        self.bulk_requests = []
+        self.failures = 0  # how many of the next bulk requests get rejected
+
+    @property
+    def url(self):
+        return 'http://{}:{}'.format(*self.server_address)
+
+
+@pytest.fixture
+def server():
+    server = FakeElasticsearch()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def unreachable_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return 'http://{}:{}'.format(*sock.getsockname())
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(elasticsearch_storage, 'BACKOFF', 0)
+
+
+def make_storage(url, spool):
+    return ElasticsearchStorage([url], 'benchmark', 'benchmark', 'foobar', logger, default_machine_id='FoobarOS', spool=spool)
+
+
+def make_run(count):
+    run = copy.deepcopy(SAVE_DATA)
+    [bench] = run['benchmarks']
+    run['benchmarks'] = [dict(copy.deepcopy(bench), fullname=f'tests/test_foo.py::test_bar[{number}]') for number in range(count)]
+    return run
+
+
+def get_ids(count):
+    return sorted(f'FoobarOS_commitId_tests/test_foo.py::test_bar[{number}]' for number in range(count))
+
+
+def test_save_batches(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(elasticsearch_storage, 'BULK_SIZE', 2)
+    storage = make_storage(server.url, tmp_path / 'spool.jsonl')
+    assert server.indices == {'benchmark'}
+    storage.save(make_run(5), 'commitId')
+    storage.wait()
+    assert [body.count('\n') for body in server.bulk_requests] == [4, 4, 2]
+    assert sorted(server.documents) == get_ids(5)
+    document = server.documents['FoobarOS_commitId_tests/test_foo.py::test_bar[3]']
+    assert document['benchmark_id'] == 'FoobarOS_commitId'
+    assert document['commit_info'] == {'id': 'abc123', 'project': 'foobar'}
+    assert not (tmp_path / 'spool.jsonl').exists()
+
+
+def test_save_batches_bytes(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(elasticsearch_storage, 'BULK_BYTES', 100)
+    storage = make_storage(server.url, tmp_path / 'spool.jsonl')
+    storage.save(make_run(3), 'commitId')
+    storage.wait()
+    assert len(server.bulk_requests) == 3
+    assert sorted(server.documents) == get_ids(3)
+
+
+def test_save_retry(server, tmp_path):
+    storage = make_storage(server.url, tmp_path / 'spool.jsonl')
+    server.failures = 2
+    storage.save(make_run(2), 'commitId')
+    storage.wait()
+    assert len(server.bulk_requests) == 3
+    assert sorted(server.documents) == get_ids(2)
+    assert not (tmp_path / 'spool.jsonl').exists()
+
+
+def test_save_retry_exhausted(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(elasticsearch_storage, 'BULK_SIZE', 1)
+    storage = make_storage(server.url, tmp_path / 'spool.jsonl')
+    server.failures = 1 + elasticsearch_storage.RETRIES
+    storage.save(make_run(3), 'commitId')
+    storage.wait()
+    assert server.documents == {}
+    # the first batch failed, the rest weren't even tried
+    assert len(server.bulk_requests) == 1 + elasticsearch_storage.RETRIES
+    assert (tmp_path / 'spool.jsonl').read_text(encoding='utf8').count('\n') == 6
+
+
+def test_save_unreachable(server, unreachable_url, tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    spool = tmp_path / 'spool.jsonl'
+    storage = make_storage(unreachable_url, spool)
+    storage.save(make_run(2), 'commitId')
+    storage.save(make_run(3), 'otherId')
+    storage.wait()
+    assert 'Could not send 3 documents to' in caplog.text
+    lines = spool.read_text(encoding='utf8').splitlines()
+    assert len(lines) == 10
+    metadata = {'_index': 'benchmark', '_id': 'FoobarOS_commitId_tests/test_foo.py::test_bar[0]'}
+    if elasticsearch.VERSION[0] < 8:
+        metadata['_type'] = 'benchmark'
+    assert json.loads(lines[0]) == {'index': metadata}
+
+    storage = make_storage(server.url, spool)
+    storage.flush()
+    assert sorted(server.documents) == sorted(get_ids(2) + [doc_id.replace('commitId', 'otherId') for doc_id in get_ids(3)])
+    assert not spool.exists()
+    caplog.clear()
+    storage.flush()
+    assert 'Nothing to flush in' in caplog.text
+
+
+def test_flush_partial(server, unreachable_url, tmp_path, monkeypatch):
+    spool = tmp_path / 'spool.jsonl'
+    storage = make_storage(unreachable_url, spool)
+    storage.save(make_run(4), 'commitId')
+    storage.wait()
+    monkeypatch.setattr(elasticsearch_storage, 'BULK_SIZE', 2)
+    storage = make_storage(server.url, spool)
+    # the index exists now, thus the first request is the first batch
+    server.bulk_requests.clear()
+    server.failures = 1
+    monkeypatch.setattr(elasticsearch_storage, 'RETRIES', 0)
+    storage.flush()
+    assert server.documents == {}
+    assert spool.read_text(encoding='utf8').count('\n') == 8
+    storage.flush()
+    assert sorted(server.documents) == get_ids(4)
+    assert not spool.exists()
+
+
+def test_autosave_flush(server, unreachable_url, testdir):
+    unreachable_storage = f'elasticsearch+{unreachable_url}/benchmark/benchmark'
+    storage = f'elasticsearch+{server.url}/benchmark/benchmark'
+    testdir.makeini('[pytest]')
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_sum(benchmark):
+    benchmark(sum, range(100))
+"""
+    )
+    result = testdir.runpytest_subprocess(f'--benchmark-storage={unreachable_storage}', '--benchmark-autosave', test)
+    result.stdout.fnmatch_lines(['test_sum *'])
+    result.stderr.fnmatch_lines(['*Could not send 1 documents to *'])
+    assert result.ret == 0
+    assert testdir.tmpdir.join('.benchmarks', 'elasticsearch-spool.jsonl').exists()
+
+    # the spool is found from anywhere under the rootdir
+    with testdir.mkdir('sub').as_cwd():
+        result = testdir.run('py.test-benchmark', '--storage', storage, 'flush')
+    result.stderr.fnmatch_lines(['Saved benchmark data to *'])
+    assert result.ret == 0
+    assert [document['name'] for document in server.documents.values()] == ['test_sum']
+    assert not testdir.tmpdir.join('.benchmarks', 'elasticsearch-spool.jsonl').exists()
+
+    result = testdir.runpytest_subprocess(f'--benchmark-storage={storage}', '--benchmark-autosave', test)
+    result.stderr.fnmatch_lines(['Saved benchmark data to *'])
+    assert result.ret == 0
+    assert len(server.documents) == 2
+
+
+def test_save_spool_unwritable(unreachable_url, tmp_path, caplog):
+    (tmp_path / 'file').write_text('')
+    storage = make_storage(unreachable_url, tmp_path / 'file' / 'spool.jsonl')
+    storage.save(make_run(1), 'commitId')
+    storage.wait()
+    assert 'Could not send 1 documents to' in caplog.text
+    assert 'They are lost, could not write them in' in caplog.text
+
+
+def test_load_storage_spool(unreachable_url, tmp_path):
+    storage = load_storage(f'elasticsearch+{unreachable_url}/benchmark/benchmark', logger=logger, netrc='', rootdir=tmp_path)
+    assert storage._spool_path == tmp_path / '.benchmarks' / 'elasticsearch-spool.jsonl'
@@ -16,6 +16,7 @@ from pytest_benchmark.plugin import BenchmarkSession
 from pytest_benchmark.plugin import pytest_benchmark_compare_machine_info
 from pytest_benchmark.plugin import pytest_benchmark_generate_json
 from pytest_benchmark.plugin import pytest_benchmark_group_stats
+from pytest_benchmark.storage.elasticsearch import BenchmarkJSONSerializer
 from pytest_benchmark.storage.elasticsearch import ElasticsearchStorage
 from pytest_benchmark.storage.elasticsearch import _mask_hosts
 from pytest_benchmark.utils import parse_elasticsearch_storage
@@ -58,7 +59,12 @@ class LooseFileLike(BytesIO):
 class MockStorage(ElasticsearchStorage):
     def __init__(self):
         self._es = mock.Mock(spec=elasticsearch.Elasticsearch)
+        self._es.options.return_value = self._es
+        self._es.bulk.return_value = {'errors': False, 'items': [{'index': {'status': 201}}]}
         self._es_hosts = self._es_index = self._es_doctype = 'mocked'
+        self._serializer = BenchmarkJSONSerializer()
+        self._saving = None
+        self._index_created = True
         self.logger = logger
         self.default_machine_id = 'FoobarOS'
 
@@ -167,12 +173,15 @@ def test_handle_saving(sess, logger_output, monkeypatch):
     sess.json = None
     sess.save_data = False
     sess.handle_saving()
-    sess.storage._es.index.assert_called_with(
-        index='mocked',
-        doc_type='mocked',
-        body=ES_DATA,
-        id='FoobarOS_commitId_tests/test_normal.py::test_xfast_parametrized[0]',
-    )
+    sess.wait_saving()
+    doc_id = 'FoobarOS_commitId_tests/test_normal.py::test_xfast_parametrized[0]'
+    metadata = {'index': {'_index': 'mocked', '_id': doc_id}}
+    if elasticsearch.VERSION[0] < 8:
+        metadata['index']['_type'] = 'mocked'
+    sess.storage._es.bulk.assert_called_once()
+    body = sess.storage._es.bulk.call_args.kwargs['body']
+    assert [json.loads(line) for line in body.splitlines()] == [metadata, ES_DATA]
+    assert 'Saved benchmark data to' in logger_output.getvalue()
 
 
 def test_parse_with_no_creds():
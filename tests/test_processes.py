@@ -0,0 +1,97 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+pytest_plugins = ('pytester',)
+
+pytestmark = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='fork is not available')
+
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_processes(benchmark):
+    def stuff(foo, bar=123):
+        return foo, bar
+
+    assert benchmark.processes(stuff, 1, bar=2, workers=2) == (1, 2)
+    processes = benchmark.stats.processes
+    assert processes['workers'] == 2
+    assert processes['aggregate_ops'] > 0
+    assert len(processes['per_worker']) == 2
+    assert benchmark.stats.stats.rounds == sum(worker['rounds'] for worker in processes['per_worker'])
+
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_processes_error(benchmark):
+    pid = os.getpid()
+
+    def stuff():
+        if os.getpid() != pid:
+            raise ZeroDivisionError
+
+    with pytest.raises(RuntimeError, match='ZeroDivisionError'):
+        benchmark.processes(stuff, workers=2)
+
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_processes_died(benchmark):
+    pid = os.getpid()
+    # both workers get to stuff before any of them dies
+    together = multiprocessing.get_context('fork').Barrier(2)
+
+    def stuff():
+        if os.getpid() != pid:
+            together.wait()
+            os._exit(3)
+
+    with pytest.raises(RuntimeError, match=r'A `benchmark\.processes` worker has died \(exit codes: 3, 3\)\.'):
+        benchmark.processes(stuff, workers=2)
+
+
+def test_processes_last_round(testdir):
+    # the workers exit right after the last round, while the main process might still be returning from the barrier
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.parametrize('number', range(50))
+@pytest.mark.benchmark(max_time=0.0001, min_rounds=1)
+def test_int(benchmark, number):
+    benchmark.processes(int, workers=4)
+"""
+    )
+    result = testdir.runpytest_subprocess(test)
+    result.stdout.fnmatch_lines(['* 50 passed*'])
+
+
+def test_processes_bad_workers(benchmark):
+    with pytest.raises(ValueError, match=r'Must have positive int for `workers`\.'):
+        benchmark.processes(int, workers=0)
+
+
+def test_processes_table(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_sum(benchmark):
+    benchmark.processes(sum, range(100), workers=2)
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-json=out.json', test)
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Rounds  Iterations  Workers  Agg. ops/s',
+            '------*',
+            'test_sum * 2 * ?*.??',
+            '------*',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    [bench] = data['benchmarks']
+    assert bench['stats']['workers'] == 2
+    assert len(bench['stats']['per_worker']) == 2
+    assert bench['stats']['per_worker'][0]['rounds'] * 2 == bench['stats']['rounds']
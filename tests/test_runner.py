@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+from pytest_benchmark.runner import make_empty_measure
+from pytest_benchmark.runner import make_measure
+from pytest_benchmark.stats import Metadata
+
+
+def counter():
+    t = 0
+
+    def timer():
+        nonlocal t
+        t += 1
+        return t
+
+    return timer
+
+
+@pytest.mark.parametrize('unroll', [1, 3, 10])
+@pytest.mark.parametrize('loops', [1, 2, 9, 10, 11, 101])
+def test_calls(unroll, loops):
+    calls = []
+    measure = make_measure(calls.append, (1,), {}, unroll=unroll)
+    assert measure(range(loops), counter()) == 1
+    assert calls == [1] * loops
+
+
+@pytest.mark.parametrize(
+    ('args', 'kwargs'),
+    [
+        ((), {}),
+        ((1, 2), {}),
+        ((), {'foo': 3}),
+        ((1, 2), {'foo': 3, 'bar': 4}),
+        ((1,), {'not-an-identifier': 5, 'foo': 3}),
+        ((1,), {'lambda': 6}),
+    ],
+)
+def test_arguments(args, kwargs):
+    calls = []
+
+    def target(*args, **kwargs):
+        calls.append((args, kwargs))
+        return 'result'
+
+    measure = make_measure(target, args, kwargs, unroll=2)
+    assert measure(range(3), counter()) == 1
+    assert measure(None, counter()) == (1, 'result')
+    assert calls == [(args, kwargs)] * 4
+
+
+def test_async():
+    import asyncio  # noqa: PLC0415
+
+    calls = []
+
+    async def target(foo):
+        calls.append(foo)
+        return 'result'
+
+    measure = make_measure(target, (), {'foo': 1}, unroll=4, is_async=True)
+    assert asyncio.run(measure(range(5), counter())) == 1
+    assert asyncio.run(measure(None, counter())) == (1, 'result')
+    assert calls == [1] * 6
+
+
+@pytest.mark.benchmark(unroll=10)
+def test_unroll_marker(benchmark):
+    calls = []
+    benchmark(calls.append, 1)
+    assert benchmark.stats.options['unroll'] == 10
+    assert len(calls) >= benchmark.stats.iterations * benchmark.stats.stats.rounds
+
+
+def test_empty_measure():
+    measure = make_empty_measure(unroll=3)
+    assert measure(range(10), counter()) == 1
+    assert measure(None, counter()) == (1, None)
+
+
+def test_overhead(benchmark):
+    benchmark(int)
+    overhead = benchmark.stats.options['overhead']
+    assert overhead > 0
+    assert benchmark._overheads[benchmark._timer, benchmark.stats.iterations, 1] == overhead
+    assert benchmark.stats.options['subtract_overhead'] is False
+    assert benchmark.stats.overhead == 0
+
+
+@pytest.mark.benchmark(subtract_overhead=True)
+def test_subtract_overhead(benchmark):
+    benchmark(int)
+    assert benchmark.stats.overhead == benchmark.stats.options['overhead']
+    assert benchmark.stats.options['subtract_overhead'] is True
+    assert benchmark.stats.stats.min >= 0
+
+
+def test_subtract_overhead_update():
+    fixture = SimpleNamespace(name='test', fullname='test', group=None, param=None, params=None, extra_info={}, cprofile_stats=None)
+    stats = Metadata(fixture, iterations=10, options={}, overhead=0.5)
+    stats.update(2.5)
+    stats.update(0.25)
+    assert stats.stats.data.tolist() == [0.2, 0]
@@ -0,0 +1,154 @@
+import copy
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from pathlib import PurePosixPath
+
+import pytest
+
+from pytest_benchmark.stats import normalize_stats
+from pytest_benchmark.storage.sqlite import SQLiteStorage
+from pytest_benchmark.utils import load_storage
+
+pytest_plugins = ('pytester',)
+
+THIS = Path(__file__)
+STORAGE = THIS.with_name('test_storage')
+
+JSON_DATA = json.loads(next(STORAGE.glob('0030_*.json')).read_text(encoding='utf8'))
+JSON_DATA['machine_info'] = {'foo': 'bar'}
+JSON_DATA['commit_info'] = {'id': 'abc123', 'project': 'foobar'}
+JSON_DATA['benchmarks'][0]['stats']['data'] = [0.5, 0.25, 1e-07]
+for bench in JSON_DATA['benchmarks']:
+    normalize_stats(bench['stats'])
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteStorage(tmp_path / 'bench.db', logger=logger, default_machine_id='FoobarOS')
+
+
+def test_load_storage(tmp_path):
+    storage = load_storage(f'sqlite://{tmp_path}/foo/bench.db', logger=logger, netrc='')
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.location == str(tmp_path / 'foo' / 'bench.db')
+    assert (tmp_path / 'foo' / 'bench.db').exists()
+
+
+def test_save_load(storage):
+    storage.save(JSON_DATA, 'foo')
+    storage.save(JSON_DATA, 'bar')
+    assert storage.query() == [PurePosixPath('FoobarOS/0001_foo'), PurePosixPath('FoobarOS/0002_bar')]
+    [(path, data)] = storage.load('0001')
+    assert path == PurePosixPath('FoobarOS/0001_foo')
+    assert data == JSON_DATA
+    [(path, data)] = storage.load_latest()
+    assert path == PurePosixPath('FoobarOS/0002_bar')
+    assert data['benchmarks'][0]['stats']['data'] == [0.5, 0.25, 1e-07]
+
+
+def test_save_no_data(storage):
+    json_data = copy.deepcopy(JSON_DATA)
+    del json_data['benchmarks'][0]['stats']['data']
+    storage.save(json_data, 'foo')
+    [(_, data)] = storage.load()
+    assert data == json_data
+
+
+def test_load_benchmarks_fields(storage):
+    storage.save(JSON_DATA, 'foo')
+    [bench, *_] = storage.load_benchmarks(fields={'name', 'min'})
+    assert bench.keys() == {'name', 'min', 'path', 'source'}
+    [bench, *_] = storage.load_benchmarks(fields={'name', 'data'})
+    assert bench['data'] == [0.5, 0.25, 1e-07]
+
+
+def test_schema(storage):
+    storage.save(JSON_DATA, 'foo')
+    storage.save(JSON_DATA, 'bar')
+    connection = sqlite3.connect(storage.location)
+    assert connection.execute('SELECT COUNT(*) FROM commits').fetchone() == (1,)
+    assert connection.execute('SELECT num, name FROM runs ORDER BY num').fetchall() == [(1, 'foo'), (2, 'bar')]
+    [(blob,)] = connection.execute('SELECT data FROM benchmarks LIMIT 1').fetchall()
+    assert len(blob) == 3 * 8
+
+
+def test_globs(tmp_path):
+    foo = SQLiteStorage(tmp_path / 'bench.db', logger=logger, default_machine_id='FooOS')
+    bar = SQLiteStorage(tmp_path / 'bench.db', logger=logger, default_machine_id='BarOS')
+    foo.save(JSON_DATA, 'first')
+    foo.save(JSON_DATA, 'second')
+    bar.save(JSON_DATA, 'first')
+    assert foo.query() == [PurePosixPath('FooOS/0001_first'), PurePosixPath('FooOS/0002_second')]
+    assert bar.query() == [PurePosixPath('BarOS/0001_first')]
+    assert foo.query('*/0001') == [PurePosixPath('BarOS/0001_first'), PurePosixPath('FooOS/0001_first')]
+    assert foo.query('Foo*/*_f*') == [PurePosixPath('FooOS/0001_first')]
+    assert foo.query('0002', 'BarOS/*') == [PurePosixPath('BarOS/0001_first'), PurePosixPath('FooOS/0002_second')]
+    assert foo.query('0003') == []
+    assert [path for path, _ in foo.load_latest()] == [PurePosixPath('FooOS/0002_second')]
+    with pytest.raises(ValueError, match=r"'a/b/c' isn't an acceptable glob\."):
+        foo.query('a/b/c')
+
+
+def test_load_latest_empty(storage):
+    assert storage.load_latest() == []
+
+
+def test_cache(tmp_path):
+    foo = SQLiteStorage(tmp_path / 'bench.db', logger=logger, default_machine_id='FooOS')
+    bar = SQLiteStorage(tmp_path / 'bench.db', logger=logger, default_machine_id='BarOS')
+    assert foo.load_cache('calibration') == {}
+    foo.save_cache('calibration', {'foo': 1})
+    foo.save_cache('calibration', {'foo': 2})
+    assert foo.load_cache('calibration') == {'foo': 2}
+    assert bar.load_cache('calibration') == {}
+
+
+def test_close(storage):
+    storage.save(JSON_DATA, 'foo')
+    storage.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        storage.query()
+
+
+def test_autosave_compare(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_sum(benchmark):
+    benchmark(sum, range(100))
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-storage=sqlite://bench.db', '--benchmark-autosave', '--benchmark-save-data', test)
+    result.stderr.fnmatch_lines(['Saved benchmark data in: *bench.db as *0001_*'])
+    assert result.ret == 0
+    result = testdir.runpytest_subprocess(
+        '--benchmark-storage=sqlite://bench.db', '--benchmark-compare', '--benchmark-compare-fail=mean:1000%', test
+    )
+    result.stdout.fnmatch_lines(['test_sum (0001_*)  *'])
+    result.stdout.fnmatch_lines(['test_sum (NOW)  *'])
+    assert result.ret == 0
+
+    result = testdir.run('py.test-benchmark', '--storage', 'sqlite://bench.db', 'list')
+    result.stdout.fnmatch_lines(['*/0001_*'])
+    assert result.ret == 0
+    result = testdir.run('py.test-benchmark', '--storage', 'sqlite://bench.db', 'compare', '0001', '--columns', 'min,max')
+    result.stdout.fnmatch_lines(['Name (time in ?s) * Min * Max', '---*', 'test_sum * ?*.???? * ?*.????'])
+    assert result.ret == 0
+
+
+def test_load_data(storage):
+    storage.save(JSON_DATA, 'foo')
+    json_data = copy.deepcopy(JSON_DATA)
+    del json_data['benchmarks'][0]['stats']['data']
+    storage.save(json_data, 'bar')
+    [(path, iterations, data)] = storage.load_data(JSON_DATA['benchmarks'][0]['fullname'])
+    assert path == PurePosixPath('FoobarOS/0001_foo')
+    assert iterations == JSON_DATA['benchmarks'][0]['stats']['iterations']
+    assert list(data) == [0.5, 0.25, 1e-07]
+    assert list(storage.load_data('nope')) == []
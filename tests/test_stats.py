@@ -1,6 +1,23 @@
+import gc
+import random
+from types import SimpleNamespace
+
 import pytest
 
+from pytest_benchmark.fixture import GCRecorder
+from pytest_benchmark.fixture import ResourceRecorder
+from pytest_benchmark.stats import GCStats
+from pytest_benchmark.stats import MemoryStats
+from pytest_benchmark.stats import Metadata
+from pytest_benchmark.stats import ResourceStats
+from pytest_benchmark.stats import RunningStats
 from pytest_benchmark.stats import Stats
+from pytest_benchmark.stats import StreamingStats
+from pytest_benchmark.stats import compute_bootstrap
+from pytest_benchmark.stats import incomplete_beta
+from pytest_benchmark.stats import mann_whitney_u_test
+from pytest_benchmark.stats import t_critical_95
+from pytest_benchmark.stats import welch_t_test
 
 
 def test_1():
@@ -57,7 +74,9 @@ def test_length(length):
     assert stats.as_dict()
 
 
-def test_iqr():
+def test_iqr(monkeypatch):
+    # the pure Python path must match exactly, the NumPy one is checked against it in test_vectorized_stats
+    monkeypatch.setattr('pytest_benchmark.stats.numpy', None)
     stats = Stats()
     for i in 6, 7, 15, 36, 39, 40, 41, 42, 43, 47, 49:
         stats.update(i)
@@ -245,3 +264,261 @@ def test_ops():
     stats.update(0)
     assert stats.mean == 0
     assert stats.ops == 0
+
+
+def test_running_stats():
+    stats = Stats()
+    running_stats = RunningStats()
+    for i in 4.0, 36.0, 45.0, 50.0, 75.0:
+        stats.update(i)
+        running_stats.update(i)
+    assert running_stats.count == stats.rounds
+    assert running_stats.mean == pytest.approx(stats.mean)
+    assert (running_stats.m2 / (running_stats.count - 1)) ** 0.5 == pytest.approx(stats.stddev)
+    assert running_stats.relative_precision == pytest.approx(2.776 * stats.stddev / 5**0.5 / stats.mean)
+
+
+@pytest.mark.parametrize('rounds', [1, 2, 5, 1000])
+def test_streaming_stats(rounds):
+    rng = random.Random(rounds)  # noqa: S311 # seeded, the timings just need to be reproducible
+    stats = Stats()
+    streaming_stats = StreamingStats()
+    for _ in range(rounds):
+        duration = rng.lognormvariate(-10, 0.5) if rng.random() > 0.01 else 0.0
+        stats.update(duration)
+        streaming_stats.update(duration)
+    for field in 'min', 'max', 'total', 'rounds', 'ops', 'mean', 'stddev':
+        assert getattr(streaming_stats, field) == pytest.approx(getattr(stats, field)), field
+    for field in 'median', 'q1', 'q3', 'ld15iqr', 'hd15iqr':
+        assert getattr(streaming_stats, field) == pytest.approx(getattr(stats, field), rel=StreamingStats.relative_accuracy), field
+    assert streaming_stats.iqr_outliers == pytest.approx(stats.iqr_outliers, abs=rounds // 50 + 1)
+    assert streaming_stats.stddev_outliers == pytest.approx(stats.stddev_outliers, abs=rounds // 50 + 1)
+    assert len(streaming_stats.buckets) < 300
+
+
+def test_streaming_stats_accuracy():
+    streaming_stats = StreamingStats()
+    for duration in 1.0, 2.0, 3.0, 4.0, 1000.0, 0.001:
+        streaming_stats.update(duration)
+    assert streaming_stats.median == pytest.approx(2.5, rel=StreamingStats.relative_accuracy)
+    assert streaming_stats.q1 == pytest.approx(1.0, rel=StreamingStats.relative_accuracy)
+    assert streaming_stats.q3 == pytest.approx(4.0, rel=StreamingStats.relative_accuracy)
+    assert streaming_stats.min == 0.001
+    assert streaming_stats.max == 1000.0
+
+
+def test_streaming_stats_metadata():
+    fixture = SimpleNamespace(name='test', fullname='test', group=None, param=None, params=None, extra_info={}, cprofile_stats=None)
+    bench = Metadata(fixture, iterations=2, options={'streaming_stats': True})
+    for duration in 1.0, 4.0, 3.0, 2.0:
+        assert bench.update(duration) == duration / 2
+    assert isinstance(bench.stats, StreamingStats)
+    data = bench.as_dict()
+    assert 'data' not in data['stats']
+    assert data['stats']['rounds'] == 4
+    restored = Metadata.from_dict(data)
+    assert restored.stats.as_dict() == bench.stats.as_dict()
+
+
+@pytest.mark.parametrize('rounds', [1, 2, 3, 4, 5, 1000])
+def test_vectorized_stats(rounds, monkeypatch):
+    pytest.importorskip('numpy')
+    rng = random.Random(rounds)  # noqa: S311 # seeded, the timings just need to be reproducible
+    stats = Stats()
+    for _ in range(rounds):
+        stats.update(rng.lognormvariate(-10, 1))
+    vectorized_stats = Stats()
+    vectorized_stats.data = stats.data
+    vectorized = vectorized_stats.as_dict()
+    monkeypatch.setattr('pytest_benchmark.stats.numpy', None)
+    assert vectorized.keys() == stats.as_dict().keys()
+    for field, value in stats.as_dict().items():
+        assert vectorized[field] == pytest.approx(value, rel=1e-9), field
+    for field in 'min', 'max', 'rounds', 'median', 'q1', 'q3', 'ld15iqr', 'hd15iqr', 'outliers':
+        assert vectorized[field] == getattr(stats, field), field
+
+
+def test_bootstrap():
+    pytest.importorskip('numpy')
+    rng = random.Random(0)  # noqa: S311 # seeded, the timings just need to be reproducible
+    stats = Stats()
+    for _ in range(1000):
+        stats.update(rng.lognormvariate(-10, 0.5))
+    result = compute_bootstrap(stats.data, 200)
+    assert result == compute_bootstrap(stats.data, 200)
+    assert result == compute_bootstrap(stats.data, 200, chunk_size=1000)
+    assert result['bootstrap']['resamples'] == 200
+    for field in 'mean', 'median', 'ops':
+        low, high = result['bootstrap'][field]
+        assert low < getattr(stats, field) < high
+        assert 0 < result[f'{field}_ci'] < 0.1
+    assert result['ops_ci'] == pytest.approx(result['mean_ci'], rel=0.01)
+
+
+def test_bootstrap_metadata():
+    pytest.importorskip('numpy')
+    fixture = SimpleNamespace(name='test', fullname='test', group=None, param=None, params=None, extra_info={}, cprofile_stats=None)
+    bench = Metadata(fixture, iterations=1, options={'bootstrap': 100})
+    bench.update(1.0)
+    assert bench.bootstrap is None
+    bench = Metadata(fixture, iterations=1, options={'bootstrap': 100})
+    for duration in 1.0, 4.0, 3.0, 2.0:
+        bench.update(duration)
+    data = bench.as_dict()
+    assert data['stats']['bootstrap']['confidence'] == 0.95
+    assert data['stats']['mean_ci'] > 0
+    assert Metadata.from_dict(data).as_dict() == data
+
+
+def test_incomplete_beta():
+    assert incomplete_beta(0.3, 2, 3) == pytest.approx(0.3483)
+    assert incomplete_beta(0.9, 0.5, 0.5) == pytest.approx(0.7951672353008665)
+    assert incomplete_beta(0, 2, 3) == 0
+    assert incomplete_beta(1, 2, 3) == 1
+
+
+def test_welch_t_test():
+    # reference values from scipy.stats.ttest_ind(equal_var=False, alternative='greater')
+    current = [10.2, 11.5, 9.8, 12.1, 10.9, 11.3]
+    compared = [9.1, 10.4, 9.9, 10.1, 9.5]
+    p_value, effect_size = welch_t_test(current, compared)
+    assert p_value == pytest.approx(0.011115937568982952, rel=1e-9)
+    assert effect_size > 1
+    p_value, effect_size = welch_t_test(compared, current)
+    assert p_value == pytest.approx(1 - 0.011115937568982952, rel=1e-9)
+    assert effect_size < -1
+    assert welch_t_test([1, 2, 3], [1, 2, 3]) == (0.5, 0.0)
+
+
+def test_mann_whitney_u_test():
+    # reference values from scipy.stats.mannwhitneyu(alternative='greater', method='asymptotic')
+    current = [10.2, 11.5, 9.8, 12.1, 10.9, 11.3, 9.9]
+    compared = [9.1, 10.4, 9.9, 10.1, 9.5]
+    p_value, effect_size = mann_whitney_u_test(current, compared)
+    assert p_value == pytest.approx(0.0438010445803302, rel=1e-9)
+    assert effect_size == pytest.approx(2 * 28.5 / 35 - 1)
+    assert mann_whitney_u_test([1, 1], [1, 1]) == (1.0, 0.0)
+
+
+def test_slots():
+    stats = Stats()
+    assert not hasattr(stats, '__dict__')
+    stats.update(1.0)
+    stats.update(3.0)
+    assert stats.mean == 2.0
+    with pytest.raises(AttributeError):
+        stats.foo = 1
+    fixture = SimpleNamespace(name='test', fullname='test', group=None, param=None, params=None, extra_info={}, cprofile_stats=None)
+    assert not hasattr(Metadata(fixture, iterations=1, options={}), '__dict__')
+
+
+def test_metadata_detach():
+    fixture = SimpleNamespace(
+        name='test', fullname='test', group=None, param=None, params=None, extra_info={}, cprofile_stats=None, has_error=False
+    )
+    bench = Metadata(fixture, iterations=1, options={})
+    bench.update(1.0)
+    fixture.has_error = True
+    data = bench.as_dict()
+    bench.detach()
+    assert bench.fixture is None
+    assert bench.has_error is True
+    assert bench.as_dict() == data
+    bench.detach()
+    assert bench.has_error is True
+
+
+def test_running_stats_single():
+    running_stats = RunningStats()
+    assert running_stats.relative_precision == float('inf')
+    running_stats.update(1.0)
+    assert running_stats.relative_precision == float('inf')
+    running_stats.update(1.0)
+    assert running_stats.relative_precision == 0
+
+
+def test_t_critical_95():
+    assert t_critical_95(1) == 12.706
+    assert t_critical_95(30) == 2.042
+    assert t_critical_95(1000) == 1.96
+
+
+def test_memory_stats():
+    memory = MemoryStats()
+    assert not memory
+    memory.update(100, 10, 2)
+    memory.update(300, 30, 1)
+    memory.update(200, 20, 3)
+    memory.update(400, 40, 4)
+    assert memory
+    assert memory.as_dict() == {'mem_peak': 200, 'mem_net': 20, 'mem_blocks': 2}
+
+
+def test_gc_stats():
+    fixture = SimpleNamespace(name='test', fullname='test', group=None, param=None, params=None, extra_info={}, cprofile_stats=None)
+    bench = Metadata(fixture, iterations=2, options={})
+    bench.gc = GCStats()
+    for duration, collections, gc_duration in [
+        (1.0, [0, 0, 0], 0),
+        (4.0, [2, 1, 0], 2.0),
+        (3.0, [0, 0, 0], 0),
+        (2.0, [1, 0, 0], 1.0),
+    ]:
+        bench.update(duration)
+        bench.gc.update(collections, gc_duration)
+    assert bench.gc_free_stats.data.tolist() == [0.5, 1.5]
+    stats = bench.as_dict()['stats']
+    assert stats['gc_collections'] == [3, 1, 0]
+    assert stats['gc_time'] == 3.0
+    assert stats['gc_rounds'] == 2
+    assert stats['gc_share'] == 0.3
+    assert stats['gc_free']['rounds'] == 2
+    assert stats['gc_free']['max'] == 1.5
+    assert stats['gc_data'][1] == [2, 1, 0, 2.0]
+
+
+def test_gc_recorder():
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with GCRecorder(lambda: 0) as recorder:
+            gc.collect(1)
+            gc.collect(2)
+        gc.collect()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    assert recorder.collections == [0, 1, 1]
+    assert recorder not in gc.callbacks
+
+
+def test_resource_stats():
+    resources = ResourceStats()
+    resources.update([0.5, 0.25, 1, 0, 10, 0, 100, 0])
+    resources.update([0.5, 0.25, 2, 1, 0, 2, 0, 300])
+    assert resources.as_dict(iterations=2, total=2.0) == {
+        'os_user_time': 0.25,
+        'os_system_time': 0.125,
+        'os_voluntary_switches': 0.75,
+        'os_involuntary_switches': 0.25,
+        'os_minor_faults': 2.5,
+        'os_major_faults': 0.5,
+        'os_read_bytes': 25.0,
+        'os_write_bytes': 75.0,
+        'cpu_share': 0.75,
+        'ctx_switches': 1.0,
+        'page_faults': 3.0,
+        'io_bytes': 100.0,
+    }
+
+
+def test_resource_recorder(tmp_path):
+    if not ResourceRecorder.io_path.exists():
+        pytest.skip('/proc/self/io is not available')
+    path = tmp_path / 'data'
+    with ResourceRecorder() as recorder:
+        path.write_bytes(b'x' * 12345)
+        path.read_bytes()
+    assert len(recorder.usage) == len(ResourceStats.fields)
+    assert recorder.usage[-1] == 12345
+    assert recorder.usage[-2] == 12345
@@ -1,7 +1,9 @@
 # flake8: noqa
+import copy
 import json
 import logging
 import os
+import shutil
 import sys
 from io import BytesIO
 from io import StringIO
@@ -18,11 +20,13 @@ from pytest_benchmark.plugin import pytest_benchmark_scale_unit
 from pytest_benchmark.session import PerformanceRegression
 from pytest_benchmark.stats import normalize_stats
 from pytest_benchmark.storage.file import FileStorage
+from pytest_benchmark.storage.file import read_file
 from pytest_benchmark.utils import NAME_FORMATTERS
 from pytest_benchmark.utils import DifferenceRegressionCheck
 from pathlib import Path
 from pytest_benchmark.utils import PercentageRegressionCheck
 from pytest_benchmark.utils import get_machine_id
+from pytest_benchmark.utils import short_filename
 
 pytest_plugins = 'pytester'
 
@@ -387,6 +391,20 @@ def test_compare_2(sess, LineMatcher):
     )
 
 
+def test_compare_scheduling(sess):
+    output = make_logger(sess)
+    pytest_benchmark_compare_machine_info(
+        config=sess.config,
+        benchmarksession=sess,
+        machine_info={'foo': 'bar', 'scheduling': {'cpu_affinity': [3]}},
+        compared_benchmark={'machine_info': {'foo': 'bar'}},
+    )
+    assert output.getvalue().splitlines() == [
+        'Benchmark machine_info is different. Current: {"foo": "bar", "scheduling": {"cpu_affinity": [3]}} VS saved: {"foo": "bar"} '
+        '(location: tests/test_storage).',
+    ]
+
+
 @freeze_time('2015-08-15T00:04:18.687119')
 def test_save_json(sess, tmpdir, monkeypatch):
     json_path = Path(str(tmpdir)) / 'output.json'
@@ -463,3 +481,193 @@ def test_autosave(sess, tmpdir, monkeypatch):
     files = list(Path(str(tmpdir)).rglob('*.json'))
     assert len(files) == 1
     assert json.loads(files[0].read_text(encoding='utf8')) == JSON_DATA
+
+
+def test_index(tmp_path):
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    storage.save(JSON_DATA, 'foo')
+    storage.save(JSON_DATA, 'bar')
+    index = [json.loads(line) for line in (tmp_path / 'FoobarOS' / '.index.jsonl').read_text().splitlines()]
+    assert [(entry['file'], entry['num'], entry['name']) for entry in index] == [('0001_foo.json', 1, 'foo'), ('0002_bar.json', 2, 'bar')]
+    assert index[0]['commit'] is None
+    assert index[0]['benchmarks'] == [bench['fullname'] for bench in JSON_DATA['benchmarks']]
+    start, end = index[0]['offsets'][0]
+    assert json.loads((tmp_path / 'FoobarOS' / '0001_foo.json').read_bytes()[start:end]) == JSON_DATA['benchmarks'][0]
+
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    benchmarks = list(storage.load_benchmarks('0002'))
+    assert storage._cache == {}
+    assert [bench.pop('path') for bench in benchmarks] == ['FoobarOS/0002_bar.json']
+    assert [{**bench.pop('stats'), **bench} for bench in copy.deepcopy(JSON_DATA['benchmarks'])] == [
+        {key: value for key, value in bench.items() if key != 'source'} for bench in benchmarks
+    ]
+
+
+def test_index_stale(tmp_path):
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    storage.save(JSON_DATA, 'foo')
+    (tmp_path / 'FoobarOS' / '0001_foo.json').write_text(json.dumps(JSON_DATA))
+    (tmp_path / 'FoobarOS' / '0005_copied.json').write_text(json.dumps(JSON_DATA, indent=4))
+    assert storage._get_index_entry(tmp_path / 'FoobarOS' / '0001_foo.json') is None
+    assert [bench['name'] for bench in storage.load_benchmarks('0001')] == [bench['name'] for bench in JSON_DATA['benchmarks']]
+
+    storage.save(JSON_DATA, 'bar')
+    index = [json.loads(line) for line in (tmp_path / 'FoobarOS' / '.index.jsonl').read_text().splitlines()]
+    assert sorted((entry['file'], entry['offsets'] is None) for entry in index) == [
+        ('0001_foo.json', True),
+        ('0005_copied.json', False),
+        ('0006_bar.json', False),
+    ]
+
+
+def test_index_crlf(tmp_path):
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    (tmp_path / 'FoobarOS').mkdir()
+    (tmp_path / 'FoobarOS' / '0001_crlf.json').write_bytes(json.dumps(JSON_DATA, indent=4).replace('\n', '\r\n').encode())
+    storage.save(JSON_DATA, 'foo')
+    index = {entry['file']: entry for entry in map(json.loads, (tmp_path / 'FoobarOS' / '.index.jsonl').read_text().splitlines())}
+    assert index['0001_crlf.json']['offsets'] is None
+    names = [bench['name'] for bench in JSON_DATA['benchmarks']]
+    assert [bench['name'] for bench in storage.load_benchmarks('0001')] == names
+
+
+def test_index_bad_offsets(tmp_path):
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    storage.save(JSON_DATA, 'foo')
+    index_file = tmp_path / 'FoobarOS' / '.index.jsonl'
+    [entry] = map(json.loads, index_file.read_text().splitlines())
+    entry['offsets'] = [(start + 3, end + 3) for start, end in entry['offsets']]
+    index_file.write_text(f'{json.dumps(entry)}\n')
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    names = [bench['name'] for bench in JSON_DATA['benchmarks']]
+    assert [bench['name'] for bench in storage.load_benchmarks('0001')] == names
+
+
+def test_cache(tmp_path):
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    assert storage.load_cache('calibration') == {}
+    assert not (tmp_path / '.cache').exists()
+    storage.save_cache('calibration', {'foo': 1})
+    storage.save_cache('calibration', {'foo': 2})
+    assert storage.load_cache('calibration') == {'foo': 2}
+    assert [path.name for path in (tmp_path / '.cache' / 'FoobarOS').iterdir()] == ['calibration.json']
+
+
+def test_load_benchmarks_fields():
+    storage = FileStorage(str(STORAGE), logger=logging.getLogger(__name__))
+    benchmarks = list(storage.load_benchmarks('*/00[12]*', fields={'name', 'min'}))
+    assert len(benchmarks) == 20
+    assert benchmarks[0] == {
+        'name': 'test_xfast_parametrized[0]',
+        'min': benchmarks[0]['min'],
+        'path': benchmarks[0]['path'],
+        'source': '0010_5b78858eb718649a31fb93d8dc96ca2cee41a4cd_20150815_030233_uncommitted-changes',
+    }
+    assert list(storage.load_benchmarks('*/00[12]*', fields={'name', 'min'}, workers=3)) == benchmarks
+    assert storage._cache == {}
+
+
+@pytest.mark.parametrize(('compression', 'suffix'), [('gzip', '.json.gz'), ('lzma', '.json.xz')])
+def test_compression(tmp_path, compression, suffix):
+    json_data = copy.deepcopy(JSON_DATA)
+    json_data['benchmarks'][0]['stats']['data'] = [0.5, 0.25, 1e-07]
+    FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS').save(json_data, 'foo')
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS', compression=compression)
+    storage.save(json_data, 'bar')
+    assert json_data['benchmarks'][0]['stats']['data'] == [0.5, 0.25, 1e-07]
+    assert storage.query() == [tmp_path / 'FoobarOS' / '0001_foo.json', tmp_path / 'FoobarOS' / f'0002_bar{suffix}']
+    saved = json.loads(read_file(tmp_path / 'FoobarOS' / f'0002_bar{suffix}'))
+    assert saved['benchmarks'][0]['stats']['data'] == {'float64': 'AAAAAAAA4D8AAAAAAADQP0ivvJry13o+'}
+
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    [(path, data)] = storage.load('0002')
+    assert path == Path('FoobarOS', f'0002_bar{suffix}')
+    assert data == json_data
+    [bench] = storage.load_benchmarks('0002')
+    assert bench['data'] == [0.5, 0.25, 1e-07]
+    assert short_filename(path) == 'FoobarOS/0002_bar'
+    storage.save(json_data, 'baz')
+    index = [json.loads(line) for line in (tmp_path / 'FoobarOS' / '.index.jsonl').read_text().splitlines()]
+    assert [(entry['num'], entry['name'], entry['offsets'] is None) for entry in index] == [
+        (1, 'foo', False),
+        (2, 'bar', True),
+        (3, 'baz', False),
+    ]
+
+
+def test_compression_autosave(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.001)
+def test_sum(benchmark):
+    benchmark(sum, range(10))
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-autosave', '--benchmark-save-data', '--benchmark-compression=lzma', test)
+    result.stderr.fnmatch_lines(['Saved benchmark data in: *0001_*.json.xz'])
+    result = testdir.runpytest_subprocess('--benchmark-compare', '--benchmark-compare-fail=mean:1000%', test)
+    result.stderr.fnmatch_lines(['Comparing against benchmarks from: *0001_*.json.xz'])
+    result.stdout.fnmatch_lines(['test_sum (0001_*)  *'])
+    assert result.ret == 0
+
+
+def test_load_data_after_torn_write(tmp_path):
+    json_data = copy.deepcopy(JSON_DATA)
+    fullname = json_data['benchmarks'][0]['fullname']
+    json_data['benchmarks'][0]['stats']['data'] = [0.5, 0.25]
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    storage.save(json_data, 'foo')
+    [data_file] = (tmp_path / 'FoobarOS' / '.data').glob('*.f8')
+    with data_file.open('ab') as fh:
+        fh.write(b'\1' * 12)
+    json_data['benchmarks'][0]['stats']['data'] = [1.0, 2.0, 3.0]
+    storage.save(json_data, 'bar')
+
+    assert data_file.stat().st_size == 6 * 8  # the whole double from the torn write is just unindexed
+    runs = list(storage.load_data(fullname))
+    assert [list(data) for _, _, data in runs] == [[0.5, 0.25], [1.0, 2.0, 3.0]]
+    assert all(isinstance(data, memoryview) for _, _, data in runs)
+
+
+def test_load_data(tmp_path):
+    json_data = copy.deepcopy(JSON_DATA)
+    fullname = json_data['benchmarks'][0]['fullname']
+    json_data['benchmarks'][0]['stats']['data'] = [0.5, 0.25]
+    storage = FileStorage(tmp_path, logger=logging.getLogger(__name__), default_machine_id='FoobarOS')
+    storage.save(json_data, 'foo')
+    json_data['benchmarks'][0]['stats']['data'] = [1.0, 2.0, 3.0]
+    storage.compression = 'gzip'
+    storage.save(json_data, 'bar')
+    del json_data['benchmarks'][0]['stats']['data']
+    storage.save(json_data, 'baz')
+
+    iterations = json_data['benchmarks'][0]['stats']['iterations']
+    runs = list(storage.load_data(fullname))
+    assert [(path, iterations, list(data)) for path, iterations, data in runs] == [
+        (Path('FoobarOS/0001_foo.json'), iterations, [0.5, 0.25]),
+        (Path('FoobarOS/0002_bar.json.gz'), iterations, [1.0, 2.0, 3.0]),
+    ]
+    assert all(isinstance(data, memoryview) for _, _, data in runs)
+    assert [path for path, _, _ in storage.load_data(fullname, '0002')] == [Path('FoobarOS/0002_bar.json.gz')]
+    assert list(storage.load_data('nope')) == []
+
+    # a partially written run (the index line is missing) and a truncated data file
+    [data_file] = (tmp_path / 'FoobarOS' / '.data').glob('*.f8')
+    with data_file.open('ab') as fh:
+        fh.write(b'\0' * 12)
+    assert [list(data) for _, _, data in storage.load_data(fullname)] == [[0.5, 0.25], [1.0, 2.0, 3.0]]
+    data_file.write_bytes(data_file.read_bytes()[:20])
+    assert [list(data) for _, _, data in storage.load_data(fullname)] == [[0.5, 0.25], [1.0, 2.0, 3.0]]
+    data_file.write_bytes(b'')
+    assert [list(data) for _, _, data in storage.load_data(fullname)] == [[0.5, 0.25], [1.0, 2.0, 3.0]]
+    data_file.unlink()
+    assert [list(data) for _, _, data in storage.load_data(fullname)] == [[0.5, 0.25], [1.0, 2.0, 3.0]]
+
+    # runs saved before there was an archive
+    shutil.rmtree(tmp_path / 'FoobarOS' / '.data')
+    assert list(storage.load_data(fullname)) == [
+        (Path('FoobarOS/0001_foo.json'), iterations, [0.5, 0.25]),
+        (Path('FoobarOS/0002_bar.json.gz'), iterations, [1.0, 2.0, 3.0]),
+    ]
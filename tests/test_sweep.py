@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from pytest_benchmark.stats import fit_complexity
+from pytest_benchmark.utils import ComplexityRegressionCheck
+from pytest_benchmark.utils import parse_compare_fail
+
+pytest_plugins = ('pytester',)
+
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_sweep(benchmark):
+    assert benchmark.sweep(lambda items: sum(items), sizes=[30, 10, 20], make_input=range) == [45, 190, 435]
+    assert benchmark.stats.name == 'test_sweep[size=30]'
+    assert benchmark.stats.params == {'size': 30}
+    assert benchmark.stats.sweep['size'] == 30
+    assert benchmark.stats.complexity in ('O(1)', 'O(log n)', 'O(n)', 'O(n log n)', 'O(n^2)')
+
+
+def test_sweep_bad_sizes(benchmark):
+    with pytest.raises(ValueError, match=r'Must have at least 2 different positive ints for `sizes`\.'):
+        benchmark.sweep(range, sizes=[10, 10])
+
+
+@pytest.mark.parametrize(
+    ('model', 'expected'),
+    [
+        (lambda n: 5, 'O(1)'),
+        (lambda n: n.bit_length(), 'O(log n)'),
+        (lambda n: 3 * n, 'O(n)'),
+        (lambda n: n * n.bit_length(), 'O(n log n)'),
+        (lambda n: n * n / 2, 'O(n^2)'),
+    ],
+)
+def test_fit_complexity(model, expected):
+    sizes = [2**power for power in range(4, 14)]
+    complexity, coef, rms = fit_complexity(sizes, [model(size) for size in sizes])
+    assert complexity == expected
+    assert coef > 0
+    assert rms < 0.1
+
+
+def test_parse_compare_fail_complexity():
+    check = parse_compare_fail('complexity')
+    assert isinstance(check, ComplexityRegressionCheck)
+    assert check.threshold == 0
+    assert parse_compare_fail('complexity:2').threshold == 2
+
+
+def test_complexity_check():
+    check = ComplexityRegressionCheck()
+    assert check.fails({'complexity': 'O(n)'}, {'complexity': 'O(n)'}) is None
+    assert check.fails({'complexity': 'O(1)'}, {'complexity': 'O(n)'}) is None
+    assert check.fails({'complexity': 'O(n)'}, {}) is None
+    assert check.fails({'complexity': 'O(n^2)'}, {'complexity': 'O(n)'}) == (
+        "Field 'complexity' has failed ComplexityRegressionCheck: O(n) -> O(n^2) (2 > 0)"
+    )
+    assert ComplexityRegressionCheck(2).fails({'complexity': 'O(n^2)'}, {'complexity': 'O(n)'}) is None
+
+
+def test_sweep_table(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_sum(benchmark):
+    benchmark.sweep(sum, sizes=[1000, 2000, 4000], make_input=range)
+"""
+    )
+    result = testdir.runpytest_subprocess(
+        '--benchmark-sort=name', '--benchmark-columns=min,rounds,complexity', '--benchmark-json=out.json', test
+    )
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Min * Rounds  Complexity',
+            '------*',
+            'test_sum[[]size=1000[]] * O(*)',
+            'test_sum[[]size=2000[]] * O(*)',
+            'test_sum[[]size=4000[]] * O(*)',
+            '------*',
+            '',
+            'Legend:',
+            '*',
+            '*',
+            '  Complexity: *',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    benchmarks = {bench['param']: bench for bench in data['benchmarks']}
+    assert benchmarks['size=1000']['params'] == {'size': 1000}
+    assert benchmarks['size=2000']['stats']['size'] == 2000
+    assert benchmarks['size=2000']['stats']['complexity'] == benchmarks['size=1000']['stats']['complexity']
+    assert benchmarks['size=2000']['stats']['complexity_coef'] > 0
+
+
+def test_sweep_compare_fail(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_sum(benchmark):
+    benchmark.sweep(sum, sizes=[1000, 10000, 100000], make_input=range)
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-autosave', test)
+    assert result.ret == 0
+    for path in testdir.tmpdir.join('.benchmarks').visit('*.json'):
+        data = json.loads(path.read())
+        for bench in data['benchmarks']:
+            bench['stats']['complexity'] = 'O(1)'
+        path.write(json.dumps(data))
+    result = testdir.runpytest_subprocess('--benchmark-compare', '--benchmark-compare-fail=complexity', test)
+    result.stderr.fnmatch_lines(
+        [
+            '*Performance has regressed:',
+            "\ttest_sum[[]size=1000[]] (0001_*) - Field 'complexity' has failed ComplexityRegressionCheck: O(1) -> O(n*",
+        ]
+    )
+    assert result.ret
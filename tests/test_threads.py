@@ -0,0 +1,80 @@
+import json
+import threading
+
+import pytest
+
+pytest_plugins = ('pytester',)
+
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_threads(benchmark):
+    idents = set()
+
+    def stuff(foo, bar=123):
+        idents.add(threading.get_ident())
+        return foo, bar
+
+    assert benchmark.threads(stuff, 1, bar=2, counts=[3, 1]) == (1, 2)
+    assert len(idents) >= 3
+    assert benchmark.stats.name == 'test_threads[threads=3]'
+    assert benchmark.stats.params == {'threads': 3}
+    assert benchmark.stats.threads['threads'] == 3
+    assert benchmark.stats.threads['aggregate_ops'] > 0
+    assert benchmark.stats.stats.rounds % 3 == 0
+
+
+@pytest.mark.benchmark(max_time=0.01)
+def test_threads_error(benchmark):
+    def stuff():
+        raise ZeroDivisionError
+
+    with pytest.raises(ZeroDivisionError):
+        benchmark.threads(stuff, counts=[2])
+
+
+def test_threads_bad_counts(benchmark):
+    with pytest.raises(ValueError, match=r'Must have positive ints for `counts`\.'):
+        benchmark.threads(int, counts=[0])
+
+
+def test_threads_coroutine(benchmark):
+    async def stuff():
+        pass
+
+    with pytest.raises(TypeError, match=r"Can't use coroutine functions with `benchmark\.threads`\."):
+        benchmark.threads(stuff)
+
+
+def test_threads_table(testdir):
+    test = testdir.makepyfile(
+        """
+import pytest
+
+@pytest.mark.benchmark(max_time=0.01)
+@pytest.mark.parametrize('size', [100])
+def test_sum(benchmark, size):
+    benchmark.threads(sum, range(size), counts=[1, 2])
+"""
+    )
+    result = testdir.runpytest_subprocess('--benchmark-sort=name', '--benchmark-json=out.json', test)
+    result.stdout.fnmatch_lines(
+        [
+            'Name (time in ?s) * Rounds  Iterations  Threads  Agg. ops/s  Scaling',
+            '------*',
+            'test_sum[[]100-threads=1[]] * 1  * 100.00%',
+            'test_sum[[]100-threads=2[]] * 2  * ?*.??%',
+            '------*',
+            '',
+            'Legend:',
+            '*',
+            '*',
+            '  Agg. ops/s: *',
+        ]
+    )
+    with open('out.json') as fh:
+        data = json.load(fh)
+    benchmarks = {bench['param']: bench for bench in data['benchmarks']}
+    assert benchmarks['100-threads=1']['params'] == {'size': 100, 'threads': 1}
+    assert benchmarks['100-threads=1']['stats']['scaling'] == 1.0
+    assert benchmarks['100-threads=2']['stats']['threads'] == 2
+    assert benchmarks['100-threads=2']['stats']['aggregate_ops'] > 0
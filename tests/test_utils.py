@@ -2,15 +2,22 @@ import argparse
 import os
 import shutil
 import subprocess
+import sys
 from pathlib import Path
 
 import pytest
 
+from pytest_benchmark.utils import SignificanceRegressionCheck
 from pytest_benchmark.utils import clonefunc
 from pytest_benchmark.utils import get_commit_info
 from pytest_benchmark.utils import get_project_name
+from pytest_benchmark.utils import parse_bootstrap
 from pytest_benchmark.utils import parse_columns
+from pytest_benchmark.utils import parse_compare_fail
+from pytest_benchmark.utils import parse_cpu_list
 from pytest_benchmark.utils import parse_elasticsearch_storage
+from pytest_benchmark.utils import parse_precision
+from pytest_benchmark.utils import parse_sched
 from pytest_benchmark.utils import parse_warmup
 
 pytest_plugins = ('pytester',)
@@ -140,6 +147,74 @@ def test_parse_warmup():
     assert parse_warmup('auto') in [True, False]
 
 
+def test_parse_precision():
+    assert parse_precision('1%') == 0.01
+    assert parse_precision(' 2.5% ') == 0.025
+    assert parse_precision('0.05') == 0.05
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_precision('0')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_precision('100%')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_precision('foo%')
+
+
+def test_parse_bootstrap(monkeypatch):
+    with pytest.raises(argparse.ArgumentTypeError, match='must be at least 2'):
+        parse_bootstrap('1')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_bootstrap('foo')
+    monkeypatch.setitem(sys.modules, 'numpy', None)
+    with pytest.raises(argparse.ArgumentTypeError, match='requires numpy'):
+        parse_bootstrap('1000')
+
+
+def test_parse_compare_fail_significant():
+    check = parse_compare_fail('mean:significant')
+    assert isinstance(check, SignificanceRegressionCheck)
+    assert (check.field, check.threshold, check.fallback.threshold) == ('mean', 0.05, 5)
+    check = parse_compare_fail('median:significant:p=0.01:10%')
+    assert (check.field, check.threshold, check.fallback.threshold) == ('median', 0.01, 10)
+    with pytest.raises(argparse.ArgumentTypeError, match='Must be between 0 and 1'):
+        parse_compare_fail('mean:significant:p=0.0')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_compare_fail('min:significant')
+
+
+def test_significance_check():
+    check = SignificanceRegressionCheck('median', 0.01)
+    compared = {'median': 1.0, 'data': [1.0, 1.1, 0.9, 1.0, 1.05, 0.95]}
+    assert check.fails({'median': 1.0, 'data': [1.0, 0.9, 1.1, 1.02, 0.98, 1.0]}, compared) is None
+    assert check.fails({'median': 2.0, 'data': [2.0, 2.1, 1.9, 2.0, 2.05, 1.95]}, compared) == (
+        "Field 'median' has failed SignificanceRegressionCheck: p=0.002461 < 0.01 (effect size: +1.000, change: +100.00%)"
+    )
+    # without the rounds data it's just a percentage check
+    assert check.fails({'median': 1.04}, {'median': 1.0}) is None
+    assert check.fails({'median': 1.06, 'data': [1.06]}, {'median': 1.0}) == (
+        "Field 'median' has failed PercentageRegressionCheck: 6.000000000 > 5.000000000"
+    )
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list('3') == [3]
+    assert parse_cpu_list('2,3,6-9') == [2, 3, 6, 7, 8, 9]
+    assert parse_cpu_list(' 1,1,0 ') == [1, 0]
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_cpu_list('1-')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_cpu_list('foo')
+
+
+def test_parse_sched():
+    assert parse_sched('fifo') == ('fifo', 1)
+    assert parse_sched('RR:50') == ('rr', 50)
+    assert parse_sched('batch') == ('batch', 0)
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_sched('foo')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_sched('fifo:high')
+
+
 def test_parse_columns():
     assert parse_columns('min,max') == ['min', 'max']
     assert parse_columns('MIN, max  ') == ['min', 'max']